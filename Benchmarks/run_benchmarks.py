@@ -0,0 +1,547 @@
+### Benchmarks for the NETCONF, RESTCONF and NX-API scripts against local stand-in servers
+### Starts ../Simulators/*_simulator.py as subprocesses on free ports, runs the benchmarks and
+### writes one JSON result file per run to Benchmarks/results/.
+#
+#   python run_benchmarks.py                             # all groups, fleet sizes 1 100 5000
+#   python run_benchmarks.py --only rpc parse            # groups: connect rpc parse fleet
+#   python run_benchmarks.py --sizes 1 100 --rpc-delay 0.005
+#   python run_benchmarks.py --compare                   # against the newest earlier result
+#   python run_benchmarks.py --compare results/20261018-101500_3292937.json --threshold 0.15
+#
+# Every metric is a wall-clock time in seconds (lower is better), summarised as
+# min / median / p95 over --repeat rounds (fleet sweeps run once per size). --compare
+# lines up the medians with a baseline result and exits 1 if any metric got slower by
+# more than --threshold. Each result records the git commit, whether the tree was
+# dirty and the Python / platform / CPU count, so only like-for-like runs are compared.
+#
+# A simulated fleet of N devices is N loopback addresses (127.0.0.1, 127.0.0.2, ...)
+# on one port, so the real fleet code paths run unchanged. --rpc-delay adds a fixed
+# server-side delay per request to approximate a real device's response time.
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import xml.dom.minidom
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+REPO_DIR = Path(__file__).resolve().parents[1]
+SIM_DIR = REPO_DIR / "Simulators"
+NETCONF_DIR = REPO_DIR / "IOS-XE" / "NETCONF"
+RESTCONF_DIR = REPO_DIR / "IOS-XE" / "RESTCONF"
+NXAPI_CLI_DIR = REPO_DIR / "NX-OS" / "NX-API CLI"
+FLEET_DIR = REPO_DIR / "Fleet"
+
+# NETCONF first: its device_info is the one netconf_capabilities_refined imports
+for path in (NETCONF_DIR, RESTCONF_DIR, NXAPI_CLI_DIR, SIM_DIR, FLEET_DIR):
+    sys.path.append(str(path))
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+RESULT_DIR = Path(__file__).resolve().parent / "results"
+GROUPS = ("connect", "rpc", "parse", "fleet")
+DEFAULT_SIZES = (1, 100, 5000)
+DEFAULT_REPEAT = 30
+DEFAULT_THRESHOLD = 0.10        # 10 % slower median = regression
+PARSE_INTERFACES = 1000         # interfaces in the reply used by the parse benchmarks
+PARSE_BATCH = 16                # replies per round of the parse pool benchmarks
+FLEET_INTERFACES = 48
+NXAPI_ROUTES = 20000
+FLEET_WORKERS = 50              # collect_fleet threads for the NETCONF sweep
+FABRIC_SPINES = 4               # spines of the simulated fabric the topology crawl walks
+STARTUP_TIMEOUT = 120           # seconds for a simulator to listen on all its addresses
+SWEEP_TIMEOUT = 120             # per-device timeout inside the fleet sweeps
+USERNAME = "admin"
+PASSWORD = "admin"
+
+
+class BenchmarkError(Exception):
+    """A simulator could not be started or a benchmark could not run."""
+
+
+# -----------------------------
+# SIMULATOR PROCESSES
+# -----------------------------
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class SimulatorProcess:
+    """One simulator script running in a child process for the duration of a with block."""
+
+    def __init__(self, script, devices=1, args=()):
+        from sim_common import loopback_hosts
+        self.script = script
+        self.hosts = loopback_hosts(devices)
+        self.args = [str(a) for a in args]
+        self.port = None
+        self.proc = None
+        self._log = None
+
+    def start(self):
+        self.port = free_port()
+        self._log = tempfile.TemporaryFile(mode="w+")
+        cmd = [sys.executable, str(SIM_DIR / self.script), "--port", str(self.port),
+               "--devices", str(len(self.hosts)), *self.args]
+        self.proc = subprocess.Popen(cmd, stdout=self._log, stderr=subprocess.STDOUT, cwd=SIM_DIR)
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            if self.proc.poll() is not None:
+                self._log.seek(0)
+                raise BenchmarkError(f"{self.script} exited with {self.proc.returncode}:\n{self._log.read()[-2000:]}")
+            try:
+                # the last address is bound last, so once it answers they all do
+                with socket.create_connection((self.hosts[-1], self.port), timeout=1):
+                    return self
+            except OSError:
+                if time.monotonic() > deadline:
+                    self.stop()
+                    raise BenchmarkError(f"{self.script} not listening after {STARTUP_TIMEOUT}s")
+                time.sleep(0.2)
+
+    def stop(self):
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        if self._log:
+            self._log.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def inventory(self):
+        from sim_common import inventory
+        return inventory(self.hosts, self.port, USERNAME, PASSWORD)
+
+
+# -----------------------------
+# TIMING
+# -----------------------------
+def summarize(samples, **extra):
+    ordered = sorted(samples)
+    result = {
+        "unit": "s",
+        "rounds": len(ordered),
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))],
+        "mean": statistics.fmean(ordered),
+    }
+    result.update(extra)
+    return result
+
+def timed(fn, repeat, warmup=1, **extra):
+    """Run fn warmup + repeat times; summary of the timed rounds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, **extra)
+
+def record(results, name, summary):
+    results[name] = summary
+    line = f"  {name:<34} median {summary['median'] * 1000:10.3f} ms   p95 {summary['p95'] * 1000:10.3f} ms"
+    if summary.get("errors"):
+        line += f"   errors {summary['errors']}"
+    print(line, flush=True)
+
+
+# -----------------------------
+# BENCHMARKS
+# -----------------------------
+def netconf_connect(dev):
+    from ncclient import manager
+    return manager.connect(host=dev["host"], port=int(dev["port"]), username=dev["username"],
+                           password=dev["password"], hostkey_verify=False, allow_agent=False,
+                           look_for_keys=False, timeout=30)
+
+def bench_connect(args, results):
+    with SimulatorProcess("netconf_simulator.py", args=["--change-interval", 0]) as sim:
+        dev = sim.inventory()[0]
+
+        def connect_close():
+            netconf_connect(dev).close_session()
+        record(results, "netconf.connect", timed(connect_close, args.repeat))
+
+    with SimulatorProcess("nxapi_simulator.py") as sim:
+        import requests
+        dev = sim.inventory()[0]
+        url = f"https://{dev['host']}:{dev['port']}/api/aaaLogin.json"
+        body = {"aaaUser": {"attributes": {"name": USERNAME, "pwd": PASSWORD}}}
+
+        def login():
+            # a new session each round: TCP + TLS handshake + login, like get_token.py
+            with requests.Session() as s:
+                s.post(url, json=body, verify=False, timeout=10).raise_for_status()
+        record(results, "nxapi.login", timed(login, args.repeat))
+
+def bench_rpc(args, results):
+    import requests
+    from netconf_capabilities_refined import load_filter
+    from filter_compiler import compile_filter
+    from xml_templates import get_template
+    from restconf_interfaces import interfaces_url
+    import nxapi_chunked
+
+    delay = ["--rpc-delay", args.rpc_delay]
+    with SimulatorProcess("netconf_simulator.py", args=["--change-interval", 0, *delay]) as sim:
+        netconf_filter = load_filter(NETCONF_DIR / "netconf-filter.xml")
+        config = get_template("ios_modify.xml").render(iface_id=2, interface_desc="benchmark",
+                                                       ip_address="10.0.0.1", subnet_mask="255.255.255.0")
+        m = netconf_connect(sim.inventory()[0])
+        try:
+            record(results, "netconf.get", timed(lambda: m.get(netconf_filter), args.repeat))
+            # every interface: the whole trees vs only the leaves the collectors read
+            for name, spec in (("netconf.get_unfiltered", None),
+                               ("netconf.get_compiled_subtree", compile_filter()),
+                               ("netconf.get_compiled_xpath", compile_filter(xpath=True))):
+                get = (lambda spec=spec: m.get(spec)) if spec else m.get
+                record(results, name, timed(get, args.repeat, reply_bytes=len(get().xml)))
+            record(results, "netconf.get_config", timed(lambda: m.get_config(source="running"), args.repeat))
+            record(results, "netconf.edit_config",
+                   timed(lambda: m.edit_config(target="running", config=config), args.repeat))
+        finally:
+            m.close_session()
+
+    with SimulatorProcess("restconf_simulator.py", args=delay) as sim, requests.Session() as s:
+        dev = sim.inventory()[0]
+        s.auth = (USERNAME, PASSWORD)
+        s.headers["Accept"] = "application/yang-data+json"
+        url = interfaces_url(dev)
+        record(results, "restconf.get_interfaces",
+               timed(lambda: s.get(url, verify=False, timeout=10).json(), args.repeat))
+
+    with SimulatorProcess("nxapi_simulator.py", args=[*delay, "--routes", NXAPI_ROUTES]) as sim, \
+            requests.Session() as s:
+        dev = sim.inventory()[0]
+        base = f"https://{dev['host']}:{dev['port']}"
+        s.auth = (USERNAME, PASSWORD)
+        payload = {"ins_api": {"version": "1.0", "type": "cli_show", "chunk": "0", "sid": "1",
+                               "input": "show ip interface brief", "output_format": "json"}}
+        record(results, "nxapi.ins",
+               timed(lambda: s.post(f"{base}/ins", json=payload, verify=False, timeout=10).json(), args.repeat))
+
+        row_key = nxapi_chunked.row_key_for("show ip route")
+
+        def chunked_routes():
+            chunks = nxapi_chunked.iter_chunks(s, f"{base}/ins", "show ip route")
+            return sum(1 for _ in nxapi_chunked.iter_rows(chunks, row_key))
+        record(results, "nxapi.ins_chunked_routes",
+               timed(chunked_routes, max(3, args.repeat // 10), rows=NXAPI_ROUTES))
+
+        s.auth = None
+        s.post(f"{base}/api/aaaLogin.json", json={"aaaUser": {"attributes": {"name": USERNAME, "pwd": PASSWORD}}},
+               verify=False, timeout=10).raise_for_status()
+        record(results, "nxapi.rest_l1physif",
+               timed(lambda: s.get(f"{base}/api/node/class/l1PhysIf.json", verify=False, timeout=10).json(),
+                     args.repeat))
+
+def parse_reply(interfaces):
+    """An rpc-reply like the one netconf_capabilities_refined receives, for interfaces interfaces."""
+    from netconf_simulator import BASE_NS, SimulatedInterfaces
+    state = SimulatedInterfaces(interfaces, seed=1)
+    return (f'<rpc-reply xmlns="{BASE_NS}" message-id="urn:uuid:1"><data>'
+            f'{state.config_xml()}{state.state_xml()}</data></rpc-reply>')
+
+def bench_parse(args, results):
+    import xmltodict
+    from lxml import etree
+    from interface_stream_parser import IF_NS, iter_interface_records
+
+    reply = parse_reply(args.parse_interfaces)
+    reply_bytes = reply.encode("utf-8")
+
+    def with_minidom():
+        doc = xml.dom.minidom.parseString(reply)
+        state = doc.getElementsByTagNameNS(IF_NS, "interfaces-state")[0]
+        return [(i.getElementsByTagName("name")[0].firstChild.data,
+                 i.getElementsByTagName("oper-status")[0].firstChild.data)
+                for i in state.getElementsByTagNameNS(IF_NS, "interface")]
+
+    def with_xmltodict():
+        data = xmltodict.parse(reply)["rpc-reply"]["data"]
+        return [(i["name"], i["oper-status"]) for i in data["interfaces-state"]["interface"]]
+
+    def with_lxml():
+        root = etree.fromstring(reply_bytes)
+        ns = {"if": IF_NS}
+        return [(i.findtext("if:name", namespaces=ns), i.findtext("if:oper-status", namespaces=ns))
+                for i in root.iterfind(".//if:interfaces-state/if:interface", namespaces=ns)]
+
+    def with_stream_parser():
+        return [(r["name"], r["oper_status"]) for r in iter_interface_records(reply_bytes)]
+
+    parsers = (("minidom", with_minidom), ("xmltodict", with_xmltodict), ("lxml", with_lxml),
+               ("stream_parser", with_stream_parser))
+    expected = with_lxml()
+    for name, fn in parsers:
+        if fn() != expected:
+            raise BenchmarkError(f"parse.{name} does not agree with lxml on the test reply")
+        record(results, f"parse.{name}", timed(fn, max(3, args.repeat // 3), rows=args.parse_interfaces,
+                                                reply_bytes=len(reply_bytes)))
+
+    # a sweep's worth of replies parsed in the calling thread (0) vs in worker processes
+    from netconf_fleet_collect import RECORD_PARSER
+    from parse_pool import CPU_COUNT, ParsePool
+    replies = [reply] * PARSE_BATCH
+    for workers in sorted({0, max(2, CPU_COUNT)}):
+        with ParsePool(workers) as pool:
+            def pooled():
+                return sum(len(records) for records in pool.map(RECORD_PARSER, replies))
+            if pooled() != args.parse_interfaces * PARSE_BATCH:
+                raise BenchmarkError(f"parse.stream_parser_pool{workers} lost records")
+            record(results, f"parse.stream_parser_pool{workers}",
+                   timed(pooled, max(3, args.repeat // 3), rows=args.parse_interfaces * PARSE_BATCH,
+                         reply_bytes=len(reply_bytes) * PARSE_BATCH, workers=workers, cpus=CPU_COUNT))
+
+    # NX-API show ip route reply: dicts from json vs lazily built row records
+    from nxapi_simulator import ShowOutputs
+    import nxapi_response
+    body = ShowOutputs(routes=NXAPI_ROUTES).body("show ip route")
+    ins_reply = json.dumps({"ins_api": {"outputs": {"output": {"code": "200", "input": "show ip route",
+                                                               "body": body}}}}).encode("utf-8")
+
+    def with_json_dicts():
+        data = json.loads(ins_reply)["ins_api"]["outputs"]["output"]["body"]
+        return [prefix["ipprefix"]
+                for vrf in data["TABLE_vrf"]["ROW_vrf"]
+                for addrf in vrf["TABLE_addrf"]["ROW_addrf"]
+                for prefix in addrf["TABLE_prefix"]["ROW_prefix"]]
+
+    def with_row_records():
+        return [row.ipprefix for row in nxapi_response.NxapiResponse(ins_reply).rows("ROW_prefix")]
+
+    expected = with_json_dicts()
+    nxapi_parsers = (("nxapi_json", with_json_dicts),
+                     (f"nxapi_records_{nxapi_response.JSON_BACKEND}", with_row_records))
+    for name, fn in nxapi_parsers:
+        if fn() != expected:
+            raise BenchmarkError(f"parse.{name} does not agree with json on the test reply")
+        record(results, f"parse.{name}", timed(fn, max(3, args.repeat // 3), rows=len(expected),
+                                                reply_bytes=len(ins_reply)))
+
+def bench_fleet(args, results):
+    from netconf_capabilities_refined import load_filter
+    from netconf_fleet_collect import collect_fleet
+    from restconf_async import AsyncRestconfClient
+    from restconf_interfaces import OPER_MODULE
+
+    netconf_filter = load_filter(NETCONF_DIR / "netconf-filter.xml")
+    common = ["--interfaces", FLEET_INTERFACES, "--rpc-delay", args.rpc_delay]
+    for size in args.sizes:
+        with SimulatorProcess("netconf_simulator.py", size, ["--change-interval", 0, *common]) as sim:
+            inventory = sim.inventory()
+            started = time.perf_counter()
+            _, errors = collect_fleet(inventory, netconf_filter, max_workers=args.workers, timeout=SWEEP_TIMEOUT)
+            record(results, f"fleet.netconf.{size}",
+                   summarize([time.perf_counter() - started], devices=size, errors=len(errors)))
+
+        with SimulatorProcess("restconf_simulator.py", size, common) as sim:
+            inventory = sim.inventory()
+
+            async def sweep():
+                async with AsyncRestconfClient(timeout=SWEEP_TIMEOUT) as client:
+                    return await client.get_many([(dev, f"{OPER_MODULE}:interfaces") for dev in inventory])
+            started = time.perf_counter()
+            replies = asyncio.run(sweep())
+            record(results, f"fleet.restconf.{size}",
+                   summarize([time.perf_counter() - started], devices=size,
+                             errors=sum(1 for r in replies if isinstance(r, Exception))))
+
+        with SimulatorProcess("nxapi_simulator.py", size, common) as sim:
+            import requests
+            inventory = sim.inventory()
+            payload = {"ins_api": {"version": "1.0", "type": "cli_show", "chunk": "0", "sid": "1",
+                                   "input": "show interface status", "output_format": "json"}}
+
+            def show(dev):
+                with requests.Session() as s:
+                    s.post(f"https://{dev['host']}:{dev['port']}/ins", json=payload, auth=(USERNAME, PASSWORD),
+                           verify=False, timeout=SWEEP_TIMEOUT).raise_for_status()
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.workers) as pool:
+                outcomes = list(pool.map(lambda dev: _capture(show, dev), inventory))
+            record(results, f"fleet.nxapi.{size}",
+                   summarize([time.perf_counter() - started], devices=size,
+                             errors=sum(1 for error in outcomes if error)))
+
+        if size > FABRIC_SPINES:
+            bench_topology(args, results, size)
+
+def bench_topology(args, results, size):
+    """Crawl a spine-leaf fabric of size switches from one seed, then a refresh with nothing changed."""
+    from inventory import Inventory
+    from topology import Crawler, TopologyStore
+
+    with SimulatorProcess("nxapi_simulator.py", size, ["--spines", FABRIC_SPINES, "--rpc-delay",
+                                                       args.rpc_delay]) as sim, \
+            tempfile.TemporaryDirectory() as tmp, TopologyStore(Path(tmp) / "topology.sqlite") as store:
+        inventory = Inventory.from_device_dicts(sim.inventory()[:1], platform="nx-os", protocol="nxapi")
+        crawler = Crawler(store, inventory, {"nxapi": sim.port}, workers=args.workers, timeout=SWEEP_TIMEOUT,
+                          out=lambda line: None)
+        stats = crawler.crawl([sim.hosts[0]])
+        record(results, f"fleet.topology_crawl.{size}",
+               summarize([stats["elapsed"]], devices=size, polled=stats["polled"], errors=stats["failed"]))
+        stats = crawler.refresh()
+        record(results, f"fleet.topology_refresh.{size}",
+               summarize([stats["elapsed"]], devices=size, polled=stats["polled"], errors=stats["probe_failed"]))
+
+def _capture(fn, *args):
+    """Run fn; the exception instead of raising (None when it succeeded)."""
+    try:
+        fn(*args)
+    except Exception as e:
+        return e
+    return None
+
+BENCHMARKS = {
+    "connect": bench_connect,
+    "rpc": bench_rpc,
+    "parse": bench_parse,
+    "fleet": bench_fleet,
+}
+
+
+# -----------------------------
+# RESULTS
+# -----------------------------
+def git_info():
+    def git(*cmd):
+        try:
+            return subprocess.run(["git", *cmd], cwd=REPO_DIR, capture_output=True, text=True,
+                                  timeout=30).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+def environment(args):
+    return {
+        **git_info(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "groups": args.only,
+        "sizes": args.sizes,
+        "repeat": args.repeat,
+        "rpc_delay": args.rpc_delay,
+    }
+
+def save_results(data, result_dir=RESULT_DIR):
+    result_dir.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    path = result_dir / f"{stamp}_{data['meta']['commit'][:10]}.json"
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, indent=2)
+    return path
+
+def latest_result(exclude=None, result_dir=RESULT_DIR):
+    candidates = sorted(p for p in result_dir.glob("*.json") if p != exclude)
+    return candidates[-1] if candidates else None
+
+def compare(current, baseline, threshold):
+    """Print median deltas per metric; returns the names of metrics that regressed."""
+    base_meta, meta = baseline["meta"], current["meta"]
+    for key in ("python", "cpus", "machine", "rpc_delay"):
+        if base_meta.get(key) != meta.get(key):
+            print(f"  note: {key} differs ({base_meta.get(key)} -> {meta.get(key)}), deltas are not like-for-like")
+    print(f"  baseline {base_meta['commit'][:10]}{' (dirty)' if base_meta.get('dirty') else ''} "
+          f"-> current {meta['commit'][:10]}{' (dirty)' if meta.get('dirty') else ''}")
+    regressions = []
+    common = sorted(set(current["metrics"]) & set(baseline["metrics"]))
+    if not common:
+        print("  no metrics in common (different --only / --sizes?)")
+    for name in common:
+        old = baseline["metrics"][name]["median"]
+        new = current["metrics"][name]["median"]
+        delta = (new - old) / old if old else 0.0
+        flag = ""
+        if delta > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif delta < -threshold:
+            flag = "  faster"
+        print(f"  {name:<34} {old * 1000:10.3f} ms -> {new * 1000:10.3f} ms  {delta:+7.1%}{flag}")
+    return regressions
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmarks against the local NETCONF/RESTCONF/NX-API simulators")
+    parser.add_argument("--only", nargs="+", choices=GROUPS, default=list(GROUPS), help="benchmark groups to run")
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES),
+                        help="simulated fleet sizes for the fleet group")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="timed rounds per benchmark")
+    parser.add_argument("--rpc-delay", type=float, default=0.0, help="server-side seconds added to every request")
+    parser.add_argument("--workers", type=int, default=FLEET_WORKERS, help="threads for the threaded fleet sweeps")
+    parser.add_argument("--parse-interfaces", type=int, default=PARSE_INTERFACES)
+    parser.add_argument("--compare", nargs="?", const="latest", metavar="RESULT",
+                        help="compare with a result file (default: the newest earlier one)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional slowdown of a median counted as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not write a result file")
+    return parser.parse_args(argv[1:])
+
+def main(argv):
+    args = parse_args(argv)
+    import urllib3
+    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    data = {"meta": environment(args), "metrics": {}}
+    for group in GROUPS:
+        if group in args.only:
+            print(f"[{group}]", flush=True)
+            try:
+                BENCHMARKS[group](args, data["metrics"])
+            except BenchmarkError as e:
+                print(f"  FAILED: {e}")
+                return 2
+
+    path = None
+    if not args.no_save:
+        path = save_results(data)
+        print(f"Results written to {path}")
+
+    if args.compare:
+        baseline_path = latest_result(exclude=path) if args.compare == "latest" else Path(args.compare)
+        if baseline_path is None or not baseline_path.exists():
+            print("No baseline result to compare with")
+            return 2
+        with open(baseline_path, "r", encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        print(f"Compared with {baseline_path.name} (threshold {args.threshold:.0%}):")
+        regressions = compare(data, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,388 @@
+### Per-device, per-operation instrumentation for the NETCONF / RESTCONF / NX-API helpers
+### Latency and size histograms plus error counters, exported as Prometheus text or JSON
+### lines, and an opt-in cProfile / stack-sampling hook for one run.
+#
+#   python instrumentation.py top netops.jsonl [n]     # slowest device/operation pairs by p95
+#
+# Configured from the environment, so the scripts need no new flags:
+#   NETOPS_METRICS=/tmp/netops.prom     Prometheus text exposition, written at exit
+#   NETOPS_METRICS=/tmp/netops.jsonl    one JSON line per series, appended at exit
+#   NETOPS_METRICS=:9108                serve /metrics on 127.0.0.1:9108 while the script runs
+#   NETOPS_PROFILE=/tmp/run.prof        cProfile the main thread, pstats dump at exit
+#   NETOPS_PROFILE=/tmp/run.folded      sample the stacks of all threads every 5 ms and write
+#                                       them in collapsed format (flamegraph.pl / speedscope)
+#
+# In code:
+#     with operation(host, "edit_config", request_bytes=len(payload)) as op:
+#         reply = m.edit_config(target="running", config=payload)
+#         op.received(len(reply.xml))
+#         with op.phase("parse"):
+#             root = etree.fromstring(reply.xml.encode())
+#
+# The block as a whole is the RPC round trip; time spent inside op.phase(...) is recorded
+# under that phase ("connect", "parse", ...) and not counted as round trip. An exception
+# leaving the block counts one error labelled with its class name and is re-raised.
+# Recording is a bisect and a few additions under a lock, so it is always on; nothing is
+# written anywhere unless NETOPS_METRICS is set.
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+METRIC_PREFIX = "netops"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+SAMPLE_INTERVAL = 0.005       # seconds between stack samples
+SAMPLE_DEPTH = 64             # frames kept per sampled stack
+USAGE = "usage: instrumentation.py top <metrics.jsonl> [n]"
+
+
+class Histogram:
+    """Fixed-bucket histogram; counts are per bucket, the last bucket is +Inf."""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        out = []
+        for bound, n in zip(self.bounds + (float("inf"),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+    def quantile(self, q):
+        """Estimate from the buckets (linear within the bucket), like histogram_quantile()."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for bound, n in zip(self.bounds, self.counts):
+            if seen + n >= rank and n:
+                return lower + (bound - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.bounds[-1]
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape_label(v)}"' for k, v in items) + "}"
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+class Registry:
+    """Histograms and counters keyed by (metric name, sorted label tuple)."""
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.help = {}
+
+    def observe(self, name, labels, value, bounds=LATENCY_BUCKETS):
+        key = (f"{self.prefix}_{name}", tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram(bounds)
+            hist.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (f"{self.prefix}_{name}", tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    # -----------------------------
+    # EXPORT
+    # -----------------------------
+    def prometheus_text(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for name in sorted({n for n, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), hist in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    for bound, total in hist.cumulative():
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_bound(bound)))} {total}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {hist.sum!r}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {hist.count}")
+            for name in sorted({n for n, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def json_records(self, timestamp=None):
+        """One dict per series, with bucket counts and p50/p95/p99 estimates for histograms."""
+        timestamp = time.time() if timestamp is None else timestamp
+        records = []
+        with self._lock:
+            for (name, labels), hist in sorted(self.histograms.items()):
+                records.append({
+                    "ts": timestamp, "metric": name, "type": "histogram", "labels": dict(labels),
+                    "count": hist.count, "sum": hist.sum,
+                    "p50": hist.quantile(0.5), "p95": hist.quantile(0.95), "p99": hist.quantile(0.99),
+                    "buckets": {_format_bound(b): n for b, n in hist.cumulative()},
+                })
+            for (name, labels), value in sorted(self.counters.items()):
+                records.append({"ts": timestamp, "metric": name, "type": "counter", "labels": dict(labels),
+                                "value": value})
+        return records
+
+    def write(self, path):
+        """Write Prometheus text (replacing the file), or append JSON lines for *.jsonl / *.ndjson."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix in (".jsonl", ".ndjson"):
+            with open(path, "a", encoding="utf-8") as fh:
+                for rec in self.json_records():
+                    fh.write(json.dumps(rec) + "\n")
+        else:
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(self.prometheus_text(), encoding="utf-8")
+            os.replace(tmp, path)
+        return path
+
+    def serve(self, port, host="127.0.0.1"):
+        """Serve /metrics from a daemon thread; returns the server (shutdown() to stop)."""
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True, name="metrics-http").start()
+        return server
+
+
+REGISTRY = Registry()
+
+
+# -----------------------------
+# RECORDING
+# -----------------------------
+class Operation:
+    """One timed operation against one device; use through operation()."""
+
+    __slots__ = ("registry", "labels", "outer", "request_bytes", "response_bytes", "_started", "_nested")
+
+    def __init__(self, registry, device, name, phase="rpc", request_bytes=None):
+        self.registry = registry
+        self.labels = {"device": str(device), "operation": name}
+        self.outer = phase
+        self.request_bytes = request_bytes
+        self.response_bytes = None
+        self._nested = 0.0
+
+    def sent(self, nbytes):
+        self.request_bytes = (self.request_bytes or 0) + nbytes
+
+    def received(self, nbytes):
+        self.response_bytes = (self.response_bytes or 0) + nbytes
+
+    @contextmanager
+    def phase(self, name):
+        """Time a nested step (connect, parse, ...) separately from the round trip."""
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - started
+            self._nested += elapsed
+            self.registry.observe(f"{name}_seconds", self.labels, elapsed)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = time.perf_counter() - self._started - self._nested
+        registry = self.registry
+        registry.observe(f"{self.outer}_seconds", self.labels, max(0.0, elapsed))
+        if self.request_bytes is not None:
+            registry.observe("request_bytes", self.labels, self.request_bytes, BYTES_BUCKETS)
+        if self.response_bytes is not None:
+            registry.observe("response_bytes", self.labels, self.response_bytes, BYTES_BUCKETS)
+        if exc_type is not None:
+            registry.inc("errors_total", dict(self.labels, error=exc_type.__name__))
+        return False
+
+def operation(device, name, phase="rpc", request_bytes=None, registry=None):
+    """Context manager timing one operation; see the module header."""
+    return Operation(registry or REGISTRY, device, name, phase, request_bytes)
+
+
+# -----------------------------
+# PROFILING
+# -----------------------------
+class StackSampler:
+    """Samples the Python stacks of all other threads; write() gives collapsed stacks."""
+
+    def __init__(self, interval=SAMPLE_INTERVAL, depth=SAMPLE_DEPTH):
+        self.interval = interval
+        self.depth = depth
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None and len(stack) < self.depth:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            stack.append(names.get(ident, "thread"))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="stack-sampler")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in self.stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+@contextmanager
+def profiled(path):
+    """cProfile the calling thread (pstats file), or sample all threads for *.folded / *.stacks."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix in (".folded", ".stacks", ".txt"):
+        sampler = StackSampler().start()
+        try:
+            yield sampler
+        finally:
+            sampler.stop()
+            sampler.write(path)
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            profiler.dump_stats(str(path))
+
+
+# -----------------------------
+# ENVIRONMENT SETUP
+# -----------------------------
+_configured = False
+
+def configure_from_env(environ=os.environ):
+    """Apply NETOPS_METRICS / NETOPS_PROFILE once per process (runs on import)."""
+    global _configured
+    if _configured:
+        return
+    _configured = True
+    target = environ.get("NETOPS_METRICS")
+    if target:
+        if target.startswith(":") and target[1:].isdigit():
+            REGISTRY.serve(int(target[1:]))
+        else:
+            atexit.register(REGISTRY.write, target)
+    profile = environ.get("NETOPS_PROFILE")
+    if profile:
+        ctx = profiled(profile)
+        ctx.__enter__()
+        atexit.register(ctx.__exit__, None, None, None)
+
+configure_from_env()
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def print_top(path, n=20, metric=f"{METRIC_PREFIX}_rpc_seconds"):
+    """Slowest device/operation series of the last export in a JSON-lines file."""
+    latest = {}
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            rec = json.loads(line)
+            if rec.get("metric") == metric:
+                latest[tuple(sorted(rec["labels"].items()))] = rec
+    ranked = sorted(latest.values(), key=lambda r: r["p95"] or 0.0, reverse=True)[:n]
+    print(f"{'DEVICE':<24} {'OPERATION':<20} {'COUNT':>7} {'P50 ms':>9} {'P95 ms':>9}")
+    for rec in ranked:
+        labels = rec["labels"]
+        print(f"{labels.get('device', ''):<24} {labels.get('operation', ''):<20} {rec['count']:>7} "
+              f"{(rec['p50'] or 0) * 1000:>9.1f} {(rec['p95'] or 0) * 1000:>9.1f}")
+
+def main(argv):
+    if len(argv) < 3 or argv[1] != "top":
+        print(USAGE)
+        return 2
+    print_top(argv[2], int(argv[3]) if len(argv) > 3 else 20)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
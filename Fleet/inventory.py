@@ -0,0 +1,364 @@
+### Fleet inventory: one device list for every platform and protocol, indexed for selection
+### Replaces the per-directory device_info.py dicts for fleet tools; credentials are
+### resolved only when a device dict is actually handed to a script.
+#
+#   python inventory.py summary [inventory.json]
+#   python inventory.py select [inventory.json] --platform ios-xe --site lab1 --protocol netconf
+#   python inventory.py shards [inventory.json] 8 --protocol restconf
+#
+# Inventory file (INVENTORY_FILE env or Fleet/inventory.json), JSON:
+#   {
+#     "credentials": {"lab": {"username": "admin", "password_env": "LAB_PASSWORD"}},
+#     "defaults": {"credentials": "lab", "site": "lab1"},
+#     "devices": [
+#       {"host": "192.168.150.201", "platform": "ios-xe", "role": "edge",
+#        "protocols": {"netconf": 830, "restconf": 443}},
+#       {"host": "192.168.150.203", "platform": "nx-os", "protocols": ["nxapi", "nxapi-rest"]}
+#     ]
+#   }
+# A plain JSON list of device_info-style dicts (host/port/username/password) is accepted
+# too, as is CSV with a header (host,platform,site,role,protocols,credentials, protocols
+# written "netconf:830;restconf"). Without any file, the device_info.py files of the
+# platform directories are merged into one inventory.
+#
+# Credentials are never copied into devices: a device names a credential set, and the set
+# is resolved (inline password, password_env or password_file) the first time one of
+# its devices is turned into a dict, then cached. Devices are __slots__ objects indexed
+# by platform, site, role and protocol (value -> set of positions), so a selection is a
+# few set intersections even for tens of thousands of devices.
+
+import csv
+import importlib.util
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+REPO_DIR = Path(__file__).resolve().parents[1]
+INVENTORY_FILE = Path(os.getenv("INVENTORY_FILE") or Path(__file__).resolve().parent / "inventory.json")
+INDEXED_FIELDS = ("platform", "site", "role", "protocol")
+DEFAULT_PORTS = {"netconf": 830, "restconf": 443, "nxapi": 443, "nxapi-rest": 443}
+PLATFORM_PROTOCOLS = {"ios-xe": ("netconf", "restconf"), "nx-os": ("nxapi", "nxapi-rest")}
+
+# device_info.py of each directory -> (platform, protocol) of the device it describes
+DEVICE_INFO_FILES = {
+    REPO_DIR / "IOS-XE" / "NETCONF" / "device_info.py": ("ios-xe", "netconf"),
+    REPO_DIR / "IOS-XE" / "RESTCONF" / "device_info.py": ("ios-xe", "restconf"),
+    REPO_DIR / "NX-OS" / "NX-API CLI" / "device_info.py": ("nx-os", "nxapi"),
+    REPO_DIR / "NX-OS" / "NX-API REST" / "device_info.py": ("nx-os", "nxapi-rest"),
+}
+USAGE = ("usage: inventory.py summary [file] | select [file] [--platform P] [--site S] [--role R] "
+         "[--protocol X] | shards [file] N [filters]")
+
+
+class InventoryError(Exception):
+    """Unreadable inventory, unknown device or credential set, or unresolvable password."""
+
+
+class Device:
+    """One device; protocols maps protocol name -> port."""
+
+    __slots__ = ("host", "name", "platform", "site", "role", "protocols", "credentials", "extra")
+
+    def __init__(self, host, name=None, platform="", site="", role="", protocols=None, credentials="default",
+                 extra=None):
+        self.host = host
+        self.name = name or host
+        self.platform = platform
+        self.site = site
+        self.role = role
+        self.protocols = protocols or {}
+        self.credentials = credentials
+        self.extra = extra or {}
+
+    def __repr__(self):
+        return f"Device({self.name!r}, {self.platform or '?'}, {sorted(self.protocols)})"
+
+
+class Credentials:
+    """Named credential sets, resolved on first use."""
+
+    def __init__(self, sets=None):
+        self.sets = dict(sets or {})
+        self._resolved = {}
+
+    def add(self, name, spec):
+        self.sets[name] = spec
+        self._resolved.pop(name, None)
+
+    def resolve(self, name):
+        if name in self._resolved:
+            return self._resolved[name]
+        spec = self.sets.get(name)
+        if spec is None:
+            raise InventoryError(f"unknown credential set '{name}'")
+        password = spec.get("password")
+        if password is None and spec.get("password_env"):
+            password = os.environ.get(spec["password_env"])
+            if password is None:
+                raise InventoryError(f"credential set '{name}': ${spec['password_env']} is not set")
+        if password is None and spec.get("password_file"):
+            try:
+                password = Path(spec["password_file"]).expanduser().read_text(encoding="utf-8").strip()
+            except OSError as e:
+                raise InventoryError(f"credential set '{name}': {e}") from None
+        self._resolved[name] = (spec.get("username", "admin"), password or "")
+        return self._resolved[name]
+
+
+def _parse_protocols(value, platform=""):
+    """{"netconf": 830}, ["netconf", ...] or "netconf:830;restconf" -> {protocol: port}."""
+    if not value:
+        value = PLATFORM_PROTOCOLS.get(platform, ())
+    if isinstance(value, str):
+        value = [p for p in value.replace(",", ";").split(";") if p.strip()]
+    if isinstance(value, dict):
+        return {str(p): int(port or DEFAULT_PORTS.get(p, 443)) for p, port in value.items()}
+    protocols = {}
+    for item in value:
+        proto, _, port = str(item).strip().partition(":")
+        protocols[proto] = int(port) if port else DEFAULT_PORTS.get(proto, 443)
+    return protocols
+
+def _guess_protocol(port):
+    return "netconf" if str(port) == "830" else "restconf"
+
+
+class Inventory:
+    """Devices plus one index per INDEXED_FIELDS value; see the module header."""
+
+    def __init__(self, devices=(), credentials=None):
+        self.devices = []
+        self.by_host = {}
+        self._positions = {}
+        self.index = {field: {} for field in INDEXED_FIELDS}
+        self.credentials = credentials or Credentials()
+        for dev in devices:
+            self.add(dev)
+
+    def __len__(self):
+        return len(self.devices)
+
+    def add(self, dev):
+        """Add a Device; a host already present gets the new protocols merged in."""
+        pos = self._positions.get(dev.host)
+        if pos is not None:
+            known = self.devices[pos]
+            known.protocols.update(dev.protocols)
+            for proto in dev.protocols:
+                self.index["protocol"].setdefault(proto, set()).add(pos)
+            return known
+        pos = len(self.devices)
+        self.devices.append(dev)
+        self.by_host[dev.host] = dev
+        self._positions[dev.host] = pos
+        for field in ("platform", "site", "role"):
+            self.index[field].setdefault(getattr(dev, field), set()).add(pos)
+        for proto in dev.protocols:
+            self.index["protocol"].setdefault(proto, set()).add(pos)
+        return dev
+
+    # -----------------------------
+    # LOADING
+    # -----------------------------
+    @classmethod
+    def load(cls, path=None, protocol=None):
+        """Inventory from a JSON / CSV file, or from the device_info.py files if there is none.
+
+        protocol names the endpoint of a plain list of device dicts (guessed from the port otherwise).
+        """
+        path = Path(path) if path else INVENTORY_FILE
+        if not path.exists():
+            if path != INVENTORY_FILE:
+                raise InventoryError(f"inventory file {path} not found")
+            return cls.from_device_info()
+        if path.suffix.lower() == ".csv":
+            with open(path, "r", encoding="utf-8", newline="") as fh:
+                return cls.from_rows(csv.DictReader(fh))
+        with open(path, "r", encoding="utf-8") as fh:
+            try:
+                data = json.load(fh)
+            except ValueError as e:
+                raise InventoryError(f"{path}: {e}") from None
+        if isinstance(data, list):
+            return cls.from_device_dicts(data, protocol=protocol)
+        if not isinstance(data, dict) or not isinstance(data.get("devices"), list):
+            raise InventoryError(f"{path}: expected a list of devices or an object with a 'devices' list")
+        return cls.from_rows(data["devices"], data.get("credentials"), data.get("defaults"))
+
+    @classmethod
+    def from_rows(cls, rows, credentials=None, defaults=None):
+        defaults = defaults or {}
+        inv = cls(credentials=Credentials(credentials))
+        for row in rows:
+            row = dict(defaults, **{k: v for k, v in row.items() if v not in (None, "")})
+            host = row.pop("host", None)
+            if not host:
+                raise InventoryError(f"device without host: {row}")
+            platform = row.pop("platform", "")
+            inline_user, inline_pwd = row.pop("username", None), row.pop("password", None)
+            cred = row.pop("credentials", None)
+            if cred is None:
+                cred = inv._inline_credentials(inline_user, inline_pwd)
+            inv.add(Device(
+                host=host,
+                name=row.pop("name", None),
+                platform=platform,
+                site=row.pop("site", ""),
+                role=row.pop("role", ""),
+                protocols=_parse_protocols(row.pop("protocols", None), platform),
+                credentials=cred,
+                extra=row,
+            ))
+        return inv
+
+    @classmethod
+    def from_device_dicts(cls, dicts, platform="", protocol=None):
+        """device_info-style dicts (host, port, username, password, ...)."""
+        rows = []
+        for d in dicts:
+            d = dict(d)
+            port = d.pop("port", None)
+            proto = d.pop("protocol", None) or protocol or _guess_protocol(port)
+            d.setdefault("platform", platform)
+            d["protocols"] = {proto: int(port or DEFAULT_PORTS.get(proto, 443))}
+            rows.append(d)
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_device_info(cls, files=None):
+        """Merge the device_info.py of every platform directory into one inventory."""
+        inv = cls()
+        for path, (platform, protocol) in (files or DEVICE_INFO_FILES).items():
+            if not Path(path).exists():
+                continue
+            spec = importlib.util.spec_from_file_location(f"_device_info_{protocol.replace('-', '_')}", path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            dicts = getattr(module, "devices", None) or [module.device]
+            sub = cls.from_device_dicts(dicts, platform=platform, protocol=protocol)
+            for dev in sub.devices:
+                dev.credentials = inv._inline_credentials(*sub.credentials.resolve(dev.credentials))
+                inv.add(dev)
+        return inv
+
+    def _inline_credentials(self, username, password):
+        """Name for an inline username/password pair, shared by devices that use the same pair."""
+        if username is None and password is None:
+            return "default"
+        name = f"inline-{zlib.crc32(f'{username}:{password}'.encode()):08x}"
+        if name not in self.credentials.sets:
+            self.credentials.add(name, {"username": username or "admin", "password": password or ""})
+        return name
+
+    # -----------------------------
+    # SELECTION
+    # -----------------------------
+    def select(self, platform=None, site=None, role=None, protocol=None, hosts=None):
+        """Devices matching every given filter; a filter may be one value or a list of values."""
+        positions = None
+        for field, wanted in (("platform", platform), ("site", site), ("role", role), ("protocol", protocol)):
+            if wanted is None:
+                continue
+            values = [wanted] if isinstance(wanted, str) else wanted
+            matched = set().union(*(self.index[field].get(v, set()) for v in values))
+            positions = matched if positions is None else positions & matched
+        if positions is None:
+            selected = list(self.devices)
+        else:
+            selected = [self.devices[i] for i in sorted(positions)]
+        if hosts is not None:
+            hosts = set(hosts)
+            selected = [d for d in selected if d.host in hosts or d.name in hosts]
+        return selected
+
+    def get(self, host):
+        try:
+            return self.by_host[host]
+        except KeyError:
+            raise InventoryError(f"device {host} is not in the inventory") from None
+
+    def device_dict(self, dev, protocol):
+        """The dict the scripts take (host, port, username, password), credentials resolved now."""
+        if isinstance(dev, str):
+            dev = self.get(dev)
+        if protocol not in dev.protocols:
+            raise InventoryError(f"{dev.host} has no {protocol} endpoint")
+        if dev.credentials == "default" and "default" not in self.credentials.sets:
+            self.credentials.add("default", {"username": os.getenv("FLEET_USERNAME", "admin"),
+                                             "password_env": "FLEET_PASSWORD"})
+        username, password = self.credentials.resolve(dev.credentials)
+        return dict(dev.extra, host=dev.host, port=str(dev.protocols[protocol]), username=username,
+                    password=password)
+
+    def device_dicts(self, protocol, **filters):
+        return [self.device_dict(dev, protocol) for dev in self.select(protocol=protocol, **filters)]
+
+    def summary(self):
+        return {field: {value: len(pos) for value, pos in sorted(values.items())}
+                for field, values in self.index.items()}
+
+
+def shard_of(host, count):
+    """Stable shard number of a host (the same host lands in the same shard on every node)."""
+    return zlib.crc32(host.encode("utf-8")) % count
+
+def shards(devices, count):
+    """Split devices into count lists by shard_of; every list keeps inventory order."""
+    out = [[] for _ in range(max(1, count))]
+    for dev in devices:
+        out[shard_of(dev.host, len(out))].append(dev)
+    return out
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def _split_args(argv):
+    """Positional args and --name value filters."""
+    positional, filters = [], {}
+    args = iter(argv)
+    for arg in args:
+        if arg.startswith("--"):
+            filters[arg[2:]] = next(args, None)
+        else:
+            positional.append(arg)
+    return positional, filters
+
+def main(argv):
+    if len(argv) < 2 or argv[1] not in ("summary", "select", "shards"):
+        print(USAGE)
+        return 2
+    positional, filters = _split_args(argv[2:])
+    count = None
+    if argv[1] == "shards":
+        if not positional or not positional[-1].isdigit():
+            print(USAGE)
+            return 2
+        count = int(positional.pop())
+    try:
+        inv = Inventory.load(positional[0] if positional else None)
+        selected = inv.select(**filters)
+    except (InventoryError, TypeError) as e:
+        print(f"Inventory error: {e}")
+        return 1
+    if argv[1] == "summary":
+        print(f"{len(inv)} devices")
+        for field, values in inv.summary().items():
+            print(f"  {field:<9} " + ", ".join(f"{v or '-'}={n}" for v, n in values.items()))
+    elif argv[1] == "select":
+        for dev in selected:
+            print(f"{dev.name:<24} {dev.host:<16} {dev.platform:<8} {dev.site:<10} {dev.role:<10} "
+                  f"{','.join(f'{p}:{port}' for p, port in sorted(dev.protocols.items()))}")
+        print(f"{len(selected)} of {len(inv)} devices")
+    else:
+        for i, shard in enumerate(shards(selected, count)):
+            print(f"shard {i}: {len(shard)} devices")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
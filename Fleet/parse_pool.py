@@ -0,0 +1,198 @@
+### Reply parsing in worker processes, so a fleet sweep is not bound to one core by the GIL
+### Used by netconf_fleet_collect.py (NETCONF XML) and get_interface_states_fleet.py (RESTCONF JSON).
+
+# The I/O threads (or the asyncio loop) keep the devices busy and hand each raw reply to
+# parse() / parse_async(); the decode runs in a pool of worker processes and only the
+# compact records come back. Parsers are named "module:function" and imported in the
+# worker, so nothing but the reply text and the records is pickled:
+#
+#     with ParsePool(workers=4) as pool:
+#         records = pool.parse("interface_stream_parser:iter_interface_records", reply.xml)
+#         rows = await pool.parse_async("restconf_interfaces:interface_rows_from_json", body)
+#
+# A parser takes the raw reply (plus any extra arguments) and returns picklable records:
+# lists of dicts or tuples, never element trees; a returned generator is drained in the
+# worker. Replies are shipped in batches: a batch goes out when it holds chunk_size
+# replies or linger seconds after its first one, so a small reply does not pay a whole
+# inter-process round trip of its own. workers=0 parses in the calling thread, which
+# is the default on a single core (a worker process would only add the pickling).
+# A parser error is raised in the caller as ParseError with the worker's message.
+
+import asyncio
+import importlib
+import os
+import sys
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+CPU_COUNT = os.cpu_count() or 1
+PARSE_WORKERS = CPU_COUNT if CPU_COUNT > 1 else 0    # 0: parse in the calling thread
+CHUNK_SIZE = 16           # replies per batch shipped to a worker
+LINGER = 0.005            # seconds a partial batch waits for more replies
+
+
+class ParseError(Exception):
+    """A parser failed on a reply (or the worker process died)."""
+
+
+# -----------------------------
+# WORKER SIDE
+# -----------------------------
+_parsers = {}
+
+def resolve(name):
+    """The parser function for "module:function" (imported once per process)."""
+    fn = _parsers.get(name)
+    if fn is None:
+        module, _, attr = name.partition(":")
+        if not module or not attr:
+            raise ParseError(f"parser {name!r} is not 'module:function'")
+        fn = getattr(importlib.import_module(module), attr)
+        _parsers[name] = fn
+    return fn
+
+def run_parser(name, raw, args=()):
+    result = resolve(name)(raw, *args)
+    if hasattr(result, "__next__"):
+        result = list(result)
+    return result
+
+def _init_worker(path):
+    # the callers put their platform directories and Fleet/ on sys.path at import time
+    for entry in path:
+        if entry not in sys.path:
+            sys.path.append(entry)
+
+def _parse_batch(batch):
+    """[(parser, raw, args)] -> [(True, records) or (False, error message)], in batch order."""
+    out = []
+    for name, raw, args in batch:
+        try:
+            out.append((True, run_parser(name, raw, args)))
+        except Exception as e:
+            out.append((False, f"{name}: {type(e).__name__}: {e}"))
+    return out
+
+# -----------------------------
+# POOL
+# -----------------------------
+class ParsePool:
+    """Batches replies from many threads / tasks to a process pool; use as a context manager."""
+
+    def __init__(self, workers=PARSE_WORKERS, chunk_size=CHUNK_SIZE, linger=LINGER):
+        self.workers = max(0, int(workers or 0))
+        self.chunk_size = max(1, int(chunk_size))
+        self.linger = linger
+        self.stats = {"replies": 0, "bytes": 0, "batches": 0, "errors": 0}
+        self._executor = None
+        self._lock = threading.Lock()
+        self._batch = []
+        self._timer = None
+
+    def start(self):
+        if self.workers and self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 initargs=(list(sys.path),))
+        return self
+
+    def close(self):
+        self.flush()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- submitting ----
+    def submit(self, parser, raw, *args):
+        """Future of parser(raw, *args)'s records."""
+        future = Future()
+        with self._lock:
+            self.stats["replies"] += 1
+            self.stats["bytes"] += len(raw)
+        if self._executor is None:
+            try:
+                future.set_result(run_parser(parser, raw, args))
+            except Exception as e:
+                self.stats["errors"] += 1
+                future.set_exception(ParseError(f"{parser}: {type(e).__name__}: {e}"))
+            return future
+        batch = None
+        with self._lock:
+            self._batch.append((parser, raw, args, future))
+            if len(self._batch) >= self.chunk_size:
+                batch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.linger, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if batch:
+            self._ship(batch)
+        return future
+
+    def parse(self, parser, raw, *args, timeout=None):
+        """Blocking parse for I/O worker threads (the GIL is released while waiting)."""
+        return self.submit(parser, raw, *args).result(timeout)
+
+    async def parse_async(self, parser, raw, *args):
+        return await asyncio.wrap_future(self.submit(parser, raw, *args))
+
+    def map(self, parser, raws, *args):
+        """Records of every reply in raws, in order."""
+        futures = [self.submit(parser, raw, *args) for raw in raws]
+        self.flush()
+        for future in futures:
+            yield future.result()
+
+    def flush(self):
+        """Ship the partial batch now."""
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._ship(batch)
+
+    # ---- internals ----
+    def _take(self):
+        batch, self._batch = self._batch, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _ship(self, batch):
+        futures = [item[3] for item in batch]
+        with self._lock:
+            self.stats["batches"] += 1
+        try:
+            done = self._executor.submit(_parse_batch, [item[:3] for item in batch])
+        except Exception as e:                # shut down or broken pool
+            self._fail(futures, f"{type(e).__name__}: {e}")
+            return
+        done.add_done_callback(lambda done: self._deliver(done, futures))
+
+    def _deliver(self, done, futures):
+        error = done.exception()
+        if error is not None:
+            self._fail(futures, f"worker failed: {type(error).__name__}: {error}")
+            return
+        for future, (ok, value) in zip(futures, done.result()):
+            if future.cancelled():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                self.stats["errors"] += 1
+                future.set_exception(ParseError(value))
+
+    def _fail(self, futures, message):
+        for future in futures:
+            if not future.done():
+                self.stats["errors"] += 1
+                future.set_exception(ParseError(message))
@@ -0,0 +1,142 @@
+### Console output modes: pretty-printed replies, quiet results only, or compact NDJSON records
+### Used by interface_edit.py, interface_change_waves.py, netconf_capabilities_refined.py
+### and show_commands.py.
+
+# pretty - what the scripts always printed: step lines and every reply pretty-printed
+# quiet  - no per-RPC lines: messages and results only, plus any reply that is not a success
+# ndjson - one compact JSON object per line on stdout and nothing else; a failed reply
+#          carries its raw text
+#
+# The mode comes from set_mode() (the scripts' --quiet / --ndjson / --output flags) or
+# the NETWORK_OUTPUT environment variable. Replies are kept as the raw text the device
+# sent: an edit-config is checked by searching it for <ok/> (no DOM is built), and the
+# indented form is only built when it is printed.
+#
+#     ok = reply_output.reply(reply.xml, host=host, rpc="edit_config")
+#     reply_output.record("interface", host=host, name="GigabitEthernet1", oper="up")
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+import xml.dom.minidom
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+OUTPUT_ENV = "NETWORK_OUTPUT"
+MODES = ("pretty", "quiet", "ndjson")
+DEFAULT_MODE = "pretty"
+FLAGS = {"--pretty": "pretty", "--quiet": "quiet", "--ndjson": "ndjson"}
+
+_OK = re.compile(r"<(?:[\w.-]+:)?ok\s*/>")
+_OK_BYTES = re.compile(rb"<(?:[\w.-]+:)?ok\s*/>")
+_RPC_ERROR = re.compile(r"<(?:[\w.-]+:)?rpc-error[\s>]")
+_RPC_ERROR_BYTES = re.compile(rb"<(?:[\w.-]+:)?rpc-error[\s>]")
+
+_mode = None
+_write_lock = threading.Lock()
+
+# -----------------------------
+# MODE
+# -----------------------------
+def set_mode(mode):
+    global _mode
+    if mode not in MODES:
+        raise ValueError(f"output mode must be one of {', '.join(MODES)}, not {mode!r}")
+    _mode = mode
+
+def set_mode_from_argv(argv):
+    """Take --pretty / --quiet / --ndjson out of argv (for scripts without argparse)."""
+    rest = []
+    for arg in argv:
+        if arg in FLAGS:
+            set_mode(FLAGS[arg])
+        else:
+            rest.append(arg)
+    return rest
+
+def mode():
+    if _mode is not None:
+        return _mode
+    env = os.getenv(OUTPUT_ENV, "").strip().lower()
+    return env if env in MODES else DEFAULT_MODE
+
+# -----------------------------
+# REPLIES
+# -----------------------------
+def reply_ok(raw):
+    """True for an <rpc-reply> holding <ok/> and no <rpc-error>, by a plain text search."""
+    if isinstance(raw, bytes):
+        return bool(_OK_BYTES.search(raw)) and not _RPC_ERROR_BYTES.search(raw)
+    return bool(_OK.search(raw)) and not _RPC_ERROR.search(raw)
+
+def as_text(raw):
+    return raw.decode("utf-8", errors="replace") if isinstance(raw, bytes) else str(raw)
+
+def pretty(raw, kind="xml"):
+    """Indented XML or JSON of raw; the raw text when it does not parse."""
+    try:
+        if kind == "json":
+            return json.dumps(json.loads(raw), indent=2)
+        return xml.dom.minidom.parseString(raw).toprettyxml(indent="  ")
+    except Exception:
+        return as_text(raw)
+
+
+class Pretty:
+    """Renders raw on str(): pass it where a reply may or may not end up printed."""
+
+    __slots__ = ("raw", "kind")
+
+    def __init__(self, raw, kind="xml"):
+        self.raw = raw
+        self.kind = kind
+
+    def __str__(self):
+        return pretty(self.raw, self.kind)
+
+# -----------------------------
+# OUTPUT
+# -----------------------------
+def _write(line):
+    with _write_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+def record(event, **fields):
+    """One NDJSON line {"ts", "event", **fields}; nothing in the other modes."""
+    if mode() != "ndjson":
+        return
+    _write(json.dumps({"ts": round(time.time(), 3), "event": event, **fields},
+                      separators=(",", ":"), ensure_ascii=False, default=str))
+
+def message(text, **fields):
+    """A human line in pretty / quiet mode, a "message" record in ndjson mode."""
+    if mode() == "ndjson":
+        record("message", text=text, **fields)
+    else:
+        _write(str(text))
+
+def step(text):
+    """A per-RPC progress line ("🔹 Shutting interface ..."), printed in pretty mode only."""
+    if mode() == "pretty":
+        _write(str(text))
+
+def reply(raw, ok=None, kind="xml", **fields):
+    """Report one reply; returns whether it was a success (reply_ok for XML when ok is None).
+
+    pretty prints it indented, quiet only when it failed, ndjson writes a "reply" record
+    with its size (and its text when it failed).
+    """
+    if ok is None:
+        ok = reply_ok(raw) if kind == "xml" else True
+    current = mode()
+    if current == "ndjson":
+        extra = {} if ok else {"reply": as_text(raw)}
+        record("reply", ok=ok, bytes=len(raw), **fields, **extra)
+    elif current == "pretty" or not ok:
+        _write(pretty(raw, kind))
+    return ok
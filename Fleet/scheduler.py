@@ -0,0 +1,353 @@
+### Per-device rate limiting and adaptive concurrency for NETCONF / RESTCONF / NX-API calls
+### Token bucket per device, AIMD concurrency driven by latency and throttling signals,
+### a global in-flight cap and bounded waiting (backpressure). Threaded and asyncio fronts.
+#
+#     scheduler = Scheduler(global_limit=100)
+#     resp = scheduler.call(host, session.get, url, timeout=10)      # requests / ncclient calls
+#
+#     with scheduler.slot(host) as slot:                            # or by hand
+#         resp = session.get(url)
+#         if resp.status_code in THROTTLE_STATUS:
+#             slot.throttled(retry_after(resp.headers))
+#
+#     async with async_scheduler.slot(host) as slot:                # asyncio (aiohttp) callers
+#         ...
+#
+# Each device starts at INITIAL_LIMIT concurrent calls. Every call that finishes within
+# the latency target adds 1/limit, so the limit grows by about one per round trip. A
+# 429/503, NETCONF resource-denied / in-use or a timeout halves it (at most once per
+# round trip, so a burst of failures from calls already in flight counts once) and
+# pauses the device for its Retry-After, or for one round trip when there is none. A
+# smoothed latency above LATENCY_FACTOR x the fastest seen (or a call slower than
+# TARGET_LATENCY) shrinks it by SLOW_DECREASE. Other errors do not change the limit:
+# they are not congestion. The token bucket caps the request rate to a device even
+# when its replies are fast. global_limit caps calls in flight over all devices, and
+# max_waiting bounds callers queued for a slot; beyond it slot() raises SchedulerFull
+# at once, so the producer slows down instead of piling up threads or tasks.
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from email.utils import parsedate_to_datetime
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+GLOBAL_LIMIT = 200            # calls in flight over all devices
+MAX_WAITING = 10_000          # callers waiting for a slot before slot() refuses
+INITIAL_LIMIT = 2             # concurrent calls per device to start with
+MAX_PER_DEVICE = 16
+MIN_PER_DEVICE = 1
+RATE = 50.0                   # requests per second per device (token bucket refill)
+BURST = 10                    # token bucket size
+TARGET_LATENCY = 2.0          # seconds; slower calls always count as "slow"
+LATENCY_FACTOR = 3.0          # ... as does a smoothed latency above this x the fastest seen
+LATENCY_FLOOR = 0.05          # seconds; jitter below this is never "slow"
+SMOOTHING = 0.2               # weight of the newest sample in the smoothed latency
+THROTTLE_DECREASE = 0.5
+SLOW_DECREASE = 0.9
+THROTTLE_RETRIES = 2          # call(): retries of a throttled call after the pause
+MAX_PAUSE = 60.0
+
+THROTTLE_STATUS = (429, 503)
+THROTTLE_RPC_TAGS = ("resource-denied", "in-use", "lock-denied")
+
+
+class SchedulerFull(Exception):
+    """Too many callers are already waiting for a slot (backpressure)."""
+
+
+class SchedulerTimeout(Exception):
+    """No slot became free within the caller's timeout."""
+
+
+def retry_after(headers):
+    """Seconds from a Retry-After header (delta seconds or HTTP date), or None."""
+    value = (headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def status_of(obj):
+    """HTTP status of a response or of an exception carrying one (requests, aiohttp, RestconfError)."""
+    for candidate in (obj, getattr(obj, "response", None)):
+        for attr in ("status_code", "status"):
+            value = getattr(candidate, attr, None)
+            if isinstance(value, int):
+                return value
+    return None
+
+def throttled_reply(exc):
+    """True if the device answered 'not now': HTTP 429/503 or a NETCONF resource-denied / in-use."""
+    return status_of(exc) in THROTTLE_STATUS or getattr(exc, "tag", None) in THROTTLE_RPC_TAGS
+
+def classify(exc):
+    """'throttle' for congestion signals (throttled replies, timeouts), 'error' for anything else."""
+    if throttled_reply(exc):
+        return "throttle"
+    if isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__:
+        return "throttle"
+    return "error"
+
+
+class DeviceState:
+    """Limits and counters of one device; the schedulers hold the lock around every method."""
+
+    __slots__ = ("limit", "min_limit", "max_limit", "rate", "burst", "tokens", "refilled", "in_flight",
+                 "paused_until", "fastest", "smoothed", "last_decrease", "target_latency",
+                 "calls", "throttles", "errors")
+
+    def __init__(self, initial=INITIAL_LIMIT, min_limit=MIN_PER_DEVICE, max_limit=MAX_PER_DEVICE,
+                 rate=RATE, burst=BURST, target_latency=TARGET_LATENCY):
+        self.limit = float(max(min_limit, min(initial, max_limit)))
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.refilled = time.monotonic()
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.fastest = None
+        self.smoothed = None
+        self.last_decrease = 0.0
+        self.target_latency = target_latency
+        self.calls = 0
+        self.throttles = 0
+        self.errors = 0
+
+    def wait_time(self, now):
+        """0 if a call may start now, seconds until a token/pause frees up, None if at the limit."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= int(self.limit):
+            return None
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self.refilled) * self.rate)
+            self.refilled = now
+            if self.tokens < 1.0:
+                return (1.0 - self.tokens) / self.rate
+        return 0.0
+
+    def start(self):
+        self.in_flight += 1
+        self.calls += 1
+        if self.rate:
+            self.tokens -= 1.0
+
+    def finish(self, now, latency, outcome, pause=None):
+        self.in_flight -= 1
+        if outcome == "throttle":
+            self.throttles += 1
+            self._decrease(now, latency, THROTTLE_DECREASE)
+            pause = (self.smoothed or 0.0) if pause is None else pause
+            self.paused_until = max(self.paused_until, now + min(pause, MAX_PAUSE))
+            return
+        if outcome == "error":
+            self.errors += 1
+            return
+        if self.fastest is None:
+            self.fastest = self.smoothed = latency
+        else:
+            self.fastest = min(self.fastest, latency)
+            self.smoothed += SMOOTHING * (latency - self.smoothed)
+        if latency > self.target_latency or self.smoothed > max(self.fastest * LATENCY_FACTOR, LATENCY_FLOOR):
+            self._decrease(now, latency, SLOW_DECREASE)
+        elif self.limit < self.max_limit and self.in_flight + 1 >= int(self.limit):
+            # additive increase only while the limit is actually used
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _decrease(self, now, latency, factor):
+        # calls already in flight report the same congestion; react once per round trip
+        if now - self.last_decrease < max(latency, self.fastest or 0.0):
+            return
+        self.last_decrease = now
+        self.limit = max(self.min_limit, self.limit * factor)
+
+    def snapshot(self):
+        return {"limit": round(self.limit, 2), "in_flight": self.in_flight, "calls": self.calls,
+                "throttles": self.throttles, "errors": self.errors,
+                "fastest_ms": round(self.fastest * 1000, 1) if self.fastest is not None else None,
+                "smoothed_ms": round(self.smoothed * 1000, 1) if self.smoothed is not None else None}
+
+
+class Slot:
+    """Handle of one admitted call; report throttling explicitly when no exception says so."""
+
+    __slots__ = ("host", "started", "outcome", "pause")
+
+    def __init__(self, host):
+        self.host = host
+        self.started = time.monotonic()
+        self.outcome = None
+        self.pause = None
+
+    def throttled(self, pause=None):
+        self.outcome = "throttle"
+        self.pause = pause
+
+    def failed(self):
+        self.outcome = "error"
+
+
+class _SchedulerCore:
+    def __init__(self, global_limit=GLOBAL_LIMIT, max_waiting=MAX_WAITING, overrides=None, **device_defaults):
+        self.global_limit = global_limit
+        self.max_waiting = max_waiting
+        self.overrides = overrides or {}        # host -> DeviceState keyword arguments
+        self.device_defaults = device_defaults
+        self.devices = {}
+        self.in_flight = 0
+        self.waiting = 0
+
+    def device(self, host):
+        state = self.devices.get(host)
+        if state is None:
+            state = self.devices[host] = DeviceState(**dict(self.device_defaults, **self.overrides.get(host, {})))
+        return state
+
+    def _try_start(self, host, now):
+        """0 and the call is started, or seconds to wait (None = until a slot is released)."""
+        state = self.device(host)
+        wait = state.wait_time(now)
+        if wait == 0.0 and self.in_flight >= self.global_limit:
+            wait = None
+        if wait == 0.0:
+            state.start()
+            self.in_flight += 1
+        return wait
+
+    def _finish(self, slot):
+        now = time.monotonic()
+        self.in_flight -= 1
+        self.device(slot.host).finish(now, now - slot.started, slot.outcome or "ok", slot.pause)
+
+    def _admit_waiter(self):
+        if self.waiting >= self.max_waiting:
+            raise SchedulerFull(f"{self.waiting} callers already waiting for a slot")
+        self.waiting += 1
+
+    @staticmethod
+    def _wait_budget(wait, deadline, now):
+        if deadline is not None:
+            if now >= deadline:
+                raise SchedulerTimeout("no slot became free in time")
+            wait = deadline - now if wait is None else min(wait, deadline - now)
+        return wait
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "waiting": self.waiting,
+                "devices": {host: state.snapshot() for host, state in self.devices.items()}}
+
+
+class Scheduler(_SchedulerCore):
+    """Thread-safe front end: slot() context manager and call()."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = threading.Condition()
+
+    def acquire(self, host, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._admit_waiter()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_start(host, now)
+                    if wait == 0.0:
+                        return Slot(host)
+                    self._cond.wait(self._wait_budget(wait, deadline, now))
+            finally:
+                self.waiting -= 1
+
+    def release(self, slot):
+        with self._cond:
+            self._finish(slot)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, host, timeout=None):
+        slot = self.acquire(host, timeout)
+        try:
+            yield slot
+        except Exception as e:
+            if slot.outcome is None:
+                slot.outcome = classify(e)
+                if slot.outcome == "throttle":
+                    slot.pause = retry_after(getattr(getattr(e, "response", None), "headers", None))
+            raise
+        finally:
+            self.release(slot)
+
+    def call(self, host, fn, *args, retries=THROTTLE_RETRIES, **kwargs):
+        """fn(*args, **kwargs) in a slot of host.
+
+        A 429/503 response or an exception saying so (HTTP status, NETCONF
+        resource-denied / in-use) is retried after the device's pause; timeouts are
+        not retried, they already cost a full timeout.
+        """
+        for attempt in range(retries + 1):
+            try:
+                with self.slot(host) as slot:
+                    result = fn(*args, **kwargs)
+                    if status_of(result) in THROTTLE_STATUS:
+                        slot.throttled(retry_after(getattr(result, "headers", None)))
+            except Exception as e:
+                if attempt == retries or not throttled_reply(e):
+                    raise
+                continue
+            if slot.outcome != "throttle" or attempt == retries:
+                return result
+
+
+class AsyncScheduler(_SchedulerCore):
+    """asyncio front end; use from one event loop."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cond = None
+
+    async def acquire(self, host, timeout=None):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        async with self._cond:
+            self._admit_waiter()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = self._try_start(host, now)
+                    if wait == 0.0:
+                        return Slot(host)
+                    try:
+                        await asyncio.wait_for(self._cond.wait(), self._wait_budget(wait, deadline, now))
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                self.waiting -= 1
+
+    async def release(self, slot):
+        async with self._cond:
+            self._finish(slot)
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def slot(self, host, timeout=None):
+        slot = await self.acquire(host, timeout)
+        try:
+            yield slot
+        except Exception as e:
+            if slot.outcome is None:
+                slot.outcome = classify(e)
+            raise
+        finally:
+            await self.release(slot)
@@ -0,0 +1,516 @@
+### Columnar snapshot store for collected device state (interfaces, show tables, capabilities)
+### Append-only segment files with zlib-compressed columns and a small sqlite index.
+#
+#   python snapshot_store.py down [days]          # oper-down interfaces across all devices
+#   python snapshot_store.py stats
+#   python snapshot_store.py compact [kind]
+#
+# Layout under STORE_DIR:
+#   index.sqlite              segments (kind, time range, rows) + per-host row ranges
+#   <kind>/<id>.seg           one segment per flush, never rewritten (compact() replaces
+#                             small segments by bigger ones)
+#
+# Segment file: MAGIC, 4-byte header length, JSON header, then one zlib blob per column.
+# Records are flat dicts (nested dicts become "parent.child" columns). Every row also has
+# "host" and "ts" (epoch seconds). Column types are inferred per segment:
+#   i8   int64, missing values stored as INT_NULL
+#   u8   uint64 (counter64 beyond the int64 range), missing values stored as UINT_NULL
+#   f8   float64, missing values stored as NaN
+#   str  dictionary encoded: the distinct values (JSON) + uint8/16/32 codes
+#   json like str, values that are lists/dicts are kept as JSON text
+# Rows in a segment are sorted by host, then the kind's key column, then ts, and the
+# index keeps the row range of every host. A query therefore:
+#   1. picks segments by kind, time range and host from sqlite
+#   2. checks string filters against the column dictionaries only (a segment without
+#      "oper_status" == "down" or without the wanted interface name is skipped before
+#      any row data is decompressed)
+#   3. decompresses just the columns it needs and filters them with NumPy
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from pathlib import Path
+
+import numpy as np
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+STORE_DIR = Path(os.getenv("SNAPSHOT_STORE") or Path(__file__).resolve().parent / "snapshots")
+SEGMENT_ROWS = 200_000        # buffered rows per kind before a segment is written
+COMPRESSION_LEVEL = 6
+MAGIC = b"NETSNAP1"
+INT_NULL = np.iinfo(np.int64).min
+UINT_NULL = np.iinfo(np.uint64).max       # counter64 values above 2**63 go into uint64 columns
+INT64_MAX = np.iinfo(np.int64).max
+_NULLS = {"i8": INT_NULL, "u8": UINT_NULL}
+
+# second sort key (after host) of each record kind; unknown kinds sort by host, ts
+KEY_COLUMNS = {
+    "interfaces": "name",
+    "show": "command",
+    "capabilities": "capability",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS segments (
+    id        INTEGER PRIMARY KEY,
+    kind      TEXT NOT NULL,
+    path      TEXT NOT NULL,
+    rows      INTEGER NOT NULL,
+    ts_min    REAL NOT NULL,
+    ts_max    REAL NOT NULL,
+    created   REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS segments_kind_ts ON segments (kind, ts_max, ts_min);
+CREATE TABLE IF NOT EXISTS segment_hosts (
+    segment_id INTEGER NOT NULL REFERENCES segments (id) ON DELETE CASCADE,
+    host       TEXT NOT NULL,
+    row_start  INTEGER NOT NULL,
+    row_stop   INTEGER NOT NULL,
+    ts_min     REAL NOT NULL,
+    ts_max     REAL NOT NULL,
+    PRIMARY KEY (segment_id, host)
+);
+CREATE INDEX IF NOT EXISTS segment_hosts_host ON segment_hosts (host, ts_max);
+"""
+
+USAGE = "usage: snapshot_store.py down [days] | stats | compact [kind ...]"
+
+
+# -----------------------------
+# COLUMN ENCODING
+# -----------------------------
+def flatten(record, prefix=""):
+    """{"counters": {"in-octets": 1}} -> {"counters.in-octets": 1}."""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+def _column_type(values):
+    kind = None
+    low = high = 0
+    for value in values:
+        if value is None:
+            continue
+        if isinstance(value, bool) or isinstance(value, (list, dict)):
+            return "json"
+        if isinstance(value, int):
+            low = min(low, value)
+            high = max(high, value)
+            kind = kind or "i8"
+        elif isinstance(value, float):
+            kind = "f8"
+        else:
+            return "str" if isinstance(value, str) else "json"
+    if kind == "i8" and high > INT64_MAX:
+        return "u8" if low >= 0 else "f8"
+    return kind or "str"
+
+def _code_dtype(n_values):
+    return np.uint8 if n_values <= 0xFF else np.uint16 if n_values <= 0xFFFF else np.uint32
+
+def _encode_column(values, ctype, level):
+    """Return {blob name: compressed bytes} for one column."""
+    if ctype == "i8":
+        arr = np.array([INT_NULL if v is None else v for v in values], dtype=np.int64)
+        return {"data": zlib.compress(arr.tobytes(), level)}
+    if ctype == "u8":
+        arr = np.array([UINT_NULL if v is None else v for v in values], dtype=np.uint64)
+        return {"data": zlib.compress(arr.tobytes(), level)}
+    if ctype == "f8":
+        arr = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return {"data": zlib.compress(arr.tobytes(), level)}
+    if ctype == "json":
+        values = [None if v is None else json.dumps(v, separators=(",", ":"), sort_keys=True) for v in values]
+    lookup = {}
+    codes = [lookup.setdefault(v, len(lookup)) for v in values]
+    return {
+        "dict": zlib.compress(json.dumps(list(lookup)).encode("utf-8"), level),
+        "data": zlib.compress(np.array(codes, dtype=_code_dtype(len(lookup))).tobytes(), level),
+    }
+
+
+class Segment:
+    """Read access to one segment file; blobs are read and decoded on demand."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            if fh.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a snapshot segment")
+            size = int.from_bytes(fh.read(4), "little")
+            self.header = json.loads(fh.read(size))
+        self.data_start = len(MAGIC) + 4 + size
+        self.rows = self.header["rows"]
+        self.columns = {c["name"]: c for c in self.header["columns"]}
+        self._dicts = {}
+
+    def _blob(self, column, name):
+        offset, length = self.columns[column]["blobs"][name]
+        with open(self.path, "rb") as fh:
+            fh.seek(self.data_start + offset)
+            return zlib.decompress(fh.read(length))
+
+    def dictionary(self, column):
+        """Distinct values of a str/json column (cheap: no row data is read)."""
+        if column not in self._dicts:
+            self._dicts[column] = json.loads(self._blob(column, "dict"))
+        return self._dicts[column]
+
+    def codes(self, column):
+        return np.frombuffer(self._blob(column, "data"), dtype=_code_dtype(len(self.dictionary(column))))
+
+    def column(self, name):
+        """Decoded column as a NumPy array (object array for strings); None-filled if absent."""
+        col = self.columns.get(name)
+        if col is None:
+            return np.full(self.rows, None, dtype=object)
+        if col["type"] == "i8":
+            return np.frombuffer(self._blob(name, "data"), dtype=np.int64)
+        if col["type"] == "u8":
+            return np.frombuffer(self._blob(name, "data"), dtype=np.uint64)
+        if col["type"] == "f8":
+            return np.frombuffer(self._blob(name, "data"), dtype=np.float64)
+        values = self.dictionary(name)
+        if col["type"] == "json":
+            values = [None if v is None else json.loads(v) for v in values]
+        lookup = np.empty(len(values), dtype=object)
+        lookup[:] = values
+        return lookup[self.codes(name)]
+
+    def match(self, name, wanted):
+        """Boolean row mask for column == any of wanted; None if no row can match."""
+        col = self.columns.get(name)
+        if col is None:
+            return None if None not in wanted else np.ones(self.rows, dtype=bool)
+        if col["type"] in ("str", "json"):
+            values = self.dictionary(name)
+            if col["type"] == "json":
+                wanted = {v if v is None or isinstance(v, str) else json.dumps(v, separators=(",", ":"), sort_keys=True)
+                          for v in wanted}
+            hits = np.array([v in wanted for v in values], dtype=bool)
+            if not hits.any():
+                return None
+            return hits[self.codes(name)]
+        data = self.column(name)
+        values = [v for v in wanted if v is not None]
+        mask = np.isin(data, values) if values else np.zeros(self.rows, dtype=bool)
+        if None in wanted:
+            mask |= np.isnan(data) if col["type"] == "f8" else data == _NULLS[col["type"]]
+        return mask if mask.any() else None
+
+
+# -----------------------------
+# STORE
+# -----------------------------
+class SnapshotStore:
+    """Append records per kind; query them back by host, time range and column values."""
+
+    def __init__(self, path=STORE_DIR, segment_rows=SEGMENT_ROWS, compression_level=COMPRESSION_LEVEL):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.segment_rows = segment_rows
+        self.compression_level = compression_level
+        self._buffers = {}            # kind -> list of flat records
+        self._lock = threading.Lock()
+        self._seq = 0
+        self.db = sqlite3.connect(str(self.path / "index.sqlite"), timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    def append(self, kind, host, records, timestamp=None):
+        """Buffer records of one host; a segment is written every segment_rows rows."""
+        timestamp = time.time() if timestamp is None else timestamp
+        rows = []
+        for record in records:
+            row = flatten(record)
+            row["host"] = host
+            row.setdefault("ts", timestamp)
+            rows.append(row)
+        with self._lock:
+            buffer = self._buffers.setdefault(kind, [])
+            buffer.extend(rows)
+            full = buffer if len(buffer) >= self.segment_rows else None
+            if full is not None:
+                self._buffers[kind] = []
+        if full is not None:
+            self._write_segment(kind, full)
+        return len(rows)
+
+    def flush(self):
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        for kind, rows in buffers.items():
+            if rows:
+                self._write_segment(kind, rows)
+
+    def _write_segment(self, kind, rows):
+        key = KEY_COLUMNS.get(kind)
+        rows.sort(key=lambda r: (r["host"], str(r.get(key, "")) if key else "", r["ts"]))
+        names = sorted({name for row in rows for name in row})
+        header = {"kind": kind, "rows": len(rows), "columns": []}
+        blobs = []
+        offset = 0
+        for name in names:
+            values = [row.get(name) for row in rows]
+            ctype = _column_type(values)
+            encoded = _encode_column(values, ctype, self.compression_level)
+            col = {"name": name, "type": ctype, "blobs": {}}
+            for blob_name, blob in encoded.items():
+                col["blobs"][blob_name] = [offset, len(blob)]
+                blobs.append(blob)
+                offset += len(blob)
+            header["columns"].append(col)
+
+        hosts = []                    # (host, start, stop, ts_min, ts_max)
+        start = 0
+        for i in range(1, len(rows) + 1):
+            if i == len(rows) or rows[i]["host"] != rows[start]["host"]:
+                ts = [r["ts"] for r in rows[start:i]]
+                hosts.append((rows[start]["host"], start, i, min(ts), max(ts)))
+                start = i
+        ts_min = min(h[3] for h in hosts)
+        ts_max = max(h[4] for h in hosts)
+
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        directory = self.path / kind
+        directory.mkdir(exist_ok=True)
+        name = f"{int(ts_min * 1000)}-{os.getpid()}-{seq}.seg"
+        tmp = directory / f".{name}.tmp"
+        head = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        with open(tmp, "wb") as fh:
+            fh.write(MAGIC + len(head).to_bytes(4, "little") + head)
+            for blob in blobs:
+                fh.write(blob)
+        os.replace(tmp, directory / name)
+
+        with self._lock, self.db:
+            cur = self.db.execute(
+                "INSERT INTO segments (kind, path, rows, ts_min, ts_max, created) VALUES (?, ?, ?, ?, ?, ?)",
+                (kind, f"{kind}/{name}", len(rows), ts_min, ts_max, time.time()))
+            self.db.executemany(
+                "INSERT INTO segment_hosts (segment_id, host, row_start, row_stop, ts_min, ts_max) "
+                "VALUES (?, ?, ?, ?, ?, ?)", [(cur.lastrowid,) + h for h in hosts])
+        return directory / name
+
+    # -----------------------------
+    # READS
+    # -----------------------------
+    def _segments(self, kind, hosts=None, since=None, until=None):
+        """[(segment id, path, {host: (start, stop)} or None)] that can hold matching rows."""
+        sql = "SELECT id, path FROM segments WHERE kind = ?"
+        args = [kind]
+        if since is not None:
+            sql += " AND ts_max >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND ts_min <= ?"
+            args.append(until)
+        with self._lock:
+            segments = self.db.execute(sql + " ORDER BY ts_min", args).fetchall()
+            if hosts is None:
+                return [(seg_id, path, None) for seg_id, path in segments]
+            hosts = list(hosts)
+            result = []
+            for seg_id, path in segments:
+                marks = ",".join("?" * len(hosts))
+                ranges = self.db.execute(
+                    f"SELECT host, row_start, row_stop FROM segment_hosts WHERE segment_id = ? AND host IN ({marks})",
+                    [seg_id] + hosts).fetchall()
+                if ranges:
+                    result.append((seg_id, path, {h: (a, b) for h, a, b in ranges}))
+            return result
+
+    def scan(self, kind, columns=None, hosts=None, since=None, until=None, where=None):
+        """Matching rows as {column: array}; where = {column: value or list/set of values}.
+
+        columns=None returns every column seen in the matching segments. The "ts" and
+        "host" columns are always included.
+        """
+        self.flush()
+        where = {k: set(v) if isinstance(v, (list, set, tuple, frozenset)) else {v}
+                 for k, v in (where or {}).items()}
+        parts = []
+        for _, rel_path, host_ranges in self._segments(kind, hosts, since, until):
+            seg = Segment(self.path / rel_path)
+            mask = np.ones(seg.rows, dtype=bool)
+            if host_ranges is not None:
+                mask[:] = False
+                for start, stop in host_ranges.values():
+                    mask[start:stop] = True
+            skip = False
+            for name, wanted in where.items():
+                hit = seg.match(name, wanted)
+                if hit is None:
+                    skip = True
+                    break
+                mask &= hit
+            if skip:
+                continue
+            if since is not None or until is not None:
+                ts = seg.column("ts")
+                if since is not None:
+                    mask &= ts >= since
+                if until is not None:
+                    mask &= ts <= until
+            if not mask.any():
+                continue
+            wanted_columns = list(columns) if columns else list(seg.columns)
+            for name in ("host", "ts"):
+                if name not in wanted_columns:
+                    wanted_columns.append(name)
+            parts.append({name: seg.column(name)[mask] for name in wanted_columns})
+
+        names = []
+        for part in parts:
+            names.extend(n for n in part if n not in names)
+        result = {}
+        for name in names:
+            arrays = [part[name] if name in part else np.full(len(part["ts"]), None, dtype=object) for part in parts]
+            result[name] = np.concatenate(arrays) if arrays else np.empty(0, dtype=object)
+        return result
+
+    def rows(self, kind, **kwargs):
+        """scan() as a list of dicts, with INT_NULL / NaN turned back into None."""
+        table = self.scan(kind, **kwargs)
+        names = list(table)
+        if not names:
+            return []
+        columns = []
+        for name in names:
+            arr = table[name]
+            if arr.dtype == np.int64:
+                arr = np.where(arr == INT_NULL, None, arr.astype(object))
+            elif arr.dtype == np.uint64:
+                arr = np.where(arr == UINT_NULL, None, arr.astype(object))
+            elif arr.dtype == np.float64:
+                arr = np.where(np.isnan(arr), None, arr.astype(object))
+            columns.append(arr.tolist())
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def latest(self, kind, hosts=None, since=None):
+        """Most recent row per (host, key column) among the matching rows."""
+        key = KEY_COLUMNS.get(kind)
+        latest = {}
+        for row in self.rows(kind, hosts=hosts, since=since):
+            ident = (row["host"], row.get(key))
+            if ident not in latest or row["ts"] >= latest[ident]["ts"]:
+                latest[ident] = row
+        return list(latest.values())
+
+    # -----------------------------
+    # MAINTENANCE
+    # -----------------------------
+    def stats(self):
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT kind, COUNT(*), SUM(rows), MIN(ts_min), MAX(ts_max) FROM segments GROUP BY kind").fetchall()
+        result = {}
+        for kind, segments, total, ts_min, ts_max in rows:
+            size = sum(p.stat().st_size for p in (self.path / kind).glob("*.seg"))
+            result[kind] = {"segments": segments, "rows": total, "bytes": size, "ts_min": ts_min, "ts_max": ts_max}
+        return result
+
+    def compact(self, kind, min_rows=None):
+        """Rewrite segments smaller than min_rows into segments of up to segment_rows rows."""
+        min_rows = min_rows or self.segment_rows // 4
+        with self._lock:
+            small = self.db.execute(
+                "SELECT id, path, rows FROM segments WHERE kind = ? AND rows < ? ORDER BY ts_min",
+                (kind, min_rows)).fetchall()
+        if len(small) < 2:
+            return 0
+        merged = 0
+        batch = []
+        batch_rows = 0
+        for seg_id, rel_path, rows in small + [(None, None, 0)]:
+            if seg_id is not None and batch_rows + rows <= self.segment_rows:
+                batch.append((seg_id, rel_path))
+                batch_rows += rows
+                continue
+            if len(batch) > 1:
+                records = []
+                for _, path in batch:
+                    seg = Segment(self.path / path)
+                    cols = {name: seg.column(name) for name in seg.columns}
+                    for i in range(seg.rows):
+                        records.append({name: _python_value(arr[i]) for name, arr in cols.items()})
+                self._write_segment(kind, [{k: v for k, v in r.items() if v is not None} for r in records])
+                with self._lock, self.db:
+                    self.db.executemany("DELETE FROM segments WHERE id = ?", [(i,) for i, _ in batch])
+                for _, path in batch:
+                    (self.path / path).unlink(missing_ok=True)
+                merged += len(batch)
+            batch = [(seg_id, rel_path)] if seg_id is not None else []
+            batch_rows = rows
+        return merged
+
+
+def _python_value(value):
+    if isinstance(value, np.integer):
+        null = UINT_NULL if isinstance(value, np.unsignedinteger) else INT_NULL
+        return None if value == null else int(value)
+    if isinstance(value, np.floating):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def print_down(store, days=7):
+    since = time.time() - days * 86400
+    table = store.scan("interfaces", columns=["name", "description"], since=since, where={"oper_status": "down"})
+    print(f"{len(table.get('ts', []))} oper-down samples in the last {days} day(s)")
+    seen = {}
+    for host, name, descr, ts in zip(table.get("host", []), table.get("name", []),
+                                     table.get("description", []), table.get("ts", [])):
+        seen[(host, name)] = (max(ts, seen[(host, name)][0]) if (host, name) in seen else ts, descr)
+    for (host, name), (ts, descr) in sorted(seen.items()):
+        print(f"{host:16} {name:32} {descr or '':30} last seen down {time.strftime('%Y-%m-%d %H:%M', time.localtime(ts))}")
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "stats"
+    with SnapshotStore() as store:
+        if command == "down":
+            print_down(store, float(argv[2]) if len(argv) > 2 else 7)
+        elif command == "compact":
+            kinds = argv[2:] or list(store.stats())
+            for kind in kinds:
+                print(f"{kind}: {store.compact(kind)} segments merged")
+        elif command == "stats":
+            for kind, info in sorted(store.stats().items()):
+                print(f"{kind:14} {info['segments']:6} segments {info['rows']:10} rows {info['bytes'] / 1e6:9.1f} MB")
+        else:
+            print(USAGE)
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
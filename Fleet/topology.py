@@ -0,0 +1,578 @@
+### CDP / LLDP topology crawler with a persistent, indexed adjacency graph (sqlite)
+### Starts at seed switches, polls neighbor tables concurrently and walks the fabric
+### breadth first; a refresh re-polls only the switches whose neighbor count changed.
+#
+#   python topology.py crawl 10.1.0.1 10.1.0.2 --inventory inventory.json
+#   python topology.py crawl --port nxapi=8444 --port restconf=8443      # seeds: the inventory
+#   python topology.py refresh
+#   python topology.py show [node] [--json]
+#
+# NX-OS switches are polled over NX-API CLI (NX-API CLI/nxapi_neighbors.py: one /ins
+# request with show hostname and the cdp / lldp "detail" tables), IOS-XE devices over
+# RESTCONF (IOS-XE/RESTCONF/restconf_neighbors.py). Every neighbor row names a device
+# and, for CDP and NX-OS LLDP, its management address: a device seen for the first time
+# is queued at that address, so each switch is polled once however many neighbors
+# report it. Nodes are keyed by the normalized device name ("Leaf-1(FDO2112)" and
+# "leaf-1.example.com" are both "leaf-1"); a device reached at a second address, or a
+# seed some other switch already reported, is not polled again. A discovered device
+# that is not in the inventory gets the protocol of its platform string (N9K / Nexus:
+# nxapi, other Cisco: restconf), the port from --port or from the switch that reported
+# it, and that switch's credential set.
+#
+# The graph lives in TOPOLOGY_PATH: nodes (name, address, platform, per-protocol neighbor
+# counts, last poll, last error) and links (node, local port, neighbor, remote port,
+# protocols), indexed on both ends, so the neighbors of a node are one index lookup in
+# either direction. A crawl replaces the links of each polled node in one transaction.
+# refresh sends every known switch the cheap count probe (brief tables / list keys only),
+# fully re-polls the ones whose counts changed or that failed last time, and crawls on
+# from any device they newly report. A cabling change shows up on both of its ends, so
+# both get re-polled. Calls go through one Fleet/scheduler.py Scheduler, so a slow or
+# throttling switch gets fewer calls in flight while the rest of the fabric proceeds.
+#
+# Against the NX-API simulator on one core (Benchmarks/run_benchmarks.py --only fleet),
+# a 1000-switch fabric with 4 spines is crawled from one seed in about a minute. A
+# Crawler keeps a keep-alive pool per switch, so a refresh() in the same process probes
+# all 1000 in about 4 s; `topology.py refresh` from a fresh process pays one TLS
+# handshake per switch on top.
+
+import argparse
+import importlib
+import json
+import re
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from inventory import DEFAULT_PORTS, Device, Inventory, InventoryError
+from scheduler import Scheduler
+
+requests.packages.urllib3.disable_warnings()
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+REPO_DIR = Path(__file__).resolve().parents[1]
+TOPOLOGY_PATH = Path(__file__).resolve().with_name("topology.sqlite")
+MAX_WORKERS = 64              # polls in flight over the whole fabric
+POOL_HOSTS = 4096             # keep-alive pools kept per session: a refresh reuses the crawl's connections
+TIMEOUT = 10
+PROTOCOLS = ("cdp", "lldp")
+
+# polling protocol -> (directory, module with neighbor_counts() / neighbors())
+FETCHERS = {
+    "nxapi": (REPO_DIR / "NX-OS" / "NX-API CLI", "nxapi_neighbors"),
+    "restconf": (REPO_DIR / "IOS-XE" / "RESTCONF", "restconf_neighbors"),
+}
+PLATFORM_FETCHERS = {"nx-os": "nxapi", "ios-xe": "restconf"}
+
+_NEXUS = re.compile(r"^N\d+K|Nexus|NX-OS", re.IGNORECASE)
+_CISCO = re.compile(r"^(C\d|WS-C|ISR|ASR|CSR|C8\d|Cat|cisco)|IOS", re.IGNORECASE)
+_SERIAL = re.compile(r"\([^)]*\)$")
+_IPV4 = re.compile(r"^\d+\.\d+\.\d+\.\d+$")
+_INTF = re.compile(r"^([A-Za-z][A-Za-z-]*)\s*(\d\S*)$")
+# interface type as CDP / LLDP / the CLI may write it -> the full name links are stored under
+# (NX-OS CDP says "Ethernet1/1", its LLDP "Eth1/1"; IOS-XE LLDP says "Gi1/0/1")
+INTERFACE_TYPES = {
+    "eth": "Ethernet", "et": "Ethernet",
+    "fa": "FastEthernet", "gi": "GigabitEthernet", "gig": "GigabitEthernet",
+    "tw": "TwoGigabitEthernet", "fi": "FiveGigabitEthernet", "te": "TenGigabitEthernet",
+    "twe": "TwentyFiveGigE", "fo": "FortyGigabitEthernet", "hu": "HundredGigE",
+    "po": "Port-channel", "lo": "Loopback", "vl": "Vlan",
+}
+INTERFACE_TYPES.update({name.lower(): name for name in set(INTERFACE_TYPES.values())})
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    node TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    address TEXT,
+    platform TEXT,
+    protocol TEXT,
+    port INTEGER,
+    credentials TEXT,
+    counts TEXT,
+    neighbor_count INTEGER,
+    polled_at REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS links (
+    node TEXT NOT NULL,
+    local_intf TEXT NOT NULL,
+    neighbor TEXT NOT NULL,
+    remote_intf TEXT NOT NULL,
+    protocols TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (node, local_intf, neighbor)
+);
+CREATE INDEX IF NOT EXISTS idx_nodes_address ON nodes (address);
+CREATE INDEX IF NOT EXISTS idx_links_neighbor ON links (neighbor, node);
+"""
+NODE_FIELDS = ("node", "name", "address", "platform", "protocol", "port", "credentials", "counts",
+               "neighbor_count", "polled_at", "error")
+
+
+class TopologyError(Exception):
+    """No seeds, an unknown node or a seed that cannot be polled."""
+
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def node_id(name):
+    """Graph key of a device name: "Leaf-1(FDO21120U5D)" and "leaf-1.example.com" -> "leaf-1"."""
+    name = _SERIAL.sub("", (name or "").strip()).strip().lower()
+    return name if _IPV4.match(name) else name.split(".", 1)[0]
+
+def interface_name(name):
+    """Full interface name: "Eth1/1" -> "Ethernet1/1", "gi 1/0/1" -> "GigabitEthernet1/0/1"; unknown types as given."""
+    name = (name or "").strip()
+    m = _INTF.match(name)
+    if not m:
+        return name
+    return INTERFACE_TYPES.get(m.group(1).lower(), m.group(1)) + m.group(2)
+
+def platform_of(platform):
+    """Inventory platform for a CDP platform id / LLDP system description ("" if not Cisco)."""
+    if _NEXUS.search(platform or ""):
+        return "nx-os"
+    if _CISCO.search(platform or ""):
+        return "ios-xe"
+    return ""
+
+def merge_neighbors(found):
+    """One link per (local port, neighbor) from the CDP and LLDP rows, with the protocols that saw it.
+
+    Both ports are stored under their full names, so the CDP and LLDP row of a cable (and the
+    rows its two ends report) carry the same interface strings.
+    """
+    links = {}
+    for nbr in found:
+        nbr = dict(nbr, local_intf=interface_name(nbr["local_intf"]), remote_intf=interface_name(nbr["remote_intf"]))
+        key = (nbr["local_intf"], node_id(nbr["name"]))
+        link = links.get(key)
+        if link is None:
+            links[key] = dict(nbr, neighbor=key[1], protocols=[nbr["protocol"]])
+            continue
+        if nbr["protocol"] not in link["protocols"]:
+            link["protocols"].append(nbr["protocol"])
+        for field in ("address", "platform", "remote_intf"):
+            if not link.get(field) and nbr.get(field):
+                link[field] = nbr[field]
+    return list(links.values())
+
+def protocol_counts(found):
+    counts = {}
+    for nbr in found:
+        counts[nbr["protocol"]] = counts.get(nbr["protocol"], 0) + 1
+    return counts
+
+def load_fetcher(protocol):
+    directory, module = FETCHERS[protocol]
+    if str(directory) not in sys.path:
+        # appended: the platform directories each have their own device_info.py
+        sys.path.append(str(directory))
+    return importlib.import_module(module)
+
+# -----------------------------
+# GRAPH STORE
+# -----------------------------
+class TopologyStore:
+    """sqlite adjacency graph; safe to share between threads of one process."""
+
+    def __init__(self, path=TOPOLOGY_PATH):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- writes ----
+    def add_node(self, node, name, address=None, platform=None, protocol=None, port=None, credentials=None):
+        """Record a device as soon as it is seen; known fields are only filled in, never cleared."""
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT INTO nodes (node, name, address, platform, protocol, port, credentials) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (node) DO UPDATE SET "
+                "address = COALESCE(nodes.address, excluded.address), "
+                "platform = COALESCE(NULLIF(nodes.platform, ''), excluded.platform), "
+                "protocol = COALESCE(nodes.protocol, excluded.protocol), "
+                "port = COALESCE(nodes.port, excluded.port), "
+                "credentials = COALESCE(nodes.credentials, excluded.credentials)",
+                (node, name, address, platform, protocol, port, credentials),
+            )
+
+    def replace_neighbors(self, node, links, counts, hostname="", polled_at=None):
+        """Store a full poll of node; returns (added, removed) sets of (local_intf, neighbor)."""
+        polled_at = time.time() if polled_at is None else polled_at
+        with self._lock, self._db:
+            old = {(intf, nbr) for intf, nbr in self._db.execute(
+                "SELECT local_intf, neighbor FROM links WHERE node = ?", (node,))}
+            new = {(link["local_intf"], link["neighbor"]) for link in links}
+            self._db.execute("DELETE FROM links WHERE node = ?", (node,))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)",
+                [(node, link["local_intf"], link["neighbor"], link.get("remote_intf") or "",
+                  ",".join(link["protocols"]), polled_at) for link in links],
+            )
+            self._db.execute(
+                "UPDATE nodes SET name = COALESCE(NULLIF(?, ''), name), counts = ?, neighbor_count = ?, "
+                "polled_at = ?, error = NULL WHERE node = ?",
+                (hostname, json.dumps(counts, sort_keys=True), len(links), polled_at, node),
+            )
+        return new - old, old - new
+
+    def set_error(self, node, error):
+        with self._lock, self._db:
+            self._db.execute("UPDATE nodes SET error = ? WHERE node = ?", (str(error), node))
+
+    def checked(self, node, polled_at=None):
+        """A count probe found node unchanged."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE nodes SET polled_at = ?, error = NULL WHERE node = ?",
+                             (time.time() if polled_at is None else polled_at, node))
+
+    # ---- reads ----
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def node(self, node):
+        rows = self._query(f"SELECT {', '.join(NODE_FIELDS)} FROM nodes WHERE node = ?", (node_id(node),))
+        if not rows:
+            rows = self._query(f"SELECT {', '.join(NODE_FIELDS)} FROM nodes WHERE address = ?", (node,))
+        return dict(zip(NODE_FIELDS, rows[0])) if rows else None
+
+    def nodes(self):
+        return [dict(zip(NODE_FIELDS, row))
+                for row in self._query(f"SELECT {', '.join(NODE_FIELDS)} FROM nodes ORDER BY node")]
+
+    def neighbors(self, node):
+        """{neighbor: [(local_intf, remote_intf, protocols)]}, from node's own table or, for a
+        device that was never polled, from what its neighbors report."""
+        node = node_id(node)
+        adjacency = {}
+        rows = self._query("SELECT neighbor, local_intf, remote_intf, protocols FROM links WHERE node = ?", (node,))
+        if not rows:
+            rows = self._query("SELECT node, remote_intf, local_intf, protocols FROM links WHERE neighbor = ?",
+                               (node,))
+        for nbr, local, remote, protocols in rows:
+            adjacency.setdefault(nbr, []).append((local, remote, protocols))
+        return adjacency
+
+    def links(self):
+        """Every cable once: (node, local_intf, neighbor, remote_intf, protocols), reported by either end."""
+        seen = set()
+        out = []
+        for node, local, nbr, remote, protocols in self._query(
+                "SELECT node, local_intf, neighbor, remote_intf, protocols FROM links ORDER BY node, local_intf"):
+            key = tuple(sorted(((node, local), (nbr, remote))))
+            if key not in seen:
+                seen.add(key)
+                out.append((node, local, nbr, remote, protocols))
+        return out
+
+    def counts(self):
+        nodes, polled, failed = self._query(
+            "SELECT COUNT(*), COUNT(polled_at), COUNT(error) FROM nodes")[0]
+        return {"nodes": nodes, "polled": polled, "failed": failed, "links": len(self.links())}
+
+    def export(self):
+        return {"nodes": self.nodes(),
+                "links": [dict(zip(("node", "local_intf", "neighbor", "remote_intf", "protocols"), link))
+                          for link in self.links()]}
+
+# -----------------------------
+# CRAWLER
+# -----------------------------
+class Crawler:
+    """Breadth-first neighbor polling over a thread pool; results are written to a TopologyStore."""
+
+    def __init__(self, store, inventory=None, ports=None, workers=MAX_WORKERS, protocols=PROTOCOLS,
+                 scheduler=None, timeout=TIMEOUT, out=print):
+        self.store = store
+        self.inventory = inventory if inventory is not None else Inventory()
+        self.ports = dict(ports or {})
+        self.workers = workers
+        self.protocols = tuple(protocols)
+        self.scheduler = scheduler or Scheduler()
+        self.timeout = timeout
+        self.out = out
+        self._sessions = {}
+        self.stats = {}
+
+    # ---- devices ----
+    def session(self, protocol):
+        session = self._sessions.get(protocol)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=self.workers)
+            session.mount("https://", adapter)
+            self._sessions[protocol] = session
+        return session
+
+    def polling_protocol(self, dev):
+        preferred = PLATFORM_FETCHERS.get(dev.platform)
+        if preferred in dev.protocols:
+            return preferred
+        return next((p for p in dev.protocols if p in FETCHERS), None)
+
+    def device(self, address, platform="", via=None, protocol=None, port=None, credentials=None):
+        """Device for address: the inventory's, else one built from the reporting switch (via)."""
+        if address in self.inventory.by_host:
+            return self.inventory.get(address)
+        platform = platform_of(platform) or (via.platform if via is not None else "")
+        protocol = protocol or PLATFORM_FETCHERS.get(platform)
+        if not platform:
+            platform = next((p for p, fetcher in PLATFORM_FETCHERS.items() if fetcher == protocol), "")
+        if protocol is None:
+            return None
+        port = port or self.ports.get(protocol) or (via.protocols.get(protocol) if via is not None else None) \
+            or DEFAULT_PORTS[protocol]
+        credentials = credentials or (via.credentials if via is not None else "default")
+        return self.inventory.add(Device(address, platform=platform, protocols={protocol: int(port)},
+                                         credentials=credentials))
+
+    def _stored_device(self, row):
+        return self.device(row["address"], row["platform"] or "", protocol=row["protocol"], port=row["port"],
+                           credentials=row["credentials"])
+
+    # ---- polling (worker threads) ----
+    def _poll(self, dev):
+        protocol = self.polling_protocol(dev)
+        fetcher = load_fetcher(protocol)
+        return fetcher.neighbors(self.session(protocol), self.inventory.device_dict(dev, protocol), self.protocols,
+                                 self.scheduler, self.timeout)
+
+    def _probe(self, dev):
+        protocol = self.polling_protocol(dev)
+        fetcher = load_fetcher(protocol)
+        return fetcher.neighbor_counts(self.session(protocol), self.inventory.device_dict(dev, protocol),
+                                       self.protocols, self.scheduler, self.timeout)
+
+    # ---- BFS ----
+    def crawl(self, seeds, known=(), max_nodes=None):
+        """Poll seeds (addresses, or (node, Device) pairs) and every device reachable from them.
+
+        Nodes in known count as already polled: their neighbors are linked, not polled again.
+        """
+        started = time.perf_counter()
+        stats = {"polled": 0, "failed": 0, "discovered": 0, "added": 0, "removed": 0}
+        seen_nodes = set(known)
+        seen_addresses = set()
+        frontier = []
+        for seed in seeds:
+            if isinstance(seed, tuple):
+                node, dev = seed
+            else:
+                # a seed outside the inventory is polled over the first --port protocol
+                node, dev = None, self.device(seed, protocol=next(iter(self.ports), None))
+            if dev is None or self.polling_protocol(dev) is None:
+                raise TopologyError(f"seed {seed}: no inventory entry with a "
+                                    f"{' or '.join(FETCHERS)} endpoint (use --inventory or --port)")
+            if dev.host not in seen_addresses:
+                seen_addresses.add(dev.host)
+                frontier.append((node, dev))
+                if node is not None:
+                    seen_nodes.add(node)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            running = {pool.submit(self._poll, dev): (node, dev) for node, dev in frontier}
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    expected, dev = running.pop(future)
+                    try:
+                        hostname, found = future.result()
+                    except Exception as e:
+                        stats["failed"] += 1
+                        node = expected or node_id(dev.name)
+                        self.store.add_node(node, dev.name, dev.host, dev.platform, self.polling_protocol(dev),
+                                            dev.protocols.get(self.polling_protocol(dev)), dev.credentials)
+                        self.store.set_error(node, f"{type(e).__name__}: {e}")
+                        self.out(f"  {dev.host}: {type(e).__name__}: {e}")
+                        continue
+                    node = expected or node_id(hostname) or dev.host
+                    if expected is None and node in seen_nodes:
+                        continue            # a seed some other switch already reported
+                    seen_nodes.add(node)
+                    stats["polled"] += 1
+                    protocol = self.polling_protocol(dev)
+                    self.store.add_node(node, hostname or dev.name, dev.host, dev.platform, protocol,
+                                        dev.protocols[protocol], dev.credentials)
+                    links = merge_neighbors(found)
+                    added, removed = self.store.replace_neighbors(node, links, protocol_counts(found), hostname)
+                    stats["added"] += len(added)
+                    stats["removed"] += len(removed)
+                    for link in links:
+                        self._expand(link, dev, seen_nodes, seen_addresses, running, pool, stats, max_nodes)
+        stats["elapsed"] = time.perf_counter() - started
+        self.stats = stats
+        return stats
+
+    def _expand(self, link, via, seen_nodes, seen_addresses, running, pool, stats, max_nodes):
+        nbr = link["neighbor"]
+        if nbr in seen_nodes:
+            return
+        seen_nodes.add(nbr)
+        stats["discovered"] += 1
+        address = link.get("address")
+        if not address:
+            known = self.inventory.select(hosts=[link["name"], nbr])
+            address = known[0].host if known else None
+        dev = self.device(address, link.get("platform") or "", via=via) if address else None
+        protocol = self.polling_protocol(dev) if dev is not None else None
+        self.store.add_node(nbr, link["name"], address, dev.platform if dev else link.get("platform"), protocol,
+                            dev.protocols.get(protocol) if protocol else None, dev.credentials if dev else None)
+        if dev is None or protocol is None:
+            reason = "no management address" if not address else f"no poller for platform {link.get('platform')!r}"
+            self.store.set_error(nbr, reason)
+            return
+        if address in seen_addresses or (max_nodes and len(seen_nodes) > max_nodes):
+            return
+        seen_addresses.add(address)
+        running[pool.submit(self._poll, dev)] = (nbr, dev)
+
+    # ---- incremental refresh ----
+    def refresh(self):
+        """Count-probe every pollable node; re-poll (and crawl on from) those that changed or failed."""
+        started = time.perf_counter()
+        rows = [row for row in self.store.nodes() if row["address"] and row["protocol"]]
+        changed = []
+        probes = {"probed": 0, "unchanged": 0, "changed": 0, "probe_failed": 0}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            jobs = {}
+            for row in rows:
+                dev = self._stored_device(row)
+                if dev is None:
+                    continue
+                if row["error"] or row["counts"] is None:
+                    changed.append((row["node"], dev))
+                    continue
+                jobs[pool.submit(self._probe, dev)] = (row, dev)
+            for future in list(jobs):
+                row, dev = jobs[future]
+                probes["probed"] += 1
+                try:
+                    counts = future.result()
+                except Exception as e:
+                    probes["probe_failed"] += 1
+                    self.store.set_error(row["node"], f"{type(e).__name__}: {e}")
+                    changed.append((row["node"], dev))
+                    continue
+                if counts == json.loads(row["counts"]):
+                    probes["unchanged"] += 1
+                    self.store.checked(row["node"])
+                else:
+                    probes["changed"] += 1
+                    changed.append((row["node"], dev))
+        probe_time = time.perf_counter() - started
+        known = {row["node"] for row in self.store.nodes()} - {node for node, _ in changed}
+        stats = self.crawl(changed, known=known) if changed else {"polled": 0, "failed": 0, "discovered": 0,
+                                                                    "added": 0, "removed": 0}
+        stats.update(probes, probe_elapsed=probe_time, elapsed=time.perf_counter() - started)
+        self.stats = stats
+        return stats
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def parse_ports(values):
+    ports = {}
+    for value in values or ():
+        protocol, _, port = value.partition("=")
+        if protocol not in FETCHERS or not port.isdigit():
+            raise TopologyError(f"--port {value}: expected {'|'.join(FETCHERS)}=<port>")
+        ports[protocol] = int(port)
+    return ports
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="CDP / LLDP topology crawler")
+    parser.add_argument("--db", default=str(TOPOLOGY_PATH), help="topology sqlite file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("crawl", "refresh"):
+        p = sub.add_parser(name)
+        if name == "crawl":
+            p.add_argument("seeds", nargs="*", help="seed addresses (default: every pollable inventory device)")
+            p.add_argument("--max-nodes", type=int, help="stop queueing new devices beyond this many")
+        p.add_argument("--inventory", help="inventory file (default: INVENTORY_FILE / device_info.py)")
+        p.add_argument("--port", action="append", help="port for discovered devices, e.g. nxapi=8444")
+        p.add_argument("--workers", type=int, default=MAX_WORKERS)
+        p.add_argument("--protocols", nargs="+", default=list(PROTOCOLS), choices=PROTOCOLS)
+    p = sub.add_parser("show")
+    p.add_argument("node", nargs="?", help="name or address of one node (default: the whole graph)")
+    p.add_argument("--json", action="store_true")
+    return parser.parse_args(argv[1:])
+
+def print_stats(command, stats, store):
+    totals = store.counts()
+    line = f"{command}: polled {stats['polled']}, failed {stats['failed']}, new devices {stats['discovered']}, " \
+           f"links +{stats['added']} -{stats['removed']} in {stats['elapsed']:.1f}s"
+    if "probed" in stats:
+        line += (f" (probed {stats['probed']}: {stats['changed']} changed, {stats['unchanged']} unchanged, "
+                 f"{stats['probe_failed']} failed, {stats['probe_elapsed']:.1f}s)")
+    print(line)
+    print(f"graph: {totals['nodes']} nodes ({totals['polled']} polled, {totals['failed']} with errors), "
+          f"{totals['links']} links")
+
+def show(store, node=None, as_json=False):
+    if node is None:
+        if as_json:
+            print(json.dumps(store.export(), indent=2))
+            return 0
+        for row in store.nodes():
+            state = row["error"] or ("ok" if row["polled_at"] else "not polled")
+            print(f"{row['node']:<32} {row['address'] or '-':<16} {row['platform'] or '-':<20} "
+                  f"{row['neighbor_count'] if row['neighbor_count'] is not None else '-':>4}  {state}")
+        return 0
+    row = store.node(node)
+    if row is None:
+        raise TopologyError(f"{node} is not in the graph")
+    adjacency = store.neighbors(row["node"])
+    if as_json:
+        print(json.dumps({"node": row, "neighbors": adjacency}, indent=2))
+        return 0
+    print(f"{row['node']} ({row['address'] or 'no address'}, {row['platform'] or '?'}): {len(adjacency)} neighbors")
+    for nbr, ports in sorted(adjacency.items()):
+        for local, remote, protocols in ports:
+            print(f"  {local:<24} -> {nbr:<32} {remote:<24} {protocols}")
+    return 0
+
+def main(argv):
+    args = parse_args(argv)
+    try:
+        with TopologyStore(args.db) as store:
+            if args.command == "show":
+                return show(store, args.node, args.json)
+            inventory = Inventory.load(args.inventory)
+            crawler = Crawler(store, inventory, parse_ports(args.port), args.workers, args.protocols)
+            if args.command == "crawl":
+                seeds = args.seeds or [dev.host for dev in inventory.devices if crawler.polling_protocol(dev)]
+                if not seeds:
+                    raise TopologyError("no seeds given and no pollable device in the inventory")
+                stats = crawler.crawl(seeds, max_nodes=args.max_nodes)
+            else:
+                stats = crawler.refresh()
+            print_stats(args.command, stats, store)
+            return 1 if stats["failed"] else 0
+    except (TopologyError, InventoryError) as e:
+        print(f"Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
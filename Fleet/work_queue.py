@@ -0,0 +1,380 @@
+### Sharded fleet jobs on a shared sqlite work queue, run by worker processes on one or more nodes
+### A job is "run this task for every selected device"; devices are split into shards,
+### every worker owns a home shard and steals from the fullest shard when its own is empty.
+#
+#   python work_queue.py submit queue.sqlite work_queue:tcp_check --protocol netconf --shards 16
+#   python work_queue.py work queue.sqlite 1 --processes 8          # on every node sharing the file
+#   python work_queue.py status queue.sqlite 1
+#   python work_queue.py results queue.sqlite 1 > results.ndjson
+#   python work_queue.py run work_queue:tcp_check --protocol restconf --processes 4   # submit + work here
+#
+# Tasks are "module:function" names called as function(device_dict, **kwargs) and must
+# return something JSON-serialisable. --path adds directories to sys.path in the workers,
+# e.g. --path ../IOS-XE/NETCONF for netconf_fleet_collect:collect_device.
+#
+# Only host names go into the queue. Each worker loads the inventory itself and resolves
+# credentials locally, so the shared file never holds a password.
+#
+# Claims run in BEGIN IMMEDIATE transactions, so any number of processes and nodes can
+# share one queue file (on a network filesystem it must support POSIX locks). A claimed task
+# carries a lease; a worker that dies leaves its tasks to be reclaimed when the lease
+# runs out, up to MAX_ATTEMPTS times. Results are only accepted from the worker that
+# holds the lease.
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+
+from inventory import Inventory, InventoryError, shard_of
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+DEFAULT_SHARDS = 16
+CLAIM_BATCH = 4               # tasks claimed per transaction
+LEASE_SECONDS = 300           # a claimed task is reclaimable after this long
+MAX_ATTEMPTS = 3
+IDLE_POLL = 1.0               # seconds between polls while other workers still hold leases
+BUSY_TIMEOUT = 30_000         # ms sqlite waits for the write lock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id         INTEGER PRIMARY KEY,
+    task       TEXT NOT NULL,
+    spec       TEXT NOT NULL,
+    shards     INTEGER NOT NULL,
+    created    REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY,
+    job_id      INTEGER NOT NULL REFERENCES jobs (id),
+    shard       INTEGER NOT NULL,
+    host        TEXT NOT NULL,
+    state       TEXT NOT NULL DEFAULT 'pending',     -- pending, running, done, failed
+    owner       TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    started     REAL,
+    finished    REAL,
+    result      TEXT,
+    error       TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_claim ON tasks (job_id, state, shard, id);
+CREATE TABLE IF NOT EXISTS workers (
+    id         INTEGER PRIMARY KEY,
+    job_id     INTEGER NOT NULL,
+    name       TEXT NOT NULL,
+    started    REAL NOT NULL
+);
+"""
+
+
+class WorkQueueError(Exception):
+    """Unknown job, bad task name or a queue file that cannot be used."""
+
+
+class WorkQueue:
+    """The shared sqlite queue file; one instance per process."""
+
+    def __init__(self, path, lease=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.db = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT / 1000, isolation_level=None)
+        self.db.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT}")
+        # WAL keeps readers (status) off the writers' backs; not usable on network filesystems
+        if os.getenv("WORK_QUEUE_WAL", "1") == "1":
+            self.db.execute("PRAGMA journal_mode = WAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @contextmanager
+    def _immediate(self):
+        """BEGIN IMMEDIATE ... COMMIT, so claim read-then-write is atomic across processes."""
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute("ROLLBACK")
+            raise
+        self.db.execute("COMMIT")
+
+    # -----------------------------
+    # JOBS
+    # -----------------------------
+    def submit(self, task, hosts, shards=DEFAULT_SHARDS, spec=None):
+        """Create a job with one pending task per host; returns the job id."""
+        shards = max(1, int(shards))
+        with self._immediate() as db:
+            job_id = db.execute("INSERT INTO jobs (task, spec, shards, created) VALUES (?, ?, ?, ?)",
+                                (task, json.dumps(spec or {}), shards, time.time())).lastrowid
+            db.executemany("INSERT INTO tasks (job_id, shard, host) VALUES (?, ?, ?)",
+                           ((job_id, shard_of(host, shards), host) for host in hosts))
+        return job_id
+
+    def job(self, job_id):
+        row = self.db.execute("SELECT task, spec, shards FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise WorkQueueError(f"job {job_id} not found in {self.path}")
+        return {"id": job_id, "task": row[0], "spec": json.loads(row[1]), "shards": row[2]}
+
+    def register_worker(self, job_id, name):
+        """Record a worker; returns its home shard (workers are spread round robin)."""
+        shards = self.job(job_id)["shards"]
+        with self._immediate() as db:
+            worker_id = db.execute("INSERT INTO workers (job_id, name, started) VALUES (?, ?, ?)",
+                                   (job_id, name, time.time())).lastrowid
+            count = db.execute("SELECT COUNT(*) FROM workers WHERE job_id = ? AND id <= ?",
+                               (job_id, worker_id)).fetchone()[0]
+        return (count - 1) % shards
+
+    # -----------------------------
+    # CLAIM / COMPLETE
+    # -----------------------------
+    def claim(self, job_id, worker, shard, limit=CLAIM_BATCH):
+        """Lease up to limit tasks: from the home shard first, else stolen from the fullest shard.
+
+        Returns [(task_id, host)]; an empty list means nothing is claimable right now.
+        """
+        now = time.time()
+        claimable = "(state = 'pending' OR (state = 'running' AND lease_until < ?))"
+        with self._immediate() as db:
+            # tasks whose lease ran out too often are given up instead of retried forever
+            db.execute(f"UPDATE tasks SET state = 'failed', finished = ?, error = 'lease expired "
+                       f"{self.max_attempts} times' WHERE job_id = ? AND state = 'running' AND lease_until < ? "
+                       f"AND attempts >= ?", (now, job_id, now, self.max_attempts))
+            rows = db.execute(f"SELECT id, host FROM tasks WHERE job_id = ? AND shard = ? AND {claimable} "
+                              f"ORDER BY id LIMIT ?", (job_id, shard, now, limit)).fetchall()
+            if not rows:
+                victim = db.execute(f"SELECT shard FROM tasks WHERE job_id = ? AND {claimable} "
+                                    f"GROUP BY shard ORDER BY COUNT(*) DESC LIMIT 1", (job_id, now)).fetchone()
+                if victim is not None:
+                    # steal from the far end, the victim keeps working from the front
+                    rows = db.execute(f"SELECT id, host FROM tasks WHERE job_id = ? AND shard = ? AND {claimable} "
+                                      f"ORDER BY id DESC LIMIT ?", (job_id, victim[0], now, limit)).fetchall()
+            db.executemany("UPDATE tasks SET state = 'running', owner = ?, lease_until = ?, started = ?, "
+                           "attempts = attempts + 1 WHERE id = ?",
+                           ((worker, now + self.lease, now, task_id) for task_id, _ in rows))
+        return rows
+
+    def complete(self, task_id, worker, result=None, error=None):
+        """Store the outcome; ignored (returns False) if the lease was lost to another worker."""
+        state = "failed" if error else "done"
+        cur = self.db.execute("UPDATE tasks SET state = ?, finished = ?, result = ?, error = ?, lease_until = NULL "
+                              "WHERE id = ? AND owner = ? AND state = 'running'",
+                              (state, time.time(), None if error else json.dumps(result, default=str),
+                               error, task_id, worker))
+        return cur.rowcount == 1
+
+    def outstanding(self, job_id):
+        """(pending, running) task counts."""
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM tasks WHERE job_id = ? AND state IN "
+                                      "('pending', 'running') GROUP BY state", (job_id,)).fetchall())
+        return counts.get("pending", 0), counts.get("running", 0)
+
+    def status(self, job_id):
+        counts = dict(self.db.execute("SELECT state, COUNT(*) FROM tasks WHERE job_id = ? GROUP BY state",
+                                      (job_id,)).fetchall())
+        owners = dict(self.db.execute("SELECT owner, COUNT(*) FROM tasks WHERE job_id = ? AND state = 'done' "
+                                      "GROUP BY owner", (job_id,)).fetchall())
+        span = self.db.execute("SELECT MIN(started), MAX(finished) FROM tasks WHERE job_id = ?", (job_id,)).fetchone()
+        return {"states": counts, "done_by_worker": owners,
+                "elapsed": (span[1] - span[0]) if span[0] and span[1] else None}
+
+    def results(self, job_id):
+        """(host, state, result, error) of every task, in host order."""
+        for host, state, result, error in self.db.execute(
+                "SELECT host, state, result, error FROM tasks WHERE job_id = ? ORDER BY host", (job_id,)):
+            yield host, state, json.loads(result) if result else None, error
+
+
+# -----------------------------
+# WORKERS
+# -----------------------------
+def resolve_task(name, paths=()):
+    """'module:function' -> callable, after adding paths to sys.path."""
+    for path in paths:
+        if path not in sys.path:
+            sys.path.append(path)
+    module_name, _, func_name = name.partition(":")
+    if not module_name or not func_name:
+        raise WorkQueueError(f"task must look like module:function, got '{name}'")
+    try:
+        return getattr(importlib.import_module(module_name), func_name)
+    except (ImportError, AttributeError) as e:
+        raise WorkQueueError(f"cannot load task {name}: {e}") from None
+
+def work(queue_path, job_id, name=None, inventory_path=None, batch=CLAIM_BATCH):
+    """Claim and run tasks of job_id until none are left; returns the number of tasks run."""
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    with WorkQueue(queue_path) as queue:
+        job = queue.job(job_id)
+        spec = job["spec"]
+        func = resolve_task(job["task"], spec.get("paths", ()))
+        inventory = Inventory.load(inventory_path or spec.get("inventory"))
+        protocol = spec.get("protocol")
+        kwargs = spec.get("kwargs", {})
+        shard = queue.register_worker(job_id, name)
+        done = 0
+        while True:
+            claimed = queue.claim(job_id, name, shard, batch)
+            if not claimed:
+                pending, running = queue.outstanding(job_id)
+                if not pending and not running:
+                    return done
+                time.sleep(IDLE_POLL)      # others hold leases; pick up whatever they drop
+                continue
+            for task_id, host in claimed:
+                try:
+                    dev = inventory.device_dict(host, protocol) if protocol else {"host": host}
+                    result = func(dev, **kwargs)
+                except Exception as e:
+                    queue.complete(task_id, name, error=f"{type(e).__name__}: {e}")
+                    if os.getenv("WORK_QUEUE_TRACEBACK"):
+                        traceback.print_exc()
+                else:
+                    queue.complete(task_id, name, result=result)
+                done += 1
+
+def _work_process(queue_path, job_id, name, inventory_path):
+    try:
+        work(queue_path, job_id, name, inventory_path)
+    except (WorkQueueError, InventoryError) as e:
+        print(f"[{name}] {e}", file=sys.stderr)
+        raise SystemExit(1)
+
+def run_workers(queue_path, job_id, processes, inventory_path=None, node=None):
+    """Run processes workers on this node and wait for them; returns their exit codes."""
+    node = node or socket.gethostname()
+    if processes <= 1:
+        _work_process(queue_path, job_id, f"{node}:0", inventory_path)
+        return [0]
+    procs = [multiprocessing.Process(target=_work_process, args=(queue_path, job_id, f"{node}:{i}", inventory_path),
+                                     name=f"fleet-worker-{i}")
+             for i in range(processes)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    return [proc.exitcode for proc in procs]
+
+
+# -----------------------------
+# BUILT-IN TASKS
+# -----------------------------
+def tcp_check(dev, timeout=3.0):
+    """Reachability of the device's management port: connect time in ms."""
+    started = time.perf_counter()
+    with socket.create_connection((dev["host"], int(dev.get("port", 22))), timeout=timeout):
+        pass
+    return {"connect_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Sharded fleet jobs on a shared sqlite work queue")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def selection(p):
+        p.add_argument("task", help="module:function, called as function(device_dict, **kwargs)")
+        p.add_argument("--inventory", help="inventory file (default: INVENTORY_FILE / device_info.py)")
+        p.add_argument("--platform", nargs="+")
+        p.add_argument("--site", nargs="+")
+        p.add_argument("--role", nargs="+")
+        p.add_argument("--protocol", help="protocol whose port/credentials the task gets")
+        p.add_argument("--hosts", nargs="+")
+        p.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+        p.add_argument("--path", action="append", default=[], help="directory added to sys.path in workers")
+        p.add_argument("--kwargs", default="{}", help="JSON object of extra task arguments")
+
+    p = sub.add_parser("submit", help="create a job")
+    p.add_argument("queue")
+    selection(p)
+    p = sub.add_parser("run", help="submit a job to a local queue file and work it here")
+    p.add_argument("--queue", default="fleet_queue.sqlite")
+    p.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    selection(p)
+    p = sub.add_parser("work", help="work a job with several processes on this node")
+    p.add_argument("queue")
+    p.add_argument("job", type=int)
+    p.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--inventory", help="this node's copy of the inventory, if at another path")
+    p.add_argument("--node", help="node name used in worker names (default: hostname)")
+    for name in ("status", "results"):
+        p = sub.add_parser(name)
+        p.add_argument("queue")
+        p.add_argument("job", type=int)
+    return parser.parse_args(argv[1:])
+
+def submit_from_args(args):
+    inventory = Inventory.load(args.inventory)
+    selected = inventory.select(platform=args.platform, site=args.site, role=args.role,
+                                protocol=args.protocol, hosts=args.hosts)
+    spec = {
+        "protocol": args.protocol,
+        "inventory": str(Path(args.inventory).resolve()) if args.inventory else None,
+        "paths": [str(Path(p).resolve()) for p in args.path],
+        "kwargs": json.loads(args.kwargs),
+    }
+    resolve_task(args.task, spec["paths"])    # fail now rather than in every worker
+    with WorkQueue(args.queue) as queue:
+        job_id = queue.submit(args.task, [dev.host for dev in selected], args.shards, spec)
+    print(f"Job {job_id}: {args.task} on {len(selected)} devices in {args.shards} shards ({args.queue})")
+    return job_id
+
+def print_status(queue_path, job_id):
+    with WorkQueue(queue_path) as queue:
+        job = queue.job(job_id)
+        status = queue.status(job_id)
+    states = status["states"]
+    elapsed = f"{status['elapsed']:.1f}s" if status["elapsed"] else "-"
+    print(f"Job {job_id} {job['task']}: " + ", ".join(f"{k}={v}" for k, v in sorted(states.items()))
+          + f"  (wall {elapsed})")
+    for worker, count in sorted(status["done_by_worker"].items()):
+        print(f"  {worker:<32} {count}")
+    return 1 if states.get("failed") else 0
+
+def main(argv):
+    args = parse_args(argv)
+    try:
+        if args.command == "submit":
+            submit_from_args(args)
+            return 0
+        if args.command == "run":
+            job_id = submit_from_args(args)
+            run_workers(args.queue, job_id, args.processes)
+            return print_status(args.queue, job_id)
+        if args.command == "work":
+            codes = run_workers(args.queue, args.job, args.processes, args.inventory, args.node)
+            return 1 if any(codes) else 0
+        if args.command == "status":
+            return print_status(args.queue, args.job)
+        with WorkQueue(args.queue) as queue:
+            for host, state, result, error in queue.results(args.job):
+                print(json.dumps({"host": host, "state": state, "result": result, "error": error}))
+        return 0
+    except (WorkQueueError, InventoryError, ValueError) as e:
+        print(f"Error: {e}")
+        return 1
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
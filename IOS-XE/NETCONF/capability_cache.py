@@ -0,0 +1,347 @@
+### Persistent, indexed store of NETCONF hello capabilities (sqlite)
+### Answers "does device X support module Y" and fleet-wide queries without touching the network.
+
+# Each device row points at a capability set keyed by the sha256 of its (sorted) hello
+# capabilities, so identical software images share one parsed set. Parsed module,
+# revision, feature and deviation entries are indexed; rows older than the TTL count as
+# unknown and get_capabilities_cached() reconnects only for those devices.
+#
+#   python capability_cache.py import netconf_capabilities_192.168.150.201.txt 192.168.150.201
+#   python capability_cache.py module ietf-yang-push
+#   python capability_cache.py module Cisco-IOS-XE-interfaces-oper 2018-10-29
+#   python capability_cache.py capability :xpath
+#   python capability_cache.py show 192.168.150.201
+
+import hashlib
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from urllib.parse import parse_qs
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+CACHE_PATH = Path(__file__).resolve().with_name("netconf_capabilities.sqlite")
+CACHE_TTL = 24 * 3600  # seconds a stored hello is trusted
+NETCONF_CAP_PREFIX = "urn:ietf:params:netconf:capability:"
+NETCONF_BASE_PREFIX = "urn:ietf:params:netconf:base:"
+USAGE = "usage: capability_cache.py import <file> <host> | module <name> [min_revision] | capability <:name> | show <host>"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    host TEXT PRIMARY KEY,
+    caps_hash TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS capability_sets (
+    caps_hash TEXT PRIMARY KEY,
+    raw TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS protocol_caps (
+    caps_hash TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version TEXT
+);
+CREATE TABLE IF NOT EXISTS modules (
+    caps_hash TEXT NOT NULL,
+    module TEXT NOT NULL,
+    revision TEXT,
+    namespace TEXT
+);
+CREATE TABLE IF NOT EXISTS features (
+    caps_hash TEXT NOT NULL,
+    module TEXT NOT NULL,
+    feature TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS deviations (
+    caps_hash TEXT NOT NULL,
+    module TEXT NOT NULL,
+    deviation TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_devices_hash ON devices (caps_hash);
+CREATE INDEX IF NOT EXISTS idx_protocol_name ON protocol_caps (name, caps_hash);
+CREATE INDEX IF NOT EXISTS idx_modules_module ON modules (module, revision, caps_hash);
+CREATE INDEX IF NOT EXISTS idx_modules_hash ON modules (caps_hash, module);
+CREATE INDEX IF NOT EXISTS idx_features_feature ON features (module, feature, caps_hash);
+CREATE INDEX IF NOT EXISTS idx_deviations_module ON deviations (module, caps_hash);
+"""
+
+# -----------------------------
+# PARSING
+# -----------------------------
+def parse_capability(cap):
+    """Split one hello capability URI into its parts.
+
+    Protocol capabilities (urn:ietf:params:netconf:capability:xpath:1.0) give
+    {"kind": "protocol", "name": ":xpath", "version": "1.0"}; YANG module
+    capabilities give {"kind": "module", "module", "revision", "namespace",
+    "features": [...], "deviations": [...]}; anything else is {"kind": "other"}.
+    """
+    cap = cap.strip()
+    if cap.startswith(NETCONF_CAP_PREFIX) or cap.startswith(NETCONF_BASE_PREFIX):
+        base = cap.split("?", 1)[0]
+        if cap.startswith(NETCONF_BASE_PREFIX):
+            return {"kind": "protocol", "name": ":base", "version": base[len(NETCONF_BASE_PREFIX):]}
+        name, _, version = base[len(NETCONF_CAP_PREFIX):].rpartition(":")
+        return {"kind": "protocol", "name": f":{name or version}", "version": version if name else None}
+
+    namespace, _, query = cap.partition("?")
+    params = parse_qs(query, keep_blank_values=False) if query else {}
+    module = (params.get("module") or [None])[0]
+    if not module:
+        return {"kind": "other", "namespace": namespace}
+
+    def _list(key):
+        value = (params.get(key) or [""])[0]
+        return [item for item in value.split(",") if item]
+
+    return {
+        "kind": "module",
+        "module": module,
+        "revision": (params.get("revision") or [None])[0],
+        "namespace": namespace,
+        "features": _list("features"),
+        "deviations": _list("deviations"),
+    }
+
+def capabilities_hash(capabilities):
+    """Stable hash of a hello capability set (order and whitespace do not matter)."""
+    normalized = sorted({cap.strip() for cap in capabilities if cap.strip()})
+    return hashlib.sha256("\n".join(normalized).encode("utf-8")).hexdigest()
+
+# -----------------------------
+# CACHE
+# -----------------------------
+class CapabilityCache:
+    """sqlite-backed capability store; safe to share between threads of one process."""
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL):
+        self.path = str(path)
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---- writes ----
+    def store(self, host, capabilities, fetched_at=None):
+        """Record the hello capabilities of host; returns the capability-set hash."""
+        capabilities = [cap.strip() for cap in capabilities if cap.strip()]
+        caps_hash = capabilities_hash(capabilities)
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._db:
+            known = self._db.execute(
+                "SELECT 1 FROM capability_sets WHERE caps_hash = ?", (caps_hash,)
+            ).fetchone()
+            if not known:
+                self._index_set(caps_hash, capabilities)
+            previous = self._db.execute(
+                "SELECT caps_hash FROM devices WHERE host = ?", (host,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO devices (host, caps_hash, fetched_at) VALUES (?, ?, ?)",
+                (host, caps_hash, fetched_at),
+            )
+            if previous and previous[0] != caps_hash:
+                self._drop_unused_set(previous[0])
+        return caps_hash
+
+    def _drop_unused_set(self, caps_hash):
+        """Remove a capability set (e.g. after a software upgrade) once no device uses it."""
+        if self._db.execute("SELECT 1 FROM devices WHERE caps_hash = ? LIMIT 1", (caps_hash,)).fetchone():
+            return
+        for table in ("capability_sets", "protocol_caps", "modules", "features", "deviations"):
+            self._db.execute(f"DELETE FROM {table} WHERE caps_hash = ?", (caps_hash,))
+
+    def _index_set(self, caps_hash, capabilities):
+        protocol, modules, features, deviations = [], [], [], []
+        for cap in capabilities:
+            parsed = parse_capability(cap)
+            if parsed["kind"] == "protocol":
+                protocol.append((caps_hash, parsed["name"], parsed["version"]))
+            elif parsed["kind"] == "module":
+                module = parsed["module"]
+                modules.append((caps_hash, module, parsed["revision"], parsed["namespace"]))
+                features.extend((caps_hash, module, f) for f in parsed["features"])
+                deviations.extend((caps_hash, module, d) for d in parsed["deviations"])
+        self._db.execute(
+            "INSERT INTO capability_sets (caps_hash, raw) VALUES (?, ?)",
+            (caps_hash, "\n".join(capabilities)),
+        )
+        self._db.executemany("INSERT INTO protocol_caps VALUES (?, ?, ?)", protocol)
+        self._db.executemany("INSERT INTO modules VALUES (?, ?, ?, ?)", modules)
+        self._db.executemany("INSERT INTO features VALUES (?, ?, ?)", features)
+        self._db.executemany("INSERT INTO deviations VALUES (?, ?, ?)", deviations)
+
+    def forget(self, host):
+        with self._lock, self._db:
+            previous = self._db.execute("SELECT caps_hash FROM devices WHERE host = ?", (host,)).fetchone()
+            self._db.execute("DELETE FROM devices WHERE host = ?", (host,))
+            if previous:
+                self._drop_unused_set(previous[0])
+
+    # ---- reads ----
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._db.execute(sql, params).fetchall()
+
+    def _fresh_after(self, max_age=None):
+        return time.time() - (self.ttl if max_age is None else max_age)
+
+    def is_fresh(self, host, max_age=None):
+        rows = self._query(
+            "SELECT 1 FROM devices WHERE host = ? AND fetched_at >= ?",
+            (host, self._fresh_after(max_age)),
+        )
+        return bool(rows)
+
+    def get(self, host, max_age=None):
+        """Return the cached capability list of host, or None if missing or expired."""
+        rows = self._query(
+            "SELECT s.raw FROM devices d JOIN capability_sets s USING (caps_hash) "
+            "WHERE d.host = ? AND d.fetched_at >= ?",
+            (host, self._fresh_after(max_age)),
+        )
+        return rows[0][0].split("\n") if rows else None
+
+    def module_revision(self, host, module):
+        """Revision of module advertised by host ('' if none given), None if not supported/unknown."""
+        rows = self._query(
+            "SELECT m.revision FROM devices d JOIN modules m USING (caps_hash) "
+            "WHERE d.host = ? AND m.module = ? AND d.fetched_at >= ?",
+            (host, module, self._fresh_after()),
+        )
+        return (rows[0][0] or "") if rows else None
+
+    def supports(self, host, module, min_revision=None, feature=None):
+        """True/False for a fresh entry, None when host is not cached or expired."""
+        if not self.is_fresh(host):
+            return None
+        return host in self.devices_supporting(module, min_revision=min_revision, feature=feature, hosts=[host])
+
+    def has_capability(self, host, name):
+        """Protocol capability check, e.g. has_capability(host, ':xpath'). None if unknown."""
+        if not self.is_fresh(host):
+            return None
+        return host in self.devices_with_capability(name, hosts=[host])
+
+    def devices_supporting(self, module, min_revision=None, feature=None, hosts=None):
+        """Hosts whose fresh capabilities include module (revision >= min_revision, with feature)."""
+        sql = ("SELECT DISTINCT d.host FROM modules m JOIN devices d USING (caps_hash) "
+               "WHERE m.module = ? AND d.fetched_at >= ?")
+        params = [module, self._fresh_after()]
+        if min_revision:
+            # YANG revisions are YYYY-MM-DD, so string order is date order
+            sql += " AND m.revision >= ?"
+            params.append(min_revision)
+        if feature:
+            sql += (" AND EXISTS (SELECT 1 FROM features f WHERE f.caps_hash = m.caps_hash "
+                    "AND f.module = m.module AND f.feature = ?)")
+            params.append(feature)
+        if hosts is not None:
+            sql += f" AND d.host IN ({','.join('?' * len(hosts))})"
+            params.extend(hosts)
+        return sorted(row[0] for row in self._query(sql, params))
+
+    def devices_with_capability(self, name, hosts=None):
+        """Hosts advertising a protocol capability such as ':candidate' or ':xpath'."""
+        name = name if name.startswith(":") else f":{name}"
+        sql = ("SELECT DISTINCT d.host FROM protocol_caps p JOIN devices d USING (caps_hash) "
+               "WHERE p.name = ? AND d.fetched_at >= ?")
+        params = [name, self._fresh_after()]
+        if hosts is not None:
+            sql += f" AND d.host IN ({','.join('?' * len(hosts))})"
+            params.extend(hosts)
+        return sorted(row[0] for row in self._query(sql, params))
+
+    def deviations_for(self, host, module):
+        """Deviation modules host declares for module; None when host is not cached or expired."""
+        if not self.is_fresh(host):
+            return None
+        return [row[0] for row in self._query(
+            "SELECT v.deviation FROM devices d JOIN deviations v USING (caps_hash) "
+            "WHERE d.host = ? AND v.module = ?",
+            (host, module),
+        )]
+
+    def stale_hosts(self, hosts):
+        """The subset of hosts that must be (re)fetched."""
+        fresh = {row[0] for row in self._query(
+            "SELECT host FROM devices WHERE fetched_at >= ?", (self._fresh_after(),)
+        )}
+        return [host for host in hosts if host not in fresh]
+
+# -----------------------------
+# NETWORK HELPER
+# -----------------------------
+def get_capabilities_cached(dev, cache, refresh=False):
+    """Return capabilities for dev from cache, connecting only when missing or expired."""
+    if not refresh:
+        cached = cache.get(dev["host"])
+        if cached is not None:
+            return cached
+    from ncclient import manager
+
+    with manager.connect(
+        host=dev["host"],
+        port=int(dev.get("port", 830)),
+        username=dev["username"],
+        password=dev["password"],
+        hostkey_verify=False
+    ) as m:
+        capabilities = list(m.server_capabilities)
+    cache.store(dev["host"], capabilities)
+    return capabilities
+
+def import_capability_file(cache, path, host):
+    """Load a netconf_capabilities_<host>.txt dump (one capability per line) into the cache.
+
+    The entry is stamped with the import time, not the file's age, so it is trusted for a
+    TTL like a freshly fetched hello; re-import or refresh=True to replace it.
+    """
+    with open(path, "r", encoding="utf-8") as fh:
+        return cache.store(host, fh.read().splitlines())
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main(argv):
+    if len(argv) < 3:
+        print(USAGE)
+        return 2
+    cmd = argv[1]
+    with CapabilityCache() as cache:
+        started = time.perf_counter()
+        if cmd == "import" and len(argv) >= 4:
+            print(import_capability_file(cache, argv[2], argv[3]))
+            return 0
+        elif cmd == "module":
+            hosts = cache.devices_supporting(argv[2], min_revision=argv[3] if len(argv) > 3 else None)
+        elif cmd == "capability":
+            hosts = cache.devices_with_capability(argv[2])
+        elif cmd == "show":
+            caps = cache.get(argv[2])
+            hosts = caps or []
+        else:
+            print(USAGE)
+            return 2
+        elapsed = (time.perf_counter() - started) * 1000
+        for host in hosts:
+            print(host)
+        print(f"{len(hosts)} result(s) in {elapsed:.2f} ms")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv))
@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 """ Get the capabilities of a remote device with NETCONF """
 
+import sys
+
 from ncclient import manager
+from capability_cache import CapabilityCache, CACHE_PATH
 
 NXOS_HOST = "192.168.150.201"
 NETCONF_PORT = "830"
@@ -10,33 +13,46 @@ PASSWORD = "admin"
 # create a get_capabilities() method
 
 
-def get_capabilities(save_path=f'netconf_capabilities_{NXOS_HOST}.txt'):
+def get_capabilities(save_path=f'netconf_capabilities_{NXOS_HOST}.txt', cache_path=CACHE_PATH, refresh=False):
     """
     Method that prints NETCONF capabilities of remote device and saves them to a file.
+    Capabilities are also stored in the capability cache; while the cached entry is
+    fresh the device is not contacted again unless refresh=True.
     """
-    with manager.connect(
-        host=NXOS_HOST,
-        port=int(NETCONF_PORT),
-        username=USERNAME,
-        password=PASSWORD,
-        hostkey_verify=False
-    ) as device:
-
-        # print all NETCONF capabilities
-        print('\n***NETCONF Capabilities for device {}***\n'.format(NXOS_HOST))
-        capabilities = []
-        for capability in device.server_capabilities:
-            print(capability)
-            capabilities.append(capability)
-
-        # save capabilities to file
-        if save_path:
-            with open(save_path, 'w', encoding='utf-8') as fh:
-                for cap in capabilities:
-                    fh.write(cap.rstrip() + '\n')
-            print('\nCapabilities saved to: {}'.format(save_path))
-        
+    with CapabilityCache(cache_path) as cache:
+        capabilities = None if refresh else cache.get(NXOS_HOST)
+        if capabilities is not None:
+            print('\n***NETCONF Capabilities for device {} (cached)***\n'.format(NXOS_HOST))
+            for capability in capabilities:
+                print(capability)
+            return capabilities
+
+        with manager.connect(
+            host=NXOS_HOST,
+            port=int(NETCONF_PORT),
+            username=USERNAME,
+            password=PASSWORD,
+            hostkey_verify=False
+        ) as device:
+
+            # print all NETCONF capabilities
+            print('\n***NETCONF Capabilities for device {}***\n'.format(NXOS_HOST))
+            capabilities = []
+            for capability in device.server_capabilities:
+                print(capability)
+                capabilities.append(capability)
+
+        # index capabilities for later "does device X support module Y" lookups
+        cache.store(NXOS_HOST, capabilities)
+
+    # save capabilities to file
+    if save_path:
+        with open(save_path, 'w', encoding='utf-8') as fh:
+            for cap in capabilities:
+                fh.write(cap.rstrip() + '\n')
+        print('\nCapabilities saved to: {}'.format(save_path))
+    return capabilities
 
 
 if __name__ == '__main__':
-    get_capabilities()
\ No newline at end of file
+    get_capabilities(refresh='--refresh' in sys.argv)
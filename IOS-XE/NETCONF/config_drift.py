@@ -0,0 +1,566 @@
+### Fleet-wide config drift detection for the Cisco-IOS-XE-native running config
+### Merkle-style hash per config subtree; only changed branches are re-fetched and diffed.
+#
+#   python config_drift.py baseline            # save current running configs as intended state
+#   python config_drift.py check               # full get_config of every device, diff against baseline
+#   python config_drift.py watch [interval]    # follow netconf-config-change, re-fetch dirty branches
+#
+# Every element of <native> becomes a node keyed by its path, e.g.
+#     native/interface/GigabitEthernet[name=2]/description
+# List entries are keyed by their key leaf (name, id, ...), leaf-list entries by value;
+# a "/" inside a key (GigabitEthernet[name=1/0/1]) stays part of its segment (split_path).
+# A leaf hashes its value, an inner node hashes the (sorted) hashes of its children,
+# so two trees with the same root hash are identical and diff_trees() only descends
+# into branches whose hashes differ.
+#
+# The tree of every device is kept in STATE_DIR. After the first full get_config,
+# "watch" re-fetches only the branches named in netconf-config-change notifications
+# (subtree filter down to FETCH_DEPTH, e.g. one GigabitEthernet) and re-hashes just
+# that branch and its ancestors. Changes that produce no notification (some CLI
+# paths) are caught by the full resync every FULL_SYNC_INTERVAL.
+
+import hashlib
+import json
+import queue
+import re
+import sys
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from xml.sax.saxutils import escape, quoteattr
+
+from ncclient import manager
+from ncclient.transport.session import NotificationHandler, SessionListener
+
+from device_info import devices
+from netconf_session_pool import NetconfSessionPool
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+BASE_DIR = Path(__file__).resolve().parent
+BASELINE_DIR = BASE_DIR / "drift_baselines"     # intended state: <host>.xml (<native> subtree)
+STATE_DIR = BASE_DIR / "drift_state"            # last seen tree per device: <host>.json
+FETCH_DEPTH = 3                 # native/interface/GigabitEthernet[name=2] is re-fetched as a whole
+FULL_SYNC_INTERVAL = 3600       # seconds between full get_config resyncs in watch mode
+WATCH_INTERVAL = 10             # seconds between dirty-branch refreshes in watch mode
+MAX_WORKERS = 20
+
+XE_NS = "http://cisco.com/ns/yang/Cisco-IOS-XE-native"
+NC_NOTIF_NS = "urn:ietf:params:xml:ns:yang:ietf-netconf-notifications"
+NOTIF_NS = "urn:ietf:params:xml:ns:netconf:notification:1.0"
+ROOT = "native"
+
+# first-child leaves that identify a list entry
+KEY_LEAVES = ("name", "id", "number", "vlan-id", "seq", "sequence", "index", "first", "process-id", "prefix")
+
+NATIVE_FILTER = f'<filter><native xmlns="{XE_NS}"/></filter>'
+CONFIG_CHANGE_FILTER = f'<netconf-config-change xmlns="{NC_NOTIF_NS}"/>'
+
+_SEGMENT = re.compile(r"^([^\[]+)(?:\[([^=\]]+)=(.*)\])?$")
+# one path segment: a "/" inside [key=value] (GigabitEthernet[name=1/0/1]) does not split
+_PATH_SEGMENT = re.compile(r"(?:[^/\[]+|\[[^\]]*\])+")
+
+
+def _split(tag):
+    if tag.startswith("{"):
+        ns, local = tag[1:].split("}", 1)
+        return ns, local
+    return "", tag
+
+def _digest(*parts):
+    h = hashlib.blake2b(digest_size=12)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def parse_segment(segment):
+    """'GigabitEthernet[name=2]' -> ('GigabitEthernet', 'name', '2'); no key -> (tag, None, None)."""
+    m = _SEGMENT.match(segment)
+    return m.group(1), m.group(2), m.group(3)
+
+def split_path(path):
+    """'native/interface/GigabitEthernet[name=1/0/1]' -> ['native', 'interface', 'GigabitEthernet[name=1/0/1]']."""
+    return _PATH_SEGMENT.findall(path)
+
+def last_segment(path):
+    return split_path(path)[-1]
+
+def parent_of(path):
+    segments = split_path(path)
+    return "/".join(segments[:-1]) if len(segments) > 1 else None
+
+
+# -----------------------------
+# HASHED CONFIG TREE
+# -----------------------------
+class ConfigTree:
+    """Flat path -> node map of a <native> config with a Merkle hash per node.
+
+    node = {"ns": namespace, "hash": hex digest, "value": leaf text or None,
+            "children": [child paths]}
+    """
+
+    def __init__(self, nodes=None):
+        self.nodes = nodes or {}
+
+    @property
+    def root_hash(self):
+        root = self.nodes.get(ROOT)
+        return root["hash"] if root else None
+
+    # building
+    @classmethod
+    def from_xml(cls, xml_text):
+        """Tree from a get_config reply or a bare <native> document."""
+        tree = cls()
+        native = find_native(ET.fromstring(xml_text))
+        if native is not None:
+            tree._add(native, None)
+        return tree
+
+    @staticmethod
+    def _segments(children):
+        """Path segment for every child: keyed list entries, value-keyed leaf-lists, #n otherwise."""
+        counts = {}
+        for child in children:
+            counts[child.tag] = counts.get(child.tag, 0) + 1
+        seen = {}
+        result = []
+        for child in children:
+            _, tag = _split(child.tag)
+            first = child[0] if len(child) else None
+            if first is not None and len(first) == 0 and _split(first.tag)[1] in KEY_LEAVES:
+                segment = f"{tag}[{_split(first.tag)[1]}={(first.text or '').strip()}]"
+            elif counts[child.tag] > 1 and len(child) == 0:
+                segment = f"{tag}[.={(child.text or '').strip()}]"
+            elif counts[child.tag] > 1:
+                seen[child.tag] = seen.get(child.tag, 0) + 1
+                segment = f"{tag}[#={seen[child.tag]}]"
+            else:
+                segment = tag
+            result.append((child, segment))
+        return result
+
+    def _add(self, elem, parent_path, segment=ROOT):
+        ns, tag = _split(elem.tag)
+        path = f"{parent_path}/{segment}" if parent_path else segment
+        if len(elem) == 0:
+            value = (elem.text or "").strip()
+            node = {"ns": ns, "hash": _digest("L", ns, segment, value), "value": value, "children": []}
+        else:
+            children = [self._add(child, path, seg) for child, seg in self._segments(elem)]
+            node = {"ns": ns, "hash": None, "value": None, "children": children}
+        self.nodes[path] = node
+        if node["hash"] is None:
+            self._rehash(path)
+        return path
+
+    def _rehash(self, path):
+        node = self.nodes[path]
+        if node["value"] is not None:
+            return
+        parts = sorted(f"{last_segment(c)}={self.nodes[c]['hash']}" for c in node["children"])
+        node["hash"] = _digest("C", node["ns"], last_segment(path), *parts)
+
+    # incremental update
+    def _remove(self, path):
+        node = self.nodes.pop(path, None)
+        if node:
+            for child in node["children"]:
+                self._remove(child)
+
+    def replace_branch(self, path, elems):
+        """Swap the subtree at path for the fetched elems ([] = branch deleted); re-hash up to the root.
+
+        The segments are rebuilt from elems as a full build would, so a branch fetched by its
+        schema path (native/ip/domain) replaces the keyed entry already in the tree
+        (native/ip/domain[name=lab.local]) instead of ending up next to it. A path whose last
+        segment has no list key stands for every sibling with that tag.
+        """
+        parent = parent_of(path)
+        if parent is None:
+            self.nodes = {}
+            if elems:
+                self._add(elems[0], None)
+            return
+        if parent not in self.nodes:
+            raise KeyError(f"parent of {path} is not in the tree")
+        tag, key, _ = parse_segment(last_segment(path))
+        whole_tag = key in (None, ".", "#")
+        new = self._segments(elems)
+        new_segments = {segment for _, segment in new}
+        siblings = self.nodes[parent]["children"]
+        for child in [c for c in siblings if c == path or last_segment(c) in new_segments
+                      or (whole_tag and parse_segment(last_segment(c))[0] == tag)]:
+            self._remove(child)
+            siblings.remove(child)
+        for elem, segment in new:
+            siblings.append(self._add(elem, parent, segment))
+        node_path = parent
+        while node_path is not None:
+            self._rehash(node_path)
+            node_path = parent_of(node_path)
+
+    # reading
+    def leaves(self, path):
+        """(path, value) of every leaf at or below path."""
+        node = self.nodes.get(path)
+        if node is None:
+            return
+        if not node["children"]:
+            yield path, node["value"]
+            return
+        for child in node["children"]:
+            yield from self.leaves(child)
+
+    # persistence
+    def to_json(self):
+        return json.dumps(self.nodes, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls(json.loads(text))
+
+
+def find_native(root):
+    if _split(root.tag)[1] == ROOT:
+        return root
+    for elem in root.iter():
+        if _split(elem.tag)[1] == ROOT:
+            return elem
+    return None
+
+def find_entries(elem, segment):
+    """Children of elem selected by one path segment; without a list key, every child with its tag."""
+    tag, key, value = parse_segment(segment)
+    children = [child for child in elem if _split(child.tag)[1] == tag]
+    if key is None or key == "#":
+        return children
+    if key == ".":
+        return [child for child in children if (child.text or "").strip() == value]
+    return [
+        child for child in children
+        if len(child) and _split(child[0].tag)[1] == key and (child[0].text or "").strip() == value
+    ]
+
+def find_branch(native, path):
+    """Element at path (as built by ConfigTree) inside a <native> element, or None."""
+    elem = native
+    for segment in split_path(path)[1:]:
+        _, key, value = parse_segment(segment)
+        found = find_entries(elem, segment)
+        if key == "#":
+            found = found[int(value) - 1:int(value)]
+        if not found:
+            return None
+        elem = found[0]
+    return elem
+
+
+# -----------------------------
+# DIFF
+# -----------------------------
+def diff_trees(intended, actual, path=ROOT, ignore=()):
+    """Structured diffs: [{"path", "op": added|removed|changed, "intended", "actual"}].
+
+    Only branches whose hashes differ are visited.
+    """
+    if any(path == p or path.startswith(p + "/") for p in ignore):
+        return []
+    want = intended.nodes.get(path)
+    have = actual.nodes.get(path)
+    if want is not None and have is not None and want["hash"] == have["hash"]:
+        return []
+    if have is None:
+        return [{"path": p, "op": "removed", "intended": v, "actual": None} for p, v in intended.leaves(path)]
+    if want is None:
+        return [{"path": p, "op": "added", "intended": None, "actual": v} for p, v in actual.leaves(path)]
+    if not want["children"] or not have["children"]:
+        return [{"path": path, "op": "changed", "intended": want["value"], "actual": have["value"]}]
+    diffs = []
+    children = list(dict.fromkeys(want["children"] + have["children"]))
+    for child in sorted(children):
+        diffs.extend(diff_trees(intended, actual, child, ignore))
+    return diffs
+
+
+# -----------------------------
+# TARGETED FETCH
+# -----------------------------
+def fetch_path(path, depth=FETCH_DEPTH):
+    """The branch that is re-fetched for a change at path."""
+    return "/".join(split_path(path)[:depth])
+
+def branch_filter(tree, path):
+    """Subtree filter selecting exactly the branch at path (keys become content matches)."""
+    segments = split_path(path)
+    xml = ""
+    for i in range(len(segments) - 1, -1, -1):
+        tag, key, value = parse_segment(segments[i])
+        node = tree.nodes.get("/".join(segments[:i + 1])) if tree else None
+        ns = node["ns"] if node else (XE_NS if i == 0 else None)
+        xmlns = f" xmlns={quoteattr(ns)}" if ns and (i == 0 or ns != XE_NS) else ""
+        if key == ".":
+            content = escape(value)              # leaf-list entry: content match
+        elif key and key != "#":
+            content = f"<{key}>{escape(value)}</{key}>"    # list entry: key content match
+        else:
+            content = ""                          # #n entries cannot be selected alone
+        # the innermost element has no children in the filter, so the whole branch is returned
+        xml = f"<{tag}{xmlns}>{content}{xml}</{tag}>" if content or xml else f"<{tag}{xmlns}/>"
+    return f"<filter>{xml}</filter>"
+
+def target_to_path(target):
+    """netconf-config-change target XPath -> tree path.
+
+    /ios:native/ios:interface/ios:GigabitEthernet[ios:name='2'] -> native/interface/GigabitEthernet[name=2]
+    """
+    segments = []
+    for part in re.findall(r"[^/\[]+(?:\[[^\]]*\])*", target):
+        m = re.match(r"(?:[\w.-]+:)?([\w.-]+)(?:\[(?:[\w.-]+:)?([\w.-]+)\s*=\s*['\"]?([^'\"\]]*)['\"]?\])?", part)
+        if not m:
+            continue
+        tag, key, value = m.groups()
+        segments.append(f"{tag}[{key}={value}]" if key else tag)
+    return "/".join(segments)
+
+
+# -----------------------------
+# DRIFT MONITOR
+# -----------------------------
+class DriftMonitor:
+    """Keeps the hashed running-config tree of every device and diffs it against its baseline."""
+
+    def __init__(self, pool=None, state_dir=STATE_DIR, baseline_dir=BASELINE_DIR, ignore=()):
+        self.pool = pool or NetconfSessionPool(max_sessions_per_device=1)
+        self.state_dir = Path(state_dir)
+        self.baseline_dir = Path(baseline_dir)
+        self.ignore = tuple(ignore)
+        self.trees = {}               # host -> ConfigTree
+        self.synced_at = {}           # host -> time of the last full sync
+        self._baselines = {}          # host -> (mtime, ConfigTree)
+
+    # state
+    def tree(self, host):
+        if host not in self.trees:
+            path = self.state_dir / f"{host}.json"
+            if path.exists():
+                self.trees[host] = ConfigTree.from_json(path.read_text(encoding="utf-8"))
+        return self.trees.get(host)
+
+    def save(self, host):
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        (self.state_dir / f"{host}.json").write_text(self.trees[host].to_json(), encoding="utf-8")
+
+    def baseline(self, host):
+        path = self.baseline_dir / f"{host}.xml"
+        if not path.exists():
+            return None
+        mtime = path.stat().st_mtime
+        cached = self._baselines.get(host)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, ConfigTree.from_xml(path.read_text(encoding="utf-8")))
+            self._baselines[host] = cached
+        return cached[1]
+
+    # fetching
+    def full_sync(self, dev):
+        """get_config of the whole <native> tree; returns the new tree."""
+        with self.pool.session(dev) as m:
+            reply = m.get_config(source="running", filter=NATIVE_FILTER)
+        tree = ConfigTree.from_xml(reply.xml)
+        self.trees[dev["host"]] = tree
+        self.synced_at[dev["host"]] = time.time()
+        self.save(dev["host"])
+        return tree
+
+    def refresh(self, dev, changed_paths):
+        """Re-fetch only the branches containing changed_paths; returns the branches fetched."""
+        tree = self.tree(dev["host"])
+        if tree is None or not tree.nodes:
+            self.full_sync(dev)
+            return [ROOT]
+        branches = set()
+        for path in changed_paths:
+            branch = fetch_path(path)
+            # a new container: fetch from the deepest ancestor we already know
+            while parent_of(branch) and parent_of(branch) not in tree.nodes:
+                branch = parent_of(branch)
+            tag, key, _ = parse_segment(last_segment(branch))
+            if key in (".", "#") and parent_of(branch):
+                # leaf-list values and unkeyed entries are only fetched all together
+                branch = f"{parent_of(branch)}/{tag}"
+            branches.add(branch)
+        # a branch inside another fetched branch is already covered
+        branches = sorted(b for b in branches if not any(b.startswith(o + "/") for o in branches))
+        with self.pool.session(dev) as m:
+            for branch in branches:
+                reply = m.get_config(source="running", filter=branch_filter(tree, branch))
+                native = find_native(ET.fromstring(reply.xml))
+                parent = find_branch(native, parent_of(branch) or ROOT) if native is not None else None
+                if parent is None:
+                    elems = []
+                elif parent_of(branch) is None:
+                    elems = [parent]
+                else:
+                    elems = find_entries(parent, last_segment(branch))
+                tree.replace_branch(branch, elems)
+        self.save(dev["host"])
+        return branches
+
+    def diff(self, host):
+        """Diffs of the current tree of host against its baseline; None if there is no baseline."""
+        baseline = self.baseline(host)
+        tree = self.tree(host)
+        if baseline is None or tree is None:
+            return None
+        return diff_trees(baseline, tree, ignore=self.ignore)
+
+    def check(self, dev, full=True):
+        """Full sync (or the stored tree with full=False) and diff against the baseline."""
+        if full or self.tree(dev["host"]) is None:
+            self.full_sync(dev)
+        return self.diff(dev["host"])
+
+    def save_baseline(self, dev):
+        """Store the current running <native> config as the intended state of dev."""
+        with self.pool.session(dev) as m:
+            reply = m.get_config(source="running", filter=NATIVE_FILTER)
+        native = find_native(ET.fromstring(reply.xml))
+        self.baseline_dir.mkdir(parents=True, exist_ok=True)
+        path = self.baseline_dir / f"{dev['host']}.xml"
+        path.write_text(ET.tostring(native, encoding="unicode"), encoding="utf-8")
+        return path
+
+
+class ConfigChangeListener(SessionListener):
+    """Collects the targets of netconf-config-change notifications as tree paths."""
+
+    def __init__(self, host, changes):
+        self.host = host
+        self.changes = changes
+
+    def callback(self, root, raw):
+        tag, _ = root
+        if tag != f"{{{NOTIF_NS}}}notification" or "netconf-config-change" not in raw:
+            return
+        for elem in ET.fromstring(raw).iter(f"{{{NC_NOTIF_NS}}}target"):
+            path = target_to_path((elem.text or "").strip())
+            if path.startswith(ROOT):
+                self.changes.put((self.host, path))
+
+    def errback(self, ex):
+        pass
+
+
+def subscribe_config_changes(dev, changes, timeout=30):
+    """Dedicated session with an RFC 5277 subscription to netconf-config-change."""
+    m = manager.connect(
+        host=dev["host"],
+        port=int(dev.get("port", 830)),
+        username=dev["username"],
+        password=dev["password"],
+        hostkey_verify=False,
+        timeout=timeout
+    )
+    default = m._session.get_listener_instance(NotificationHandler)
+    if default is not None:
+        m._session.remove_listener(default)    # nobody calls take_notification() on this session
+    m._session.add_listener(ConfigChangeListener(dev["host"], changes))
+    m.create_subscription(filter=("subtree", CONFIG_CHANGE_FILTER))
+    return m
+
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def print_diffs(host, diffs):
+    if diffs is None:
+        print(f"[SKIP] {host}: no baseline in {BASELINE_DIR}")
+    elif not diffs:
+        print(f"[ OK ] {host}: no drift")
+    else:
+        print(f"[DRIFT] {host}: {len(diffs)} difference(s)")
+        for d in diffs:
+            print("   " + json.dumps(d))
+
+def run_all(device_list, func):
+    workers = max(1, min(MAX_WORKERS, len(device_list)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, dev): dev["host"] for dev in device_list}
+        for future, host in futures.items():
+            try:
+                yield host, future.result(), None
+            except Exception as e:
+                yield host, None, f"{type(e).__name__}: {e}"
+
+def watch(monitor, device_list, interval=WATCH_INTERVAL):
+    changes = queue.Queue()
+    sessions = []
+    by_host = {dev["host"]: dev for dev in device_list}
+    for host, _, error in run_all(device_list, lambda dev: monitor.check(dev, full=True)):
+        if error:
+            print(f"[FAIL] {host}: {error}")
+    for dev in device_list:
+        try:
+            sessions.append(subscribe_config_changes(dev, changes))
+        except Exception as e:
+            print(f"[WARN] {dev['host']}: no config-change notifications ({e}), full resync only")
+    try:
+        while True:
+            time.sleep(interval)
+            dirty = {}
+            while not changes.empty():
+                host, path = changes.get_nowait()
+                dirty.setdefault(host, set()).add(path)
+            now = time.time()
+            for host, dev in by_host.items():
+                try:
+                    if now - monitor.synced_at.get(host, 0) >= FULL_SYNC_INTERVAL:
+                        monitor.full_sync(dev)
+                    elif host in dirty:
+                        monitor.refresh(dev, dirty[host])
+                    else:
+                        continue
+                    diffs = monitor.diff(host)
+                except Exception as e:
+                    print(f"[FAIL] {host}: {type(e).__name__}: {e}")
+                    # the changes in dirty[host] are lost: resync the whole tree next round
+                    monitor.synced_at[host] = 0
+                    continue
+                print_diffs(host, diffs)
+    finally:
+        for m in sessions:
+            try:
+                m.close_session()
+            except Exception:
+                pass
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "check"
+    with NetconfSessionPool(max_sessions_per_device=1) as pool:
+        monitor = DriftMonitor(pool)
+        if command == "baseline":
+            for host, path, error in run_all(devices, monitor.save_baseline):
+                print(f"[FAIL] {host}: {error}" if error else f"[ OK ] {host}: baseline saved to {path}")
+        elif command == "check":
+            for host, diffs, error in run_all(devices, monitor.check):
+                if error:
+                    print(f"[FAIL] {host}: {error}")
+                else:
+                    print_diffs(host, diffs)
+        elif command == "watch":
+            try:
+                watch(monitor, devices, float(argv[2]) if len(argv) > 2 else WATCH_INTERVAL)
+            except KeyboardInterrupt:
+                pass
+        else:
+            print("usage: config_drift.py baseline | check | watch [interval]")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,176 @@
+### Build the smallest NETCONF filter for the leaves a collector actually reads
+### Used by netconf_capabilities_refined.py and netconf_fleet_collect.py instead of the
+### hand-written netconf-filter.xml (whole interfaces / interfaces-state subtrees).
+
+# A collector names its leaves as paths below the top container, and optionally the
+# interfaces it wants:
+#
+#     spec = compile_filter(["interfaces/interface/description",
+#                            "interfaces-state/interface/oper-status"],
+#                           interfaces=["GigabitEthernet1", "GigabitEthernet2"])
+#     reply = m.get(spec)
+#
+# The subtree form repeats one <interface> per wanted key, holding the key as a content
+# match and every leaf as an empty selection node, so the device walks and returns only
+# those leaves of those entries. Without interfaces every entry is returned, still with
+# only the named leaves (plus <name>, so the records keep their key). The XPath form
+# names the entries once per parent node:
+#     /if:interfaces-state/if:interface[if:name='Gi1' or if:name='Gi2']/*[self::if:name or self::if:oper-status]
+# It is used only for devices whose cached hello (capability_cache.py) lists :xpath.
+# Compiled filters are cached per (leaves, interfaces, form), in any order of either.
+# Pass config leaves only to get_config; state leaves simply return nothing there.
+
+import re
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+IF_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+
+# top container -> (prefix, namespace); the first segment of every leaf path
+TOP_CONTAINERS = {
+    "interfaces": ("if", IF_NS),
+    "interfaces-state": ("if", IF_NS),
+}
+# list node -> key leaf
+LIST_KEYS = {"interface": "name"}
+
+# what netconf_capabilities_refined.py prints (format_interface_record)
+INTERFACE_LEAVES = (
+    "interfaces/interface/description",
+    "interfaces-state/interface/admin-status",
+    "interfaces-state/interface/oper-status",
+    "interfaces-state/interface/last-change",
+    "interfaces-state/interface/phys-address",
+    "interfaces-state/interface/speed",
+    "interfaces-state/interface/statistics/in-unicast-pkts",
+)
+CACHE_SIZE = 256
+
+_NODE_NAME = re.compile(r"^[A-Za-z_][\w.-]*$")
+
+
+class FilterError(Exception):
+    """A leaf path or interface key that cannot be put into a filter."""
+
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def _leaf_tree(leaves):
+    """{top: {child: {...}}} from the leaf paths, in first-seen order."""
+    tree = {}
+    for leaf in leaves:
+        node = tree
+        for segment in leaf.split("/"):
+            node = node.setdefault(segment, {})
+    return tree
+
+def _xpath_literal(value):
+    if "'" not in value:
+        return f"'{value}'"
+    if '"' not in value:
+        return f'"{value}"'
+    raise FilterError(f"interface key {value!r} has both quote characters")
+
+def normalize_leaves(leaves):
+    """De-duplicated tuple of checked leaf paths, sorted in TOP_CONTAINERS order."""
+    if isinstance(leaves, str):
+        leaves = [leaves]
+    checked = set()
+    for leaf in leaves:
+        segments = leaf.strip().strip("/").split("/")
+        if segments[0] not in TOP_CONTAINERS:
+            raise FilterError(f"{leaf}: unknown top container {segments[0]!r} "
+                              f"(known: {', '.join(sorted(TOP_CONTAINERS))})")
+        if len(segments) < 2 or not all(_NODE_NAME.match(s) for s in segments):
+            raise FilterError(f"{leaf}: not a leaf path like interfaces/interface/description")
+        checked.add("/".join(segments))
+    if not checked:
+        raise FilterError("no leaves given")
+    # config before state, as the device sends them (interface_stream_parser.py relies on it)
+    order = list(TOP_CONTAINERS)
+    return tuple(sorted(checked, key=lambda leaf: (order.index(leaf.split("/", 1)[0]), leaf)))
+
+def normalize_keys(interfaces):
+    """None (every entry) or a sorted, de-duplicated tuple of interface names."""
+    if interfaces is None:
+        return None
+    if isinstance(interfaces, str):
+        interfaces = [interfaces]
+    keys = tuple(sorted({str(name).strip() for name in interfaces if str(name).strip()}))
+    if not keys:
+        raise FilterError("empty interface list (pass None for every interface)")
+    return keys
+
+# -----------------------------
+# COMPILERS
+# -----------------------------
+def _subtree_nodes(tree, keys):
+    xml = ""
+    for tag, children in tree.items():
+        key = LIST_KEYS.get(tag)
+        if key is None:
+            inner = _subtree_nodes(children, keys)
+            xml += f"<{tag}>{inner}</{tag}>" if inner else f"<{tag}/>"
+            continue
+        inner = _subtree_nodes({k: v for k, v in children.items() if k != key}, keys)
+        if keys is None:
+            xml += f"<{tag}><{key}/>{inner}</{tag}>"
+        else:
+            xml += "".join(f"<{tag}><{key}>{escape(value)}</{key}>{inner}</{tag}>" for value in keys)
+    return xml
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_subtree(leaves, keys=None):
+    """<filter> string for normalized leaves and keys (see normalize_*)."""
+    xml = ""
+    for top, children in _leaf_tree(leaves).items():
+        xml += f'<{top} xmlns="{TOP_CONTAINERS[top][1]}">{_subtree_nodes(children, keys)}</{top}>'
+    return f"<filter>{xml}</filter>"
+
+def _xpath_paths(tree, prefix, base, keys):
+    """Location paths for tree below base; sibling leaves share one *[self::a or self::b] step."""
+    leaves = [tag for tag, children in tree.items() if not children]
+    paths = []
+    if len(leaves) == 1:
+        paths.append(f"{base}/{prefix}:{leaves[0]}")
+    elif leaves:
+        paths.append(f"{base}/*[{' or '.join(f'self::{prefix}:{tag}' for tag in leaves)}]")
+    for tag, children in tree.items():
+        if not children:
+            continue
+        step = f"{base}/{prefix}:{tag}"
+        key = LIST_KEYS.get(tag)
+        if key is not None:
+            if keys is not None:
+                step += f"[{' or '.join(f'{prefix}:{key}={_xpath_literal(value)}' for value in keys)}]"
+            children = {key: {}, **{k: v for k, v in children.items() if k != key}}
+        paths.extend(_xpath_paths(children, prefix, step, keys))
+    return paths
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_xpath(leaves, keys=None):
+    """("xpath", (namespaces, select)) for normalized leaves and keys, as ncclient takes it."""
+    namespaces = {}
+    paths = []
+    for top, children in _leaf_tree(leaves).items():
+        prefix, namespace = TOP_CONTAINERS[top]
+        namespaces[prefix] = namespace
+        paths.extend(_xpath_paths(children, prefix, f"/{prefix}:{top}", keys))
+    return "xpath", (namespaces, " | ".join(paths))
+
+def compile_filter(leaves=INTERFACE_LEAVES, interfaces=None, xpath=False):
+    """Filter for m.get() / m.get_config(filter=...) selecting leaves of interfaces (None: all)."""
+    leaves, keys = normalize_leaves(leaves), normalize_keys(interfaces)
+    return compile_xpath(leaves, keys) if xpath else compile_subtree(leaves, keys)
+
+def filter_for(host, cache=None, leaves=INTERFACE_LEAVES, interfaces=None):
+    """compile_filter in XPath form when the capability cache says host supports :xpath."""
+    xpath = bool(cache is not None and cache.has_capability(host, ":xpath"))
+    return compile_filter(leaves, interfaces, xpath=xpath)
+
+def cache_info():
+    return {"subtree": compile_subtree.cache_info(), "xpath": compile_xpath.cache_info()}
@@ -0,0 +1,299 @@
+### Roll interface description / IP changes out to many IOS-XE devices in canary-then-wave batches
+### The per-interface work is apply_interface_change (interface_edit.py): pre-check, shut /
+### modify / no shut, rollback on failure and the management interface guard.
+#
+#   python interface_change_waves.py plan.csv [--inventory fleet.json] [--dry-run]
+#
+# The plan is a CSV (or a JSON list) with one row per interface:
+#     host,iface_id,interface_desc,ip_address,subnet_mask
+#     10.0.0.1,2,uplink-core-1,10.1.0.1,255.255.255.252
+# host is looked up in the fleet inventory (Fleet/inventory.py), by host or device name.
+#
+# The whole plan is validated first (templates render, no management interface, no
+# interface listed twice), so a typo in row 1999 does not stop the rollout halfway.
+# Devices are then changed in waves: the canary devices alone, then waves that grow by
+# GROWTH up to MAX_WAVE devices. Inside a wave every device runs in its own worker with
+# one NETCONF session, and its interfaces are changed one after the other; after its
+# first failed interface the rest of that device is left alone. A wave takes as long
+# as its slowest device, not the sum of all of them.
+#
+# Any canary failure stops the rollout. After that, once more devices have failed than
+# --max-failures allows (a fraction of the plan's devices, or a count), devices not yet
+# started are skipped and no further wave starts; devices already running finish (an
+# interrupted device would be left shut).
+#
+# --output quiet (the default) prints one line per device and shows an edit-config reply
+# only when it is not <ok/>; pretty also prints every reply, ndjson writes one JSON
+# record per reply, device and wave instead (Fleet/reply_output.py).
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from interface_edit import (MANAGEMENT_IFACE, ManagementInterfaceError, apply_interface_changes, check_not_management,
+                            render_change)
+from netconf_session_pool import NetconfSessionPool
+from xml_templates import TemplateError
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from inventory import Inventory, InventoryError
+import reply_output
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+CANARY = 1                # devices in the first wave
+GROWTH = 4                # each following wave is this many times the previous one ...
+MAX_WAVE = 100            # ... up to this many devices
+MAX_WORKERS = 50          # devices changed at the same time
+MAX_FAILURES = 0.05       # failed devices tolerated: fraction of the plan (< 1) or a count
+WAVE_PAUSE = 0            # seconds to wait between waves (time to watch the canary)
+
+PLAN_FIELDS = ("host", "iface_id", "interface_desc", "ip_address", "subnet_mask")
+
+
+class PlanError(Exception):
+    """The change plan is unreadable or would change something it must not."""
+
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def load_plan(path):
+    """Change rows from a CSV file or a JSON list (or {"changes": [...]})."""
+    path = Path(path)
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as fh:
+            if path.suffix.lower() == ".csv":
+                rows = list(csv.DictReader(fh))
+            else:
+                rows = json.load(fh)
+    except (OSError, ValueError) as e:
+        raise PlanError(f"{path}: {e}") from None
+    if isinstance(rows, dict):
+        rows = rows.get("changes")
+    if not isinstance(rows, list):
+        raise PlanError(f"{path}: expected a list of changes")
+    changes = []
+    for number, row in enumerate(rows, 1):
+        missing = [field for field in PLAN_FIELDS if not isinstance(row, dict) or row.get(field) in (None, "")]
+        if missing:
+            raise PlanError(f"{path} row {number}: missing {', '.join(missing)}")
+        changes.append({field: str(row[field]).strip() for field in PLAN_FIELDS})
+    return changes
+
+def validate_plan(changes, management_iface=MANAGEMENT_IFACE):
+    """Render every change once and apply the guards before any device is touched."""
+    seen = set()
+    for change in changes:
+        where = f"{change['host']} Gi{change['iface_id']}"
+        if (change["host"], change["iface_id"]) in seen:
+            raise PlanError(f"{where} is listed more than once")
+        seen.add((change["host"], change["iface_id"]))
+        try:
+            check_not_management(change["iface_id"], management_iface)
+        except ManagementInterfaceError as e:
+            raise PlanError(f"{where}: {e}") from None
+        try:
+            render_change(change["iface_id"], change["interface_desc"], change["ip_address"], change["subnet_mask"])
+        except TemplateError as e:
+            raise PlanError(f"{where}: {e}") from None
+
+def group_by_device(changes):
+    """{host: [changes]} in plan order; a device's interfaces keep their plan order."""
+    grouped = OrderedDict()
+    for change in changes:
+        grouped.setdefault(change["host"], []).append(change)
+    return grouped
+
+def resolve_devices(hosts, inventory_path=None):
+    """{plan host: NETCONF device dict} for every host of the plan."""
+    try:
+        inventory = Inventory.load(inventory_path, protocol="netconf")
+        found = {}
+        for dev in inventory.select(protocol="netconf", hosts=hosts):
+            found.setdefault(dev.host, dev)
+            if dev.name:
+                found.setdefault(dev.name, dev)
+        missing = [host for host in hosts if host not in found]
+        if missing:
+            raise PlanError(f"not in the inventory (or without a netconf endpoint): {', '.join(missing[:10])}"
+                            + (f" and {len(missing) - 10} more" if len(missing) > 10 else ""))
+        return {host: inventory.device_dict(found[host], "netconf") for host in hosts}
+    except InventoryError as e:
+        raise PlanError(f"inventory: {e}") from None
+
+def wave_sizes(count, canary=CANARY, growth=GROWTH, max_wave=MAX_WAVE):
+    """Sizes of the waves for count devices: canary, canary*growth, ... capped at max_wave."""
+    sizes = []
+    size = max(1, canary)
+    while count > 0:
+        sizes.append(min(size, count, max_wave))
+        count -= sizes[-1]
+        size = min(max_wave, max(size + 1, size * growth))
+    return sizes
+
+def failure_budget(device_count, max_failures=MAX_FAILURES):
+    """Failed devices tolerated before the rollout stops."""
+    if max_failures < 1:
+        return int(device_count * max_failures)
+    return int(max_failures)
+
+def change_device(pool, dev, changes, rollback=True):
+    """Apply all changes of one device in order; returns its result record."""
+    started = time.monotonic()
+    results = apply_interface_changes(pool, dev, changes, rollback=rollback, stop_on_error=True)
+    failed = {iface: f"{type(r).__name__}: {r}" for iface, r in results.items() if isinstance(r, BaseException)}
+    return {
+        "host": dev["host"],
+        "status": "failed" if failed else "ok",
+        "changed": sum(1 for r in results.values() if r is True),
+        "unchanged": sum(1 for r in results.values() if r is False),
+        "failed": failed,
+        "not_attempted": [c["iface_id"] for c in changes if c["iface_id"] not in results],
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+
+# -----------------------------
+# ORCHESTRATION
+# -----------------------------
+def run_waves(plan, devices, pool, canary=CANARY, growth=GROWTH, max_wave=MAX_WAVE, max_workers=MAX_WORKERS,
+              max_failures=MAX_FAILURES, rollback=True, pause=WAVE_PAUSE, on_result=None):
+    """Change every device of plan ({host: [changes]}) wave by wave.
+
+    devices maps the plan hosts to device dicts. on_result(wave_number, record) is called
+    as each device finishes. Returns the report: waves, per-device records, stop reason.
+    """
+    hosts = list(plan)
+    budget = failure_budget(len(hosts), max_failures)
+    report = {"devices": len(hosts), "failure_budget": budget, "waves": [], "results": {}, "stopped": None}
+    failures = 0
+    position = 0
+    started = time.monotonic()
+
+    workers = max(1, min(max_workers, max_wave, len(hosts) or 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="wave") as executor:
+        for number, size in enumerate(wave_sizes(len(hosts), canary, growth, max_wave)):
+            if report["stopped"]:
+                break
+            if number and pause:
+                time.sleep(pause)
+            wave_hosts = hosts[position:position + size]
+            position += size
+            wave_started = time.monotonic()
+            futures = {executor.submit(change_device, pool, devices[host], plan[host], rollback): host
+                       for host in wave_hosts}
+            wave_failures = 0
+            for future in as_completed(futures):
+                host = futures[future]
+                if future.cancelled():
+                    continue
+                try:
+                    record = future.result()
+                except Exception as e:
+                    record = {"host": devices[host]["host"], "status": "failed",
+                              "failed": {"*": f"{type(e).__name__}: {e}"}}
+                report["results"][host] = record
+                if record["status"] == "failed":
+                    failures += 1
+                    wave_failures += 1
+                if on_result:
+                    on_result(number, record)
+                if report["stopped"] is None and (failures > budget or (number == 0 and wave_failures)):
+                    report["stopped"] = ("canary failed" if number == 0 else
+                                         f"{failures} failed devices exceed the budget of {budget}")
+                    for pending in futures:
+                        pending.cancel()
+            report["waves"].append({"wave": number, "devices": len(wave_hosts), "failed": wave_failures,
+                                    "elapsed": round(time.monotonic() - wave_started, 3)})
+
+    for host in hosts:
+        report["results"].setdefault(host, {"host": devices[host]["host"], "status": "skipped"})
+    report["elapsed"] = round(time.monotonic() - started, 3)
+    return report
+
+def print_result(wave, record):
+    if reply_output.mode() == "ndjson":
+        reply_output.record("device", wave=wave, **record)
+        return
+    label = "canary" if wave == 0 else f"wave {wave}"
+    if record["status"] == "ok":
+        print(f"[ OK ] {label} {record['host']}: {record['changed']} changed, "
+              f"{record['unchanged']} already in place ({record['elapsed']}s)")
+    else:
+        errors = "; ".join(f"Gi{iface}: {error}" for iface, error in record["failed"].items())
+        print(f"[FAIL] {label} {record['host']}: {errors}")
+
+def print_summary(report):
+    if reply_output.mode() == "ndjson":
+        for wave in report["waves"]:
+            reply_output.record("wave", **wave)
+        reply_output.record("summary", **{k: v for k, v in report.items() if k not in ("waves", "results")})
+        return
+    counts = {}
+    for record in report["results"].values():
+        counts[record["status"]] = counts.get(record["status"], 0) + 1
+    for wave in report["waves"]:
+        print(f"wave {wave['wave']}: {wave['devices']} devices, {wave['failed']} failed, {wave['elapsed']}s")
+    print(f"{report['devices']} devices: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+          + f" in {report['elapsed']}s")
+    if report["stopped"]:
+        print(f"Rollout stopped: {report['stopped']}")
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Canary-then-wave interface changes across the fleet")
+    parser.add_argument("plan", help="CSV or JSON change plan")
+    parser.add_argument("--inventory", help="fleet inventory file (default: Fleet inventory / device_info)")
+    parser.add_argument("--canary", type=int, default=CANARY)
+    parser.add_argument("--growth", type=int, default=GROWTH)
+    parser.add_argument("--max-wave", type=int, default=MAX_WAVE)
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--max-failures", type=float, default=MAX_FAILURES,
+                        help="failed devices tolerated: fraction of the plan (< 1) or a count")
+    parser.add_argument("--pause", type=float, default=WAVE_PAUSE, help="seconds between waves")
+    parser.add_argument("--no-rollback", action="store_true")
+    parser.add_argument("--dry-run", action="store_true", help="validate the plan and print the waves only")
+    parser.add_argument("--report", help="write the JSON report to this file")
+    parser.add_argument("--output", choices=reply_output.MODES, default="quiet",
+                        help="console output: quiet (default), pretty (every reply) or ndjson records")
+    return parser.parse_args(argv[1:])
+
+def main(argv):
+    args = parse_args(argv)
+    reply_output.set_mode(args.output)
+    try:
+        changes = load_plan(args.plan)
+        validate_plan(changes)
+        plan = group_by_device(changes)
+        devices = resolve_devices(list(plan), args.inventory)
+    except PlanError as e:
+        reply_output.message(f"Plan rejected: {e}")
+        return 2
+
+    sizes = wave_sizes(len(plan), args.canary, args.growth, args.max_wave)
+    reply_output.message(f"{len(changes)} interface change(s) on {len(plan)} device(s) in {len(sizes)} wave(s): "
+                         + " + ".join(str(size) for size in sizes), waves=sizes)
+    if args.dry_run:
+        return 0
+
+    with NetconfSessionPool(max_sessions_per_device=1) as pool:
+        report = run_waves(plan, devices, pool, args.canary, args.growth, args.max_wave, args.workers,
+                           args.max_failures, rollback=not args.no_rollback, pause=args.pause,
+                           on_result=print_result)
+    print_summary(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        reply_output.message(f"Report saved to {args.report}", path=args.report)
+    return 0 if not report["stopped"] and all(r["status"] == "ok" for r in report["results"].values()) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,265 @@
+### Interface counter poller: ietf-interfaces statistics for all interfaces, on a schedule
+### Samples go into fixed-size NumPy ring buffers; rates and percentiles are computed vectorized.
+#
+#   python interface_counter_poller.py [interval_seconds] [cycles]
+#
+# Memory: one row per (host, interface) series, capacity samples per row,
+# 9 bytes per counter (value + present flag) + 8 bytes timestamp per sample.
+# 100k series x 32 samples x 4 counters is about 140 MB, with no per-sample Python objects.
+# A counter missing from a reply is stored as absent, not 0: every rate that would
+# use it is NaN, and NaN rates are left out of the percentiles.
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from device_info import devices
+from interface_stream_parser import iter_interface_records
+from netconf_session_pool import NetconfSessionPool
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+POLL_INTERVAL = 30            # seconds between polls of the same device
+CAPACITY = 32                 # samples kept per series (ring buffer length)
+MAX_WORKERS = 20
+COUNTERS = ("in-octets", "in-unicast-pkts", "out-octets", "out-unicast-pkts")
+COUNTER_BITS = 64             # ietf-interfaces statistics are counter64
+
+# only names and statistics of every interface, nothing else
+STATISTICS_FILTER = """
+<filter>
+  <interfaces-state xmlns="urn:ietf:params:xml:ns:yang:ietf-interfaces">
+    <interface>
+      <name/>
+      <statistics/>
+    </interface>
+  </interfaces-state>
+</filter>
+"""
+
+
+class CounterStore:
+    """Ring buffers of counter samples for many (host, interface) series."""
+
+    def __init__(self, capacity=CAPACITY, counters=COUNTERS, counter_bits=COUNTER_BITS, initial_series=1024):
+        self.capacity = capacity
+        self.counters = tuple(counters)
+        self.counter_bits = counter_bits
+        self.epoch = time.time()
+        self.index = {}                                   # (host, interface) -> row
+        self.keys = []                                    # row -> (host, interface)
+        rows = initial_series
+        self.ts = np.full((rows, capacity), np.nan, dtype=np.float64)      # seconds since epoch
+        self.values = np.zeros((len(self.counters), rows, capacity), dtype=np.uint64)
+        self.present = np.zeros((len(self.counters), rows, capacity), dtype=bool)
+        self.pos = np.zeros(rows, dtype=np.int32)         # next slot to write
+        self.count = np.zeros(rows, dtype=np.int32)       # samples stored (<= capacity)
+
+    def __len__(self):
+        return len(self.keys)
+
+    # -----------------------------
+    # WRITES
+    # -----------------------------
+    def _grow(self, needed):
+        rows = self.ts.shape[0]
+        if needed <= rows:
+            return
+        new_rows = max(needed, rows * 2)
+        extra = new_rows - rows
+        self.ts = np.concatenate([self.ts, np.full((extra, self.capacity), np.nan, dtype=np.float64)])
+        self.values = np.concatenate(
+            [self.values, np.zeros((len(self.counters), extra, self.capacity), dtype=np.uint64)], axis=1)
+        self.present = np.concatenate(
+            [self.present, np.zeros((len(self.counters), extra, self.capacity), dtype=bool)], axis=1)
+        self.pos = np.concatenate([self.pos, np.zeros(extra, dtype=np.int32)])
+        self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int32)])
+
+    def rows_for(self, host, interfaces):
+        """Row numbers for the interfaces of host, creating series as needed."""
+        rows = np.empty(len(interfaces), dtype=np.int64)
+        for i, name in enumerate(interfaces):
+            key = (host, name)
+            row = self.index.get(key)
+            if row is None:
+                row = len(self.keys)
+                self.index[key] = row
+                self.keys.append(key)
+            rows[i] = row
+        self._grow(len(self.keys))
+        return rows
+
+    def add_samples(self, host, timestamp, interfaces, matrix, present=None):
+        """Store one poll of host: matrix[i][c] is counter c of interfaces[i].
+
+        present[i][c] False marks a counter the reply did not carry (its matrix value is ignored).
+        """
+        if not interfaces:
+            return
+        rows = self.rows_for(host, interfaces)
+        slots = self.pos[rows]
+        self.ts[rows, slots] = timestamp - self.epoch
+        self.values[:, rows, slots] = np.asarray(matrix, dtype=np.uint64).T
+        self.present[:, rows, slots] = True if present is None else np.asarray(present, dtype=bool).T
+        self.pos[rows] = (slots + 1) % self.capacity
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.capacity)
+
+    def add_records(self, host, timestamp, records):
+        """Store interface_stream_parser records; counters missing from a record are stored as absent."""
+        interfaces = []
+        matrix = []
+        present = []
+        for record in records:
+            counters = record.get("counters") or {}
+            if not counters:
+                continue
+            interfaces.append(record["name"])
+            row = [counters.get(c) for c in self.counters]
+            matrix.append([0 if v is None else v for v in row])
+            present.append([v is not None for v in row])
+        self.add_samples(host, timestamp, interfaces, matrix, present)
+
+    # -----------------------------
+    # READS
+    # -----------------------------
+    def _ordered(self, rows):
+        """Column indices that put each row's ring buffer oldest-first."""
+        rows = np.asarray(rows)
+        return (self.pos[rows][:, None] + np.arange(self.capacity)[None, :]) % self.capacity
+
+    def _deltas(self, prev, last, known):
+        """Counter deltas with wrap handling; counter resets and unknown samples (known False) become NaN."""
+        modulus = 2 ** self.counter_bits
+        plausible = np.float64(modulus) / 4   # a real wrap never moves more than this per interval
+        diff = (last - prev)                  # uint64 arithmetic wraps modulo 2**64
+        if self.counter_bits < 64:
+            diff = diff % np.uint64(modulus)
+        deltas = diff.astype(np.float64)
+        wrapped = last < prev
+        deltas[wrapped & (deltas > plausible)] = np.nan   # reset / clear counters, not a wrap
+        deltas[~known] = np.nan
+        return deltas
+
+    def rate_history(self, counter):
+        """(n_series, capacity - 1) array of per-second rates, oldest first; NaN where unknown."""
+        c = self.counters.index(counter)
+        n = len(self.keys)
+        rows = np.arange(n)
+        order = self._ordered(rows)
+        ts = np.take_along_axis(self.ts[:n], order, axis=1)
+        values = np.take_along_axis(self.values[c, :n], order, axis=1)
+        present = np.take_along_axis(self.present[c, :n], order, axis=1)
+        dt = np.diff(ts, axis=1)
+        deltas = self._deltas(values[:, :-1], values[:, 1:], present[:, :-1] & present[:, 1:])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = deltas / dt
+        rates[~(dt > 0)] = np.nan
+        return rates
+
+    def latest_rates(self, counter):
+        """Per-second rate between the last two samples of every series (NaN if < 2 samples)."""
+        c = self.counters.index(counter)
+        n = len(self.keys)
+        last = (self.pos[:n] - 1) % self.capacity
+        prev = (self.pos[:n] - 2) % self.capacity
+        rows = np.arange(n)
+        dt = self.ts[rows, last] - self.ts[rows, prev]
+        known = self.present[c, rows, prev] & self.present[c, rows, last]
+        deltas = self._deltas(self.values[c, rows, prev], self.values[c, rows, last], known)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = deltas / dt
+        rates[(self.count[:n] < 2) | ~(dt > 0)] = np.nan
+        return rates
+
+    def rate_percentiles(self, counter, q=(50, 95, 99)):
+        """Per-series percentiles of the rate history: (n_series, len(q))."""
+        # np.nanpercentile loops per row; sorting once (NaN last) and interpolating
+        # between the two nearest ranks gives the same "linear" result for all rows at once
+        history = np.sort(self.rate_history(counter), axis=1)
+        n_valid = np.count_nonzero(~np.isnan(history), axis=1)
+        result = np.full((history.shape[0], len(q)), np.nan)
+        has_data = n_valid > 0
+        for j, pct in enumerate(q):
+            rank = (n_valid - 1).clip(min=0) * (pct / 100.0)
+            lo = np.floor(rank).astype(np.int64)
+            hi = np.ceil(rank).astype(np.int64)
+            lo_val = np.take_along_axis(history, lo[:, None], axis=1)[:, 0]
+            hi_val = np.take_along_axis(history, hi[:, None], axis=1)[:, 0]
+            result[has_data, j] = (lo_val + (hi_val - lo_val) * (rank - lo))[has_data]
+        return result
+
+    def top(self, counter, n=10):
+        """The n series with the highest latest rate: [((host, interface), rate), ...]."""
+        rates = self.latest_rates(counter)
+        rates = np.where(np.isnan(rates), -np.inf, rates)
+        k = min(n, len(rates))
+        if k == 0:
+            return []
+        best = np.argpartition(-rates, k - 1)[:k]
+        best = best[np.argsort(-rates[best])]
+        return [(self.keys[i], float(rates[i])) for i in best if np.isfinite(rates[i])]
+
+
+class CounterPoller:
+    """Polls statistics of all interfaces of every device every interval seconds."""
+
+    def __init__(self, device_list, store=None, interval=POLL_INTERVAL, max_workers=MAX_WORKERS, pool=None):
+        self.devices = list(device_list)
+        self.store = store or CounterStore()
+        self.interval = interval
+        self.max_workers = max_workers
+        self.pool = pool or NetconfSessionPool(max_sessions_per_device=1, idle_timeout=interval * 4)
+        self.errors = {}
+
+    def poll_device(self, dev):
+        with self.pool.session(dev) as m:
+            reply = m.get(STATISTICS_FILTER)
+        return dev["host"], time.time(), list(iter_interface_records(reply.xml))
+
+    def poll_once(self):
+        """One fan-out over all devices; samples are written from this thread only."""
+        self.errors = {}
+        workers = max(1, min(self.max_workers, len(self.devices)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="poll") as executor:
+            futures = {executor.submit(self.poll_device, dev): dev["host"] for dev in self.devices}
+            for future, host in futures.items():
+                try:
+                    host, timestamp, records = future.result()
+                except Exception as e:
+                    self.errors[host] = f"{type(e).__name__}: {e}"
+                    continue
+                self.store.add_records(host, timestamp, records)
+
+    def run(self, cycles=None, on_cycle=None):
+        """Poll on a fixed schedule (no drift); cycles=None runs until interrupted."""
+        next_run = time.monotonic()
+        done = 0
+        while cycles is None or done < cycles:
+            self.poll_once()
+            done += 1
+            if on_cycle:
+                on_cycle(self)
+            next_run += self.interval
+            time.sleep(max(0.0, next_run - time.monotonic()))
+
+
+def print_top(poller, n=10):
+    print('*' * 50)
+    print(f"{len(poller.store)} series, {len(poller.errors)} device errors")
+    for (host, name), rate in poller.store.top("in-octets", n):
+        print(f"{host:16} {name:32} {rate * 8 / 1e6:10.2f} Mbit/s in")
+
+
+if __name__ == '__main__':
+    interval = float(sys.argv[1]) if len(sys.argv) > 1 else POLL_INTERVAL
+    cycles = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    poller = CounterPoller(devices, interval=interval)
+    try:
+        poller.run(cycles=cycles, on_cycle=print_top)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        poller.pool.close_all()
@@ -0,0 +1,338 @@
+### Shared helpers for the NETCONF interface edit scripts
+### Pre-check, shut / modify / no shut sequence, rollback and the management interface guard.
+
+# Every helper takes an open ncclient manager `m`. Borrow one from a NetconfSessionPool
+# (netconf_session_pool.py) to reuse a warm session across many edits:
+#
+#     with NetconfSessionPool() as pool:
+#         apply_interface_changes(pool, device, changes)
+#
+# Console output goes through Fleet/reply_output.py: NETWORK_OUTPUT=quiet drops the step
+# lines and prints a reply only when it is not <ok/>, NETWORK_OUTPUT=ndjson writes one
+# JSON record per reply instead (e.g. NETWORK_OUTPUT=quiet python netconf_interface_edit_with_rollback.py).
+
+import sys
+from pathlib import Path
+from ncclient.operations import RPCError
+from lxml import etree
+from xml.sax.saxutils import escape
+from xml_templates import get_template
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from instrumentation import operation
+import reply_output
+
+# -----------------------------
+# TEMPLATES (compiled once by xml_templates, relative to this directory)
+# -----------------------------
+SHUT_TEMPLATE = "ios_shut.xml"
+MODIFY_TEMPLATE = "ios_modify.xml"
+NO_SHUT_TEMPLATE = "ios_no_shut.xml"
+ROLLBACK_TEMPLATE = "ios_rollback.xml"
+MULTI_INTERFACE_TEMPLATE = "ios_modify_no_shut.xml"
+
+MANAGEMENT_IFACE = "1"  # e.g., GigabitEthernet1 for management
+
+XE_NS = "http://cisco.com/ns/yang/Cisco-IOS-XE-native"
+# capability prefixes, any version matches
+CANDIDATE_CAPABILITY = "urn:ietf:params:netconf:capability:candidate:"
+CONFIRMED_COMMIT_CAPABILITY = "urn:ietf:params:netconf:capability:confirmed-commit:"
+CONFIRM_TIMEOUT = 120  # seconds before an unconfirmed commit is rolled back by the device
+
+
+class EditConfigError(Exception):
+    """The device answered an edit-config with something other than <ok/>."""
+
+
+class ManagementInterfaceError(Exception):
+    """A change targets the management interface."""
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def check_not_management(iface_id, management_iface=MANAGEMENT_IFACE):
+    """SAFETY CHECK: Do not touch management interface"""
+    if str(iface_id) == str(management_iface):
+        raise ManagementInterfaceError(f"Refusing to modify management interface Gi{iface_id}")
+
+def device_label(m):
+    """Host an ncclient manager is connected to, for the instrumentation labels."""
+    return getattr(getattr(m, "_session", None), "_host", None) or "unknown"
+
+def push_config(m, xml_payload, step_name, target="running"):
+    """edit-config one payload; returns True when the reply is <ok/>, raises EditConfigError otherwise.
+
+    The reply is only pretty-printed in the pretty output mode or when it is not <ok/>
+    (Fleet/reply_output.py); the check itself is a text search, not a DOM. Raising lets
+    the callers' rollback / discard paths handle a rejected edit like an RPCError.
+    """
+    reply_output.step(f"🔹 {step_name} ...")
+    with operation(device_label(m), "edit_config", request_bytes=len(xml_payload)) as op:
+        reply = m.edit_config(target=target, config=xml_payload)
+        raw = reply.xml
+        op.received(len(raw))
+        with op.phase("parse"):
+            ok = reply_output.reply_ok(raw)
+    if not reply_output.reply(raw, ok, host=device_label(m), rpc="edit_config", target=target, step=step_name):
+        raise EditConfigError(f"{step_name}: edit-config on {target} was not <ok/>")
+    return True
+
+def get_interface_config(m, iface):
+    filter_xml = f"""
+    <filter>
+      <native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
+        <interface>
+          <GigabitEthernet>
+            <name>{iface}</name>
+          </GigabitEthernet>
+        </interface>
+      </native>
+    </filter>
+    """
+    try:
+        with operation(device_label(m), "get_config", request_bytes=len(filter_xml)) as op:
+            result = m.get_config(source="running", filter=filter_xml)
+            op.received(len(result.xml))
+            with op.phase("parse"):
+                return etree.fromstring(result.xml.encode())
+    except RPCError as e:
+        reply_output.message(f"Failed to fetch interface config: {e}", host=device_label(m))
+        return None
+
+def extract_current_values(config_xml):
+    """Extract current description, IP, and mask"""
+    ns = {"xe": "http://cisco.com/ns/yang/Cisco-IOS-XE-native"}
+    desc_elem = config_xml.find(".//xe:description", ns)
+    desc = desc_elem.text if desc_elem is not None else ""
+    ip_elem = config_xml.find(".//xe:ip/xe:address/xe:primary/xe:address", ns)
+    mask_elem = config_xml.find(".//xe:ip/xe:address/xe:primary/xe:mask", ns)
+    ip_current = ip_elem.text if ip_elem is not None else ""
+    mask_current = mask_elem.text if mask_elem is not None else ""
+    return desc, ip_current, mask_current
+
+def needs_change(config_xml, interface_desc, ip_address, subnet_mask):
+    """Return True if IP or description differ from desired"""
+    desc, ip_current, mask_current = extract_current_values(config_xml)
+    if desc != interface_desc or ip_current != ip_address or mask_current != subnet_mask:
+        return True
+    return False
+
+def render_change(iface_id, interface_desc, ip_address, subnet_mask):
+    """Render the shut, modify and no shut payloads for one interface (TemplateError on bad input)."""
+    shut_config = get_template(SHUT_TEMPLATE).render(iface_id=iface_id)
+    modify_config = get_template(MODIFY_TEMPLATE).render(
+        iface_id=iface_id,
+        interface_desc=interface_desc,
+        ip_address=ip_address,
+        subnet_mask=subnet_mask
+    )
+    no_shut_config = get_template(NO_SHUT_TEMPLATE).render(iface_id=iface_id)
+    return shut_config, modify_config, no_shut_config
+
+def render_rollback(iface_id, old_desc, old_ip, old_mask):
+    # the old interface may have had no description / IP at all
+    return get_template(ROLLBACK_TEMPLATE).render(
+        iface_id=iface_id,
+        interface_desc=old_desc,
+        ip_address=old_ip,
+        subnet_mask=old_mask,
+        allow_empty=True
+    )
+
+def apply_interface_change(m, iface_id, interface_desc, ip_address, subnet_mask, rollback=True):
+    """Pre-check, then shut / modify / no shut one GigabitEthernet.
+
+    Returns False when the interface already has the desired values, True when it was changed.
+    With rollback=True the previous description and IP are restored if any step fails.
+    """
+    check_not_management(iface_id)
+
+    # Render (and validate) the payloads before touching the device
+    shut_config, modify_config, no_shut_config = render_change(iface_id, interface_desc, ip_address, subnet_mask)
+
+    # Fetch current interface config
+    current_config = get_interface_config(m, iface_id)
+    if current_config is None:
+        raise RuntimeError(f"Cannot fetch interface config for Gi{iface_id}. Aborting.")
+
+    # Determine if change is needed
+    if not needs_change(current_config, interface_desc, ip_address, subnet_mask):
+        reply_output.message(f"Interface Gi{iface_id} already has desired IP and description. No changes needed.",
+                             host=device_label(m), iface=iface_id, changed=False)
+        return False
+
+    if not rollback:
+        push_config(m, shut_config, "Shutting interface")
+        push_config(m, modify_config, "Modifying interface")
+        push_config(m, no_shut_config, "Bringing interface up")
+        return True
+
+    # Extract current values for rollback
+    rollback_config = render_rollback(iface_id, *extract_current_values(current_config))
+
+    try:
+        # 1️⃣ Shut interface
+        push_config(m, shut_config, "Shutting interface")
+
+        # 2️⃣ Apply modifications
+        push_config(m, modify_config, "Modifying interface")
+
+        # 3️⃣ Bring interface back up
+        push_config(m, no_shut_config, "Bringing interface up")
+
+    except Exception as e:
+        reply_output.message(f"Modification failed: {e}. Rolling back previous configuration.",
+                             host=device_label(m), iface=iface_id)
+        push_config(m, rollback_config, "Rolling back interface config")
+        push_config(m, no_shut_config, "Bringing interface up after rollback")
+        raise
+    return True
+
+def apply_interface_changes(pool, dev, changes, rollback=True, stop_on_error=False):
+    """Apply many changes to one device, borrowing a warm session from pool for each.
+
+    changes is an iterable of dicts with iface_id, interface_desc, ip_address, subnet_mask.
+    Returns {iface_id: True/False/exception}; with stop_on_error the changes after the
+    first failure are not attempted and not in the result.
+    """
+    results = {}
+    for change in changes:
+        iface_id = change["iface_id"]
+        try:
+            with pool.session(dev) as m:
+                results[iface_id] = apply_interface_change(
+                    m,
+                    iface_id,
+                    change["interface_desc"],
+                    change["ip_address"],
+                    change["subnet_mask"],
+                    rollback=rollback
+                )
+        except Exception as e:
+            reply_output.message(f"Gi{iface_id}: NETCONF operation failed: {e}", host=dev["host"], iface=iface_id)
+            results[iface_id] = e
+            if stop_on_error:
+                break
+    return results
+
+# -----------------------------
+# CANDIDATE / CONFIRMED-COMMIT MODE
+# -----------------------------
+# All interfaces of one device go into a single <config> pushed to the candidate
+# datastore, then one confirmed commit. If anything fails the candidate is discarded,
+# and a confirmed commit that is never confirmed is rolled back by the device itself,
+# so no rollback payload has to be templated from the old values.
+# IOS-XE needs "netconf-yang feature candidate-datastore" for this mode.
+
+def get_interfaces_config(m, iface_ids):
+    """Fetch the running config of several GigabitEthernets with one get_config."""
+    entries = "".join(
+        f"<GigabitEthernet><name>{escape(str(iface))}</name></GigabitEthernet>" for iface in iface_ids
+    )
+    filter_xml = f"""
+    <filter>
+      <native xmlns="{XE_NS}">
+        <interface>{entries}</interface>
+      </native>
+    </filter>
+    """
+    with operation(device_label(m), "get_config", request_bytes=len(filter_xml)) as op:
+        result = m.get_config(source="running", filter=filter_xml)
+        op.received(len(result.xml))
+        with op.phase("parse"):
+            return etree.fromstring(result.xml.encode())
+
+def current_values_by_iface(config_xml):
+    """Return {iface_id: (description, ip, mask)} for every GigabitEthernet in config_xml."""
+    ns = {"xe": XE_NS}
+    values = {}
+    for gi in config_xml.iterfind(".//xe:interface/xe:GigabitEthernet", ns):
+        name = gi.findtext("xe:name", default="", namespaces=ns)
+        values[name] = (
+            gi.findtext("xe:description", default="", namespaces=ns),
+            gi.findtext("xe:ip/xe:address/xe:primary/xe:address", default="", namespaces=ns),
+            gi.findtext("xe:ip/xe:address/xe:primary/xe:mask", default="", namespaces=ns),
+        )
+    return values
+
+def build_multi_interface_config(changes):
+    """Merge description/IP changes of many interfaces into one <config> payload.
+
+    The interfaces end up not shut, like after the shut / modify / no shut sequence.
+    """
+    return get_template(MULTI_INTERFACE_TEMPLATE).render_many(changes, repeat="GigabitEthernet")
+
+def supports_candidate(m):
+    """Return (candidate, confirmed_commit) support as advertised in the hello."""
+    caps = [str(cap) for cap in m.server_capabilities]
+    candidate = any(cap.startswith(CANDIDATE_CAPABILITY) for cap in caps)
+    confirmed = any(cap.startswith(CONFIRMED_COMMIT_CAPABILITY) for cap in caps)
+    return candidate, confirmed
+
+def pending_changes(m, changes):
+    """Pre-check all interfaces with one get_config; return only changes that differ."""
+    changes = list(changes)
+    for change in changes:
+        check_not_management(change["iface_id"])
+    current = current_values_by_iface(get_interfaces_config(m, [c["iface_id"] for c in changes]))
+    return [
+        c for c in changes
+        if current.get(str(c["iface_id"])) != (c["interface_desc"], c["ip_address"], c["subnet_mask"])
+    ]
+
+def apply_changes_candidate(m, changes, confirmed=True, confirm_timeout=CONFIRM_TIMEOUT, verify=None):
+    """Apply many interface changes on one device as a single candidate transaction.
+
+    With confirmed=True the commit is a confirmed-commit; verify(m), if given, runs before
+    the confirming commit and a falsy result or exception cancels it. Returns the list of
+    changes that were committed (empty if everything was already in place).
+    """
+    candidate, confirmed_supported = supports_candidate(m)
+    if not candidate:
+        raise RuntimeError("Device does not advertise :candidate; use apply_interface_change instead")
+    confirmed = confirmed and confirmed_supported
+
+    todo = pending_changes(m, changes)
+    if not todo:
+        reply_output.message("All interfaces already have desired IP and description. No changes needed.",
+                             host=device_label(m), changed=False)
+        return []
+
+    payload = build_multi_interface_config(todo)
+    commit_pending = False
+    with m.locked("candidate"):
+        try:
+            m.discard_changes()
+            push_config(m, payload, f"Staging {len(todo)} interface(s) in candidate", target="candidate")
+            if confirmed:
+                reply_output.step(f"🔹 Confirmed commit (rolls back in {confirm_timeout}s unless confirmed) ...")
+                m.commit(confirmed=True, timeout=str(int(confirm_timeout)))
+                commit_pending = True
+                if verify is not None and not verify(m):
+                    raise RuntimeError("Post-commit verification failed")
+            reply_output.step("🔹 Commit ...")
+            m.commit()
+            commit_pending = False
+        except Exception as e:
+            reply_output.message(f"Candidate transaction failed: {e}. Discarding changes.", host=device_label(m))
+            rollback_candidate(m, commit_pending)
+            raise
+    return todo
+
+def rollback_candidate(m, commit_pending):
+    """Drop the staged candidate; cancel a pending confirmed commit if the device allows it."""
+    if commit_pending:
+        cancel = getattr(m, "cancel_commit", None)
+        try:
+            if cancel is not None:
+                cancel()
+            else:
+                reply_output.message("cancel-commit not available; device reverts when the confirm timeout expires.",
+                                     host=device_label(m))
+        except Exception as e:
+            reply_output.message(f"cancel-commit failed ({e}); device reverts when the confirm timeout expires.",
+                                 host=device_label(m))
+    try:
+        m.discard_changes()
+    except Exception as e:
+        reply_output.message(f"discard-changes failed: {e}", host=device_label(m))
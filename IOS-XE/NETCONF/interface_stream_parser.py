@@ -0,0 +1,126 @@
+### Streaming parser for ietf-interfaces NETCONF replies
+### Yields one compact record per interface instead of building a DOM or nested dicts.
+
+# The reply is read with iterparse; every <interface> element is turned into a record
+# when its end tag is seen and is then cleared and detached, so memory stays at one
+# interface no matter how many subinterfaces the chassis has. The only state kept
+# across interfaces is the name -> description map from the config tree, which
+# IOS-XE sends before <interfaces-state>.
+#
+# for record in iter_interface_records(reply.xml):
+#     print(record["name"], record["oper_status"], record["counters"]["in-unicast-pkts"])
+
+import io
+import xml.etree.ElementTree as ET
+
+IF_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+
+_INTERFACE = f"{{{IF_NS}}}interface"
+_INTERFACES = f"{{{IF_NS}}}interfaces"
+_STATISTICS = f"{{{IF_NS}}}statistics"
+
+# leaf name -> record key
+STATE_LEAVES = {
+    "name": "name",
+    "description": "description",
+    "admin-status": "admin_status",
+    "oper-status": "oper_status",
+    "last-change": "last_change",
+    "phys-address": "phys_address",
+    "speed": "speed",
+}
+
+COUNTER_LEAVES = (
+    "in-octets",
+    "in-unicast-pkts",
+    "in-discards",
+    "in-errors",
+    "out-octets",
+    "out-unicast-pkts",
+    "out-discards",
+    "out-errors",
+)
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _as_stream(source):
+    """Accept reply text, reply bytes or an open file object."""
+    if isinstance(source, bytes):
+        return io.BytesIO(source)
+    if isinstance(source, str):
+        return io.StringIO(source)
+    return source
+
+def _record_from(elem):
+    record = dict.fromkeys(STATE_LEAVES.values())
+    record["counters"] = {}
+    for child in elem:
+        tag = child.tag
+        if tag == _STATISTICS:
+            record["counters"] = {
+                _local(c.tag): _to_int(c.text) for c in child if _local(c.tag) in COUNTER_LEAVES
+            }
+            continue
+        key = STATE_LEAVES.get(_local(tag))
+        if key is not None:
+            record[key] = (child.text or "").strip() or None
+    record["speed"] = _to_int(record["speed"])
+    return record
+
+def iter_interface_records(source):
+    """Yield one dict per interface from an ietf-interfaces get/get-config reply.
+
+    Record keys: name, description, admin_status, oper_status, last_change,
+    phys_address, speed (int bps) and counters ({leaf: int}). Interfaces that only
+    appear in the config tree are yielded at the end with state fields set to None.
+    """
+    descriptions = {}     # name -> description from <interfaces> (config)
+    seen_state = set()
+    stack = []
+
+    for event, elem in ET.iterparse(_as_stream(source), events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            continue
+
+        stack.pop()
+        if elem.tag != _INTERFACE:
+            continue
+
+        parent = stack[-1] if stack else None
+        record = _record_from(elem)
+        name = record["name"]
+
+        # free the subtree we just consumed
+        elem.clear()
+        if parent is not None:
+            parent.remove(elem)
+
+        if name is None:
+            continue
+        is_state = record["oper_status"] is not None or record["counters"]
+        if parent is not None and parent.tag == _INTERFACES and not is_state:
+            descriptions[name] = record["description"]
+            continue
+
+        if record["description"] is None:
+            record["description"] = descriptions.get(name)
+        seen_state.add(name)
+        yield record
+
+    for name, description in descriptions.items():
+        if name not in seen_state:
+            record = dict.fromkeys(STATE_LEAVES.values())
+            record.update(name=name, description=description, counters={})
+            yield record
+
+def interface_records(source):
+    """Same as iter_interface_records, as a list (for small replies)."""
+    return list(iter_interface_records(source))
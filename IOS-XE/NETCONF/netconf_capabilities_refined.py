@@ -1,29 +1,25 @@
 ### Getting device capabilities and interface info via NETCONF on IOS-XE device
-### Modules netconf-filter.xml and device_info.py are used here
-
+### Modules filter_compiler.py, device_info.py and interface_stream_parser.py are used here
+### The get asks only for the leaves printed below, of the INTERFACES (--all: every interface),
+### as an XPath filter once the capability cache has seen :xpath in this device's hello.
+### --quiet prints only the result lines, --ndjson one JSON record per interface instead
+### (Fleet/reply_output.py); the reply is pretty-printed only with --dump or when it cannot be parsed.
+### The reply is parsed incrementally, one interface record at a time; pass --dump to also
+### pretty-print the raw reply (builds a full DOM, so keep it for small replies).
+
+import sys
+import time
 from ncclient import manager
-from pprint import pprint
-import xmltodict
-import xml.dom.minidom
 from device_info import device
 from datetime import datetime
+from pathlib import Path
+from interface_stream_parser import iter_interface_records
+from capability_cache import CapabilityCache
+from filter_compiler import INTERFACE_LEAVES, filter_for
 
-def _text(node):
-    """Return text from xmltodict node safely."""
-    if node is None:
-        return None
-    if isinstance(node, dict):
-        return node.get('#text') or node.get('text') or None
-    return str(node)
-
-def safe_get(dct, *keys):
-    """Safe nested get for dictionaries; returns None if any key is missing."""
-    cur = dct
-    for k in keys:
-        if not isinstance(cur, dict) or k not in cur:
-            return None
-        cur = cur[k]
-    return cur
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from snapshot_store import SnapshotStore
+import reply_output
 
 def human_readable_bytes(value):
     """Convert a bytes value (int or numeric string) to a human readable string."""
@@ -66,96 +62,129 @@ def format_last_change(value):
     return f"{formatted} {tz}" if tz else formatted
 
 # path to save only the final printed output lines
-OUTPUT_PATH = f"/home/zolcs/Network/IOS-XE/NETCONF/netconf_capabilites_result_{device['host']}.txt"
+OUTPUT_PATH_TEMPLATE = "/home/zolcs/Network/IOS-XE/NETCONF/netconf_capabilites_result_{host}.txt"
+OUTPUT_PATH = OUTPUT_PATH_TEMPLATE.format(host=device['host'])
+
+FILTER_PATH = "/home/zolcs/Network/IOS-XE/NETCONF/netconf-filter.xml"
 
-netconf_filter = open("/home/zolcs/Network/IOS-XE/NETCONF/netconf-filter.xml").read()
+# interfaces fetched by main(); the leaves are INTERFACE_LEAVES (what format_interface_record reads)
+INTERFACES = ("GigabitEthernet1",)
 
 def log(msg=""):
     """Console-only logging; do NOT collect these lines for file output."""
     print(str(msg))
 
-with manager.connect(
-    host=device["host"],
-    port=device["port"],
-    username=device["username"],
-    password=device["password"],
-    hostkey_verify=False
-) as m:
-    for capability in m.server_capabilities:
-        log('*' * 50)
-        log(capability)
-    log('Connected')
-    interface_netconf = m.get(netconf_filter)
-    log('getting running config')
-
-# XMLDOM for formatting output to xml (console only)
-try:
-    xmlDom = xml.dom.minidom.parseString(interface_netconf.xml)
-    print(xmlDom.toprettyxml(indent="  "))
-except Exception:
+def load_filter(path=FILTER_PATH):
+    """Read the NETCONF subtree filter used for the interface get."""
+    with open(path, "r", encoding="utf-8") as fh:
+        return fh.read()
+
+def fetch_interface_reply(dev, netconf_filter, timeout=None, verbose=True):
+    """Connect to one device, read its capabilities and run the filtered get.
+
+    Returns (capabilities, reply).
+    """
+    with manager.connect(
+        host=dev["host"],
+        port=dev["port"],
+        username=dev["username"],
+        password=dev["password"],
+        hostkey_verify=False,
+        timeout=timeout
+    ) as m:
+        capabilities = list(m.server_capabilities)
+        if verbose:
+            for capability in capabilities:
+                log('*' * 50)
+                log(capability)
+            log('Connected')
+        interface_netconf = m.get(netconf_filter)
+        if verbose:
+            log('getting running config')
+    return capabilities, interface_netconf
+
+def format_interface_record(record):
+    """Turn a streaming parser record into the printed interface fields."""
+    counters = record.get("counters") or {}
+    packets_in = counters.get("in-unicast-pkts")
+    return {
+        "name": record.get("name") or 'N/A',
+        "description": record.get("description") or 'N/A',
+        "packets_in": str(packets_in) if packets_in is not None else 'N/A',
+        "admin_state": record.get("admin_status") or 'N/A',
+        "oper_state": record.get("oper_status") or 'N/A',
+        # format last-change to human readable form
+        "last_change": format_last_change(record.get("last_change")),
+        "phys_address": record.get("phys_address") or 'N/A',
+        "speed": human_readable_bytes(record.get("speed")),
+    }
+
+def iter_interface_info(reply_xml):
+    """Yield the printed interface fields for every interface in the reply."""
+    for record in iter_interface_records(reply_xml):
+        yield format_interface_record(record)
+
+def build_result_lines(host, info):
+    """Final printed/result lines (these are the ONLY lines saved to the output file)."""
+    return [
+        f"Host: {host}",
+        f"Name: {info['name']}",
+        f"Description: {info['description']}",
+        f"Packets In: {info['packets_in']}",
+        f"Admin-state: {info['admin_state']}",
+        f"Oper-state: {info['oper_state']}",
+        f"Last-change: {info['last_change']}",
+        f"phys-address: {info['phys_address']}",
+        f"speed: {info['speed']}",
+    ]
+
+def save_result_lines(path, result_lines):
+    """Save ONLY the final printed result lines to file."""
     try:
-        print(str(interface_netconf))
-    except Exception:
-        print("Failed to pretty print NETCONF reply")
-
-print('*' * 25 + 'Break' + '*' * 50)
-
-# XMLTODICT for converting xml output to a python dictionary
-try:
-    interface_python = xmltodict.parse(interface_netconf.xml)["rpc-reply"]["data"]
-except Exception as e:
-    print("Failed to parse NETCONF reply to dict:", e)
-    interface_python = {}
-
-pprint(interface_python)
-
-# locate configuration and operational state safely
-config = safe_get(interface_python, "interfaces", "interface") or {}
-op_state = safe_get(interface_python, "interfaces-state", "interface") or {}
-
-# safe extractions
-name = _text(config.get('name')) or 'N/A'
-description = _text(config.get('description')) or 'N/A'
-
-packets_in = 'N/A'
-try:
-    stats = op_state.get('statistics') if isinstance(op_state, dict) else None
-    packets_in_val = _text(stats.get('in-unicast-pkts')) if stats else None
-    if packets_in_val:
-        packets_in = packets_in_val
-except Exception:
-    packets_in = 'N/A'
-
-admin_state = _text(op_state.get('admin-status')) or 'N/A'
-oper_state = _text(op_state.get('oper-status')) or 'N/A'
-# format last-change to human readable form
-raw_last_change = _text(op_state.get('last-change')) or None
-last_change = format_last_change(raw_last_change)
-phys_address = _text(op_state.get('phys-address')) or 'N/A'
-raw_speed = _text(op_state.get('speed')) or None
-speed = human_readable_bytes(raw_speed)
-
-# final printed/result lines (these are the ONLY lines saved to OUTPUT_PATH)
-result_lines = [
-    f"Host: {device['host']}",
-    f"Name: {name}",
-    f"Description: {description}",
-    f"Packets In: {packets_in}",
-    f"Admin-state: {admin_state}",
-    f"Oper-state: {oper_state}",
-    f"Last-change: {last_change}",
-    f"phys-address: {phys_address}",
-    f"speed: {speed}",
-]
-
-# print to console
-for line in result_lines:
-    print(line)
-
-# save ONLY the final printed result lines to file
-try:
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as fh:
-        fh.write("\n".join(result_lines) + "\n")
-    print(f"Saved result lines to: {OUTPUT_PATH}")
-except Exception as e:
-    print(f"Failed to save result lines to {OUTPUT_PATH}: {e}")
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write("\n".join(result_lines) + "\n")
+        reply_output.message(f"Saved result lines to: {path}", path=str(path))
+    except Exception as e:
+        reply_output.message(f"Failed to save result lines to {path}: {e}", path=str(path))
+
+def main(argv):
+    argv = reply_output.set_mode_from_argv(argv)
+    verbose = reply_output.mode() == "pretty"
+    with CapabilityCache() as cache:
+        netconf_filter = filter_for(device['host'], cache, INTERFACE_LEAVES,
+                                    None if "--all" in argv else INTERFACES)
+        capabilities, interface_netconf = fetch_interface_reply(device, netconf_filter, verbose=verbose)
+        # remember the hello, so the next run knows whether :xpath can be used
+        cache.store(device['host'], capabilities)
+
+    raw = interface_netconf.xml
+    if "--dump" in argv:
+        # the pretty form builds a full DOM, so it is rendered only when asked for
+        reply_output.message(reply_output.Pretty(raw), host=device['host'])
+        reply_output.step('*' * 25 + 'Break' + '*' * 50)
+
+    result_lines = []
+    records = []
+    try:
+        for record in iter_interface_records(raw):
+            records.append(record)
+            info = format_interface_record(record)
+            result_lines.extend(build_result_lines(device['host'], info))
+            reply_output.record("interface", host=device['host'], **info)
+    except Exception as e:
+        reply_output.message(f"Failed to parse NETCONF reply: {e}", host=device['host'])
+        reply_output.reply(raw, ok=False, host=device['host'], rpc="get")
+
+    # also keep the records queryable across runs (Fleet/snapshot_store.py)
+    with SnapshotStore() as store:
+        store.append("interfaces", device['host'], records, time.time())
+
+    # print to console (ndjson mode: the interface records above)
+    if reply_output.mode() != "ndjson":
+        for line in result_lines:
+            print(line)
+
+    save_result_lines(OUTPUT_PATH, result_lines)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,176 @@
+### Collect NETCONF capabilities and interface info from many IOS-XE devices concurrently
+### Inventory comes from `devices` in device_info.py, or from a file given on the command line:
+###     python netconf_fleet_collect.py inventory.json [max_workers] [parse_workers]
+### The file is a list of device dicts with the same keys as device_info.device, or a fleet
+### inventory (Fleet/inventory.py) whose devices with a netconf endpoint are used.
+
+# Each device runs connect -> capabilities -> filtered get in its own worker thread.
+# Results and errors are collected per device, so one slow or unreachable box
+# only occupies one worker until its timeout instead of holding up the sweep.
+# Every device goes through a Fleet/scheduler.py Scheduler, which caps sessions in
+# flight and retries a device that answers resource-denied / in-use after a pause.
+# The get asks only for the leaves that are printed (filter_compiler.py), in XPath form
+# for devices whose cached hello lists :xpath. The replies are parsed into records in
+# parse_workers processes (Fleet/parse_pool.py; default one per core, 0 on one core),
+# so the worker threads go straight back to waiting on their devices.
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from capability_cache import CapabilityCache
+from device_info import devices
+from filter_compiler import INTERFACE_LEAVES, compile_filter
+from interface_stream_parser import iter_interface_records
+from netconf_capabilities_refined import (
+    fetch_interface_reply,
+    format_interface_record,
+    build_result_lines,
+)
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from snapshot_store import SnapshotStore
+from inventory import Inventory, InventoryError
+from scheduler import Scheduler
+from parse_pool import ParsePool, PARSE_WORKERS
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+MAX_WORKERS = 20          # upper bound of devices worked on at the same time
+DEVICE_TIMEOUT = 30       # seconds, passed to manager.connect for connect and RPCs
+RESULT_DIR = Path(__file__).resolve().parent / "fleet_results"
+RECORD_PARSER = "interface_stream_parser:iter_interface_records"
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def load_inventory(path=None):
+    """Return the device list from a JSON file, or the device_info inventory."""
+    if not path:
+        return list(devices)
+    try:
+        return Inventory.load(path, protocol="netconf").device_dicts("netconf")
+    except InventoryError as e:
+        raise SystemExit(f"Inventory {path}: {e}")
+
+def device_filters(device_list, leaves=INTERFACE_LEAVES, interfaces=None, cache=None):
+    """{host: filter} with the XPath form for the hosts the capability cache lists with :xpath."""
+    hosts = [dev["host"] for dev in device_list]
+    xpath_hosts = set(cache.devices_with_capability(":xpath", hosts=hosts)) if cache and hosts else set()
+    return {host: compile_filter(leaves, interfaces, xpath=host in xpath_hosts) for host in hosts}
+
+def collect_device(dev, netconf_filter, timeout=DEVICE_TIMEOUT, parse_pool=None):
+    """Connect, fetch capabilities and run the filtered get for one device.
+
+    netconf_filter is one filter for every device or a {host: filter} map (device_filters).
+    With a ParsePool the reply is parsed in its worker processes.
+    """
+    started = time.monotonic()
+    if isinstance(netconf_filter, dict):
+        netconf_filter = netconf_filter[dev["host"]]
+    capabilities, reply = fetch_interface_reply(dev, netconf_filter, timeout=timeout, verbose=False)
+    if parse_pool is not None:
+        records = parse_pool.parse(RECORD_PARSER, reply.xml)
+    else:
+        records = list(iter_interface_records(reply.xml))
+    return {
+        "host": dev["host"],
+        "capabilities": capabilities,
+        "records": records,
+        "interfaces": [format_interface_record(record) for record in records],
+        "collected_at": time.time(),
+        "elapsed": round(time.monotonic() - started, 3),
+    }
+
+def collect_fleet(device_list, netconf_filter, max_workers=MAX_WORKERS, timeout=DEVICE_TIMEOUT, on_result=None,
+                  scheduler=None, parse_pool=None):
+    """Run collect_device for every device with at most max_workers in flight.
+
+    Returns (results, errors), both keyed by host. on_result(host, result, error)
+    is called as each device finishes, in completion order. Pass a shared
+    scheduler to bound several sweeps (or other callers) together, and a started
+    ParsePool to parse the replies off the worker threads.
+    """
+    results = {}
+    errors = {}
+    if not device_list:
+        return results, errors
+
+    workers = max(1, min(max_workers, len(device_list)))
+    scheduler = scheduler or Scheduler(global_limit=workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="netconf") as pool:
+        futures = {
+            pool.submit(scheduler.call, dev["host"], collect_device, dev, netconf_filter, timeout,
+                        parse_pool): dev["host"]
+            for dev in device_list
+        }
+        for future in as_completed(futures):
+            host = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                errors[host] = f"{type(e).__name__}: {e}"
+                result = None
+            else:
+                results[host] = result
+            if on_result:
+                on_result(host, result, errors.get(host))
+    return results, errors
+
+def save_device_result(result, result_dir=RESULT_DIR):
+    """Write the same result lines as netconf_capabilities_refined.py, one file per host."""
+    result_dir.mkdir(parents=True, exist_ok=True)
+    path = result_dir / f"netconf_capabilites_result_{result['host']}.txt"
+    with open(path, "w", encoding="utf-8") as fh:
+        for info in result["interfaces"]:
+            fh.write("\n".join(build_result_lines(result["host"], info)) + "\n")
+    return path
+
+def print_progress(host, result, error):
+    if error:
+        print(f"[FAIL] {host}: {error}")
+    else:
+        up = sum(1 for info in result["interfaces"] if info["oper_state"] == "up")
+        print(f"[ OK ] {host}: {len(result['capabilities'])} capabilities, "
+              f"{len(result['interfaces'])} interfaces ({up} up) ({result['elapsed']}s)")
+        save_device_result(result)
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main(argv):
+    inventory = load_inventory(argv[1] if len(argv) > 1 else None)
+    max_workers = int(argv[2]) if len(argv) > 2 else MAX_WORKERS
+    parse_workers = int(argv[3]) if len(argv) > 3 else PARSE_WORKERS
+    with CapabilityCache() as cache:
+        netconf_filter = device_filters(inventory, cache=cache)
+
+    started = time.monotonic()
+    with ParsePool(parse_workers) as parse_pool:
+        results, errors = collect_fleet(inventory, netconf_filter, max_workers=max_workers, on_result=print_progress,
+                                        parse_pool=parse_pool)
+    elapsed = time.monotonic() - started
+
+    # index the hellos we just received so later tools can query them offline
+    with CapabilityCache() as cache:
+        for host, result in results.items():
+            cache.store(host, result["capabilities"])
+
+    # keep every sweep queryable across time and devices (see Fleet/snapshot_store.py)
+    with SnapshotStore() as store:
+        for host, result in results.items():
+            store.append("interfaces", host, result["records"], result["collected_at"])
+            store.append("capabilities", host, [{"capability": c} for c in result["capabilities"]],
+                         result["collected_at"])
+
+    print('*' * 50)
+    print(f"Devices: {len(inventory)}  OK: {len(results)}  Failed: {len(errors)}  "
+          f"Wall time: {elapsed:.1f}s  Workers: {max_workers}  Parse workers: {parse_workers}")
+    for host, error in sorted(errors.items()):
+        print(f"  {host}: {error}")
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main(sys.argv))
@@ -0,0 +1,42 @@
+### Modify description and IP of several interfaces in one NETCONF transaction.
+    # All changes are merged into a single <config> pushed to the candidate datastore,
+    # followed by a confirmed commit and the confirming commit.
+
+# Pre-check: one get_config for all interfaces; interfaces already correct are left out.
+# Rollback: on any failure the candidate is discarded / the pending confirmed commit is
+#           cancelled; if the session dies the device reverts when the confirm timeout expires.
+# Falls back to the shut / modify / no shut sequence per interface when the device
+# does not advertise :candidate (IOS-XE: "netconf-yang feature candidate-datastore").
+
+# Note: This version does not include saving running-config to startup-config!
+
+from device_info import device
+from interface_edit import apply_changes_candidate, apply_interface_changes, supports_candidate, CONFIRM_TIMEOUT
+from netconf_session_pool import NetconfSessionPool
+
+# -----------------------------
+# CONFIGURATION PARAMETERS
+# -----------------------------
+changes = [
+    {"iface_id": "2", "interface_desc": "dragonka_safe_update_via_NETCONF",
+     "ip_address": "192.168.151.99", "subnet_mask": "255.255.255.0"},
+    {"iface_id": "3", "interface_desc": "dragonka_safe_update_via_NETCONF",
+     "ip_address": "192.168.152.99", "subnet_mask": "255.255.255.0"},
+]
+
+# -----------------------------
+# CONNECT AND EXECUTE TRANSACTION
+# -----------------------------
+if __name__ == "__main__":
+    with NetconfSessionPool(max_sessions_per_device=1) as pool:
+        try:
+            with pool.session(device) as m:
+                candidate, _ = supports_candidate(m)
+                if candidate:
+                    committed = apply_changes_candidate(m, changes, confirm_timeout=CONFIRM_TIMEOUT)
+                    print(f"Committed {len(committed)} interface change(s) in one transaction.")
+            if not candidate:
+                print("Device has no candidate datastore, applying changes per interface.")
+                apply_interface_changes(pool, device, changes)
+        except (Exception, SystemExit) as e:
+            print(f"NETCONF operation failed: {e}")
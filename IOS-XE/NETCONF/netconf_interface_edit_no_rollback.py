@@ -12,29 +12,12 @@
 
 # Note: This version does not include saving running-config to startup-config and no rollback!
 
-from ncclient import manager
-from ncclient.operations import RPCError
-from lxml import etree
-from device_info import device
-import xml.dom.minidom
-
-# -----------------------------
-# TEMPLATE PATHS
-# -----------------------------
-SHUT_TEMPLATE_PATH = "/home/zolcs/Network/IOS-XE/NETCONF/ios_shut.xml"
-MODIFY_TEMPLATE_PATH = "/home/zolcs/Network/IOS-XE/NETCONF/ios_modify.xml"
-NO_SHUT_TEMPLATE_PATH = "/home/zolcs/Network/IOS-XE/NETCONF/ios_no_shut.xml"
-
-# -----------------------------
-# LOAD TEMPLATES
-# -----------------------------
-def load_template(path):
-    with open(path, "r", encoding="utf-8") as fh:
-        return fh.read()
+# Helpers live in interface_edit.py; the session comes from netconf_session_pool.py so
+# several runs of apply_interface_change in one process reuse the same NETCONF session.
 
-shut_template = load_template(SHUT_TEMPLATE_PATH)
-modify_template = load_template(MODIFY_TEMPLATE_PATH)
-no_shut_template = load_template(NO_SHUT_TEMPLATE_PATH)
+from device_info import device
+from interface_edit import ManagementInterfaceError, apply_interface_change, check_not_management
+from netconf_session_pool import NetconfSessionPool
 
 # -----------------------------
 # CONFIGURATION PARAMETERS
@@ -48,99 +31,18 @@ management_iface = "1"  # e.g., GigabitEthernet1 for management
 # -----------------------------
 # SAFETY CHECK: Do not touch management interface
 # -----------------------------
-if iface_id == management_iface:
-    raise SystemExit(f"Refusing to modify management interface Gi{iface_id}")
-
-# -----------------------------
-# HELPER FUNCTIONS
-# -----------------------------
-def push_config(m, xml_payload, step_name):
-    print(f"🔹 {step_name} ...")
-    reply = m.edit_config(target="running", config=xml_payload)
-    try:
-        pretty = xml.dom.minidom.parseString(reply.xml.encode()).toprettyxml(indent="  ")
-        print(pretty)
-    except Exception:
-        print(reply)
-
-def get_interface_config(m, iface):
-    filter_xml = f"""
-    <filter>
-      <native xmlns="http://cisco.com/ns/yang/Cisco-IOS-XE-native">
-        <interface>
-          <GigabitEthernet>
-            <name>{iface}</name>
-          </GigabitEthernet>
-        </interface>
-      </native>
-    </filter>
-    """
-    try:
-        result = m.get_config(source="running", filter=filter_xml)
-        return etree.fromstring(result.xml.encode())
-    except RPCError as e:
-        print(f"Failed to fetch interface config: {e}")
-        return None
-
-def needs_change(config_xml):
-    """Return True if IP or description differ from desired"""
-    ns = {"xe": "http://cisco.com/ns/yang/Cisco-IOS-XE-native"}
-    # Check description
-    desc_elem = config_xml.find(".//xe:description", ns)
-    desc = desc_elem.text if desc_elem is not None else ""
-    if desc != interface_desc:
-        return True
-    # Check IP
-    ip_elem = config_xml.find(".//xe:ip/xe:address/xe:primary/xe:address", ns)
-    mask_elem = config_xml.find(".//xe:ip/xe:address/xe:primary/xe:mask", ns)
-    ip_current = ip_elem.text if ip_elem is not None else ""
-    mask_current = mask_elem.text if mask_elem is not None else ""
-    if ip_current != ip_address or mask_current != subnet_mask:
-        return True
-    return False
-
-# -----------------------------
-# FORMAT TEMPLATES
-# -----------------------------
-shut_config = shut_template.format(iface_id=iface_id)
-modify_config = modify_template.format(
-    iface_id=iface_id,
-    interface_desc=interface_desc,
-    ip_address=ip_address,
-    subnet_mask=subnet_mask
-)
-no_shut_config = no_shut_template.format(iface_id=iface_id)
+try:
+    check_not_management(iface_id, management_iface)
+except ManagementInterfaceError as e:
+    raise SystemExit(e)
 
 # -----------------------------
 # CONNECT AND EXECUTE SEQUENCE
 # -----------------------------
-try:
-    with manager.connect(
-        host=device["host"],
-        port=int(device.get("port", 830)),
-        username=device["username"],
-        password=device["password"],
-        hostkey_verify=False,
-        timeout=30
-    ) as m:
-
-        # Fetch current interface config
-        current_config = get_interface_config(m, iface_id)
-        if current_config is None:
-            raise SystemExit("Cannot fetch interface config. Aborting.")
-
-        # Determine if change is needed
-        if not needs_change(current_config):
-            print(f"Interface Gi{iface_id} already has desired IP and description. No changes needed.")
-        else:
-            # 1️⃣ Shut interface
-            push_config(m, shut_config, "Shutting interface")
-
-            # 2️⃣ Apply modifications
-            push_config(m, modify_config, "Modifying interface")
-
-            # 3️⃣ Bring interface back up
-            push_config(m, no_shut_config, "Bringing interface up")
-
-except Exception as e:
-    print(f"NETCONF operation failed: {e}")
+if __name__ == "__main__":
+    with NetconfSessionPool(max_sessions_per_device=1) as pool:
+        try:
+            with pool.session(device) as m:
+                apply_interface_change(m, iface_id, interface_desc, ip_address, subnet_mask, rollback=False)
+        except (Exception, SystemExit) as e:
+            print(f"NETCONF operation failed: {e}")
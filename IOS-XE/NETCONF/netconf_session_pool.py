@@ -0,0 +1,219 @@
+### Pool of long-lived NETCONF sessions, keyed by device
+### Used by interface_edit.py so that a batch of edits pays the SSH + hello exchange once per device.
+
+# with pool.session(device) as m:
+#     m.get_config(...)
+#
+# - at most max_sessions_per_device sessions are open per device; extra borrowers wait
+# - sessions are health checked when borrowed and dropped if the transport died
+# - SSH keepalives keep idle sessions from being torn down by the device
+# - a background janitor closes sessions that stayed idle longer than idle_timeout
+
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from ncclient import manager
+from ncclient.operations import RPCError
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from instrumentation import operation
+
+# -----------------------------
+# DEFAULTS
+# -----------------------------
+MAX_SESSIONS_PER_DEVICE = 2
+IDLE_TIMEOUT = 300          # seconds an unused session is kept open
+KEEPALIVE_INTERVAL = 30     # seconds between SSH keepalives on open sessions
+CONNECT_TIMEOUT = 30        # same as the edit scripts used for manager.connect
+
+
+class PoolTimeout(Exception):
+    """Raised when no session for a device became free in time."""
+
+
+class NetconfSessionPool:
+    """Thread-safe pool of ncclient managers, keyed by (host, port, username)."""
+
+    def __init__(self, max_sessions_per_device=MAX_SESSIONS_PER_DEVICE, idle_timeout=IDLE_TIMEOUT,
+                 keepalive_interval=KEEPALIVE_INTERVAL, connect_timeout=CONNECT_TIMEOUT):
+        self.max_sessions_per_device = max_sessions_per_device
+        self.idle_timeout = idle_timeout
+        self.keepalive_interval = keepalive_interval
+        self.connect_timeout = connect_timeout
+        self._cond = threading.Condition()
+        self._idle = {}      # key -> [(manager, last_used), ...]
+        self._open = {}      # key -> number of sessions open (idle + borrowed + connecting)
+        self._closed = False
+        self._janitor = threading.Thread(target=self._janitor_loop, name="netconf-pool-janitor", daemon=True)
+        self._janitor.start()
+
+    # -----------------------------
+    # PUBLIC API
+    # -----------------------------
+    @contextmanager
+    def session(self, dev, timeout=None):
+        """Borrow a warm session for dev for the duration of the with block."""
+        m = self.acquire(dev, timeout=timeout)
+        try:
+            yield m
+        except RPCError:
+            # the device answered, the session itself is fine
+            self.release(dev, m)
+            raise
+        except BaseException:
+            # SystemExit / KeyboardInterrupt too: the slot must come back, or the next
+            # borrower of a max_sessions_per_device=1 pool waits forever
+            self.release(dev, m, discard=True)
+            raise
+        else:
+            self.release(dev, m)
+
+    def acquire(self, dev, timeout=None):
+        """Return an open manager for dev, connecting only if no idle one is available."""
+        key = self._key(dev)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        dead = []
+        try:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Session pool is closed")
+                    idle = self._idle.get(key)
+                    while idle:
+                        m, _ = idle.pop()
+                        if self._healthy(m):
+                            return m
+                        self._drop(key)
+                        dead.append(m)
+                    if self._open.get(key, 0) < self.max_sessions_per_device:
+                        # reserve the slot, connect outside the lock
+                        self._open[key] = self._open.get(key, 0) + 1
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise PoolTimeout(f"No free NETCONF session for {dev['host']} within {timeout}s")
+                    self._cond.wait(remaining)
+        finally:
+            self._close(dead)
+
+        try:
+            return self._connect(dev)
+        except Exception:
+            with self._cond:
+                self._open[key] -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, dev, m, discard=False):
+        """Give a borrowed manager back; discard=True closes it instead of keeping it warm."""
+        key = self._key(dev)
+        with self._cond:
+            if discard or self._closed or not self._healthy(m):
+                self._drop(key)
+                m_to_close = [m]
+            else:
+                self._idle.setdefault(key, []).append((m, time.monotonic()))
+                m_to_close = []
+            self._cond.notify()
+        self._close(m_to_close)
+
+    def evict_idle(self, max_idle=None):
+        """Close idle sessions unused for longer than max_idle (default idle_timeout)."""
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        evicted = []
+        with self._cond:
+            for key, idle in self._idle.items():
+                keep = []
+                for m, last_used in idle:
+                    if now - last_used > max_idle or not self._healthy(m):
+                        self._drop(key)
+                        evicted.append(m)
+                    else:
+                        keep.append((m, last_used))
+                idle[:] = keep
+            self._cond.notify_all()
+        self._close(evicted)
+        return len(evicted)
+
+    def stats(self):
+        """Return {host:port:user: (open, idle)} for logging."""
+        with self._cond:
+            return {
+                ":".join(str(part) for part in key): (count, len(self._idle.get(key, [])))
+                for key, count in self._open.items() if count
+            }
+
+    def close_all(self):
+        """Close every idle session and refuse new borrows; borrowed ones close on release."""
+        idle_sessions = []
+        with self._cond:
+            self._closed = True
+            for key, idle in self._idle.items():
+                for m, _ in idle:
+                    self._drop(key)
+                    idle_sessions.append(m)
+                idle.clear()
+            self._cond.notify_all()
+        self._close(idle_sessions)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close_all()
+
+    # -----------------------------
+    # INTERNALS
+    # -----------------------------
+    @staticmethod
+    def _key(dev):
+        return (dev["host"], int(dev.get("port", 830)), dev["username"])
+
+    @staticmethod
+    def _healthy(m):
+        try:
+            return bool(m.connected)
+        except Exception:
+            return False
+
+    def _connect(self, dev):
+        with operation(dev["host"], "connect", phase="connect"):
+            m = manager.connect(
+                host=dev["host"],
+                port=int(dev.get("port", 830)),
+                username=dev["username"],
+                password=dev["password"],
+                hostkey_verify=False,
+                timeout=self.connect_timeout
+            )
+        # SSH-level keepalive so devices do not drop sessions that sit idle in the pool
+        transport = getattr(getattr(m, "_session", None), "_transport", None)
+        if transport is not None and self.keepalive_interval:
+            try:
+                transport.set_keepalive(self.keepalive_interval)
+            except Exception:
+                pass
+        return m
+
+    def _drop(self, key):
+        """Free one session slot of key. Caller holds the lock."""
+        self._open[key] = max(0, self._open.get(key, 0) - 1)
+
+    @staticmethod
+    def _close(sessions):
+        """Close sessions outside the lock; dead transports may take a while to fail."""
+        for m in sessions:
+            try:
+                m.close_session()
+            except Exception:
+                pass
+
+    def _janitor_loop(self):
+        interval = max(1, min(self.idle_timeout, self.keepalive_interval) / 2)
+        while not self._closed:
+            time.sleep(interval)
+            self.evict_idle()
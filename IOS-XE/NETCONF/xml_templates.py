@@ -0,0 +1,187 @@
+### Compiled XML payload templates for the ios_*.xml files
+### Templates are loaded once from this directory, checked to be well-formed XML, and
+### rendered with validated, XML-escaped parameters.
+
+# A template is plain XML with {placeholders} (the same files str.format used before).
+# Template() splits it once into literal chunks and fields and strips the
+# indentation between tags, so render() is one validation per parameter plus a join.
+# render_many() repeats one element of the template (e.g. <GigabitEthernet>) for every
+# item, so a 500-interface payload comes from the same compiled template:
+#
+#     modify = get_template("ios_modify.xml")
+#     modify.render(iface_id=2, interface_desc="uplink", ip_address="10.0.0.1", subnet_mask="255.255.255.0")
+#     modify.render_many(changes, repeat="GigabitEthernet")
+
+import ipaddress
+import re
+import string
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+TEMPLATE_DIR = Path(__file__).resolve().parent
+MAX_DESCRIPTION = 200         # IOS-XE interface description limit
+
+# placeholder name -> parameter type; anything else is free text
+PARAM_TYPES = {
+    "iface_id": "iface",
+    "ip_address": "ipv4",
+    "subnet_mask": "mask",
+    "interface_desc": "description",
+}
+
+_IFACE_ID = re.compile(r"^\d+(?:/\d+){0,3}(?:\.\d+)?$")     # 1, 0/0/1, 1/0/1.100
+_CONTROL = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_BETWEEN_TAGS = re.compile(r">\s+<")
+
+
+class TemplateError(ValueError):
+    """Malformed template or invalid parameter value."""
+
+
+# -----------------------------
+# PARAMETER VALIDATION
+# -----------------------------
+def _check_iface(name, value, allow_empty):
+    value = str(value).strip()
+    if not _IFACE_ID.match(value):
+        raise TemplateError(f"{name}: '{value}' is not an interface id like 2 or 1/0/2")
+    return value
+
+def _check_ipv4(name, value, allow_empty):
+    value = str(value).strip()
+    if allow_empty and not value:
+        return value
+    try:
+        return str(ipaddress.IPv4Address(value))
+    except ValueError:
+        raise TemplateError(f"{name}: '{value}' is not an IPv4 address") from None
+
+def _check_mask(name, value, allow_empty):
+    value = str(value).strip()
+    if allow_empty and not value:
+        return value
+    try:
+        bits = int(ipaddress.IPv4Address(value))
+    except ValueError:
+        raise TemplateError(f"{name}: '{value}' is not a netmask") from None
+    inverted = ~bits & 0xFFFFFFFF
+    if inverted & (inverted + 1):
+        raise TemplateError(f"{name}: '{value}' is not a contiguous netmask")
+    return value
+
+def _check_description(name, value, allow_empty):
+    value = "" if value is None else str(value)
+    if len(value) > MAX_DESCRIPTION:
+        raise TemplateError(f"{name}: longer than {MAX_DESCRIPTION} characters")
+    if _CONTROL.search(value):
+        raise TemplateError(f"{name}: contains control characters")
+    return escape(value)
+
+def _check_text(name, value, allow_empty):
+    if value is None:
+        raise TemplateError(f"{name}: missing value")
+    return _check_description(name, value, allow_empty)
+
+VALIDATORS = {
+    "iface": _check_iface,
+    "ipv4": _check_ipv4,
+    "mask": _check_mask,
+    "description": _check_description,
+    "text": _check_text,
+}
+
+# values that pass these validators contain nothing that needs escaping
+SAMPLE_VALUES = {"iface": "1", "ipv4": "192.0.2.1", "mask": "255.255.255.0", "description": "x", "text": "x"}
+
+
+# -----------------------------
+# COMPILED TEMPLATE
+# -----------------------------
+class Template:
+    """A compiled template: literal chunks, fields in order and one validator per field."""
+
+    def __init__(self, text, name="<string>", check_xml=True):
+        self.name = name
+        self.text = _BETWEEN_TAGS.sub("><", text.strip())
+        self.parts = []               # literal, field, literal, field, ..., literal
+        self.fields = []
+        literal = ""
+        try:
+            for text_part, field, spec, conversion in string.Formatter().parse(self.text):
+                literal += text_part
+                if field is None:
+                    continue
+                if spec or conversion or not field.isidentifier():
+                    raise TemplateError(f"{name}: only plain {{name}} placeholders are supported, got {{{field}}}")
+                self.parts.append(literal)
+                self.fields.append(field)
+                literal = ""
+        except ValueError as e:
+            raise TemplateError(f"{name}: {e}") from None
+        self.parts.append(literal)
+        self.validators = [VALIDATORS[PARAM_TYPES.get(f, "text")] for f in self.fields]
+        self.field_names = frozenset(self.fields)
+        # fail at load time, not on the device, if the template itself is broken
+        if check_xml:
+            try:
+                ET.fromstring(self._join([SAMPLE_VALUES[PARAM_TYPES.get(f, "text")] for f in self.fields]))
+            except ET.ParseError as e:
+                raise TemplateError(f"{name}: not well-formed XML: {e}") from None
+        self._repeat = {}
+
+    def _join(self, values):
+        out = [self.parts[0]]
+        for value, literal in zip(values, self.parts[1:]):
+            out.append(value)
+            out.append(literal)
+        return "".join(out)
+
+    def values(self, params, allow_empty=False):
+        """Validated and escaped values in field order; raises TemplateError."""
+        missing = self.field_names.difference(params)
+        if missing:
+            raise TemplateError(f"{self.name}: missing parameter(s) {', '.join(sorted(missing))}")
+        return [check(field, params[field], allow_empty) for field, check in zip(self.fields, self.validators)]
+
+    def render(self, params=None, allow_empty=False, **kwargs):
+        """Payload for one set of parameters (a dict and/or keyword arguments).
+
+        allow_empty=True accepts "" for IP and mask (e.g. restoring an interface that had none).
+        """
+        if kwargs:
+            params = dict(params or {}, **kwargs)
+        return self._join(self.values(params or {}, allow_empty))
+
+    def _repeat_split(self, repeat):
+        """(head, compiled repeated element, tail) around the first <repeat> element."""
+        if repeat not in self._repeat:
+            start = re.search(rf"<{re.escape(repeat)}[\s>/]", self.text)
+            close = f"</{repeat}>"
+            end = self.text.find(close, start.start()) if start else -1
+            if start is None or end == -1:
+                raise TemplateError(f"{self.name}: no <{repeat}> element to repeat")
+            end += len(close)
+            head, body, tail = self.text[:start.start()], self.text[start.start():end], self.text[end:]
+            if "{" in head or "{" in tail:
+                raise TemplateError(f"{self.name}: placeholders outside <{repeat}> cannot be repeated")
+            # the fragment may use prefixes declared in head; the whole template was checked already
+            self._repeat[repeat] = (head, Template(body, f"{self.name}:{repeat}", check_xml=False), tail)
+        return self._repeat[repeat]
+
+    def render_many(self, items, repeat, allow_empty=False):
+        """One payload with the <repeat> element rendered once per parameter dict in items."""
+        head, body, tail = self._repeat_split(repeat)
+        return head + "".join(body._join(body.values(item, allow_empty)) for item in items) + tail
+
+
+@lru_cache(maxsize=None)
+def get_template(name, directory=TEMPLATE_DIR):
+    """Compiled template by file name, relative to this directory (loaded once per process)."""
+    path = Path(directory) / name
+    with open(path, "r", encoding="utf-8") as fh:
+        return Template(fh.read(), name=path.name)
@@ -0,0 +1,336 @@
+### YANG-push telemetry receiver: the device pushes ietf-interfaces state instead of us polling it
+### Periodic and on-change subscriptions over one NETCONF session; updates land in a local state table.
+#
+#   python yang_push_receiver.py                               # periodic, every 10 s
+#   python yang_push_receiver.py --on-change --period 0        # on-change only
+#   python yang_push_receiver.py --host 127.0.0.1 --port 8300  # against ../../Simulators/netconf_simulator.py
+#
+# Two RPC flavors exist. IOS-XE 16.x (see netconf_capabilities_192.168.150.201.txt)
+# implements the drafts: ietf-event-notifications 2016-10-27 + ietf-yang-push 2016-10-28.
+# Newer software implements RFC 8639/8641 (ietf-subscribed-notifications). The flavor
+# is picked from the hello capabilities.
+#
+# ncclient's default NotificationHandler builds a full lxml tree for every notification
+# and queues it until take_notification() is called. PushListener replaces it: it
+# queues the raw text only, and the receiver runs interface_stream_parser over it, so
+# each push is parsed once, one interface at a time.
+
+import argparse
+import queue
+import threading
+import time
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+from ncclient import manager
+from ncclient.operations import RPCError
+from ncclient.transport.session import NotificationHandler, SessionListener
+from ncclient.xml_ import to_ele
+
+from device_info import device
+from interface_stream_parser import iter_interface_records, IF_NS, _as_stream
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+DEFAULT_XPATH = "/if:interfaces-state/interface"
+DEFAULT_PERIOD = 10           # seconds
+DEFAULT_DAMPENING = 0         # seconds; 0 = every change
+CONNECT_TIMEOUT = 30
+
+NOTIF_NS = "urn:ietf:params:xml:ns:netconf:notification:1.0"
+YP_NS = "urn:ietf:params:xml:ns:yang:ietf-yang-push"
+EN_NS = "urn:ietf:params:xml:ns:yang:ietf-event-notifications"      # draft flavor
+SN_NS = "urn:ietf:params:xml:ns:yang:ietf-subscribed-notifications"   # RFC 8639 flavor
+DS_NS = "urn:ietf:params:xml:ns:yang:ietf-datastores"
+
+DRAFT = "draft"
+RFC8641 = "rfc8641"
+
+# prefix -> namespace declared on the filter element, so XPath prefixes resolve
+XPATH_PREFIXES = {"if": IF_NS}
+
+# notifications that end a subscription
+TERMINATED = {"subscription-terminated", "subscription-killed", "subscription-suspended", "notificationComplete"}
+
+
+class SubscriptionError(Exception):
+    """The device rejected or does not support establish-subscription."""
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+
+# -----------------------------
+# SUBSCRIPTION RPCs
+# -----------------------------
+def subscription_flavor(capabilities):
+    """DRAFT or RFC8641 from the server capabilities, None if yang-push is not supported."""
+    caps = list(capabilities)
+    if any(c.startswith(SN_NS) for c in caps):
+        return RFC8641
+    if any(c.startswith(EN_NS) for c in caps) and any(c.startswith(YP_NS) for c in caps):
+        return DRAFT
+    return None
+
+def establish_subscription_xml(xpath, period=None, dampening=None, flavor=DRAFT):
+    """establish-subscription RPC body; period/dampening in seconds (sent as centiseconds).
+
+    period -> periodic subscription, dampening (0 allowed) -> on-change subscription.
+    """
+    if (period is None) == (dampening is None):
+        raise ValueError("give exactly one of period (periodic) or dampening (on-change)")
+    prefixes = "".join(f' xmlns:{p}="{ns}"' for p, ns in XPATH_PREFIXES.items())
+    xpath = escape(xpath)
+    if flavor == DRAFT:
+        trigger = (f"<yp:period>{int(period * 100)}</yp:period>" if period is not None
+                   else f"<yp:dampening-period>{int(dampening * 100)}</yp:dampening-period>")
+        return (f'<establish-subscription xmlns="{EN_NS}" xmlns:yp="{YP_NS}">'
+                f'<stream>yp:yang-push</stream>'
+                f'<yp:xpath-filter{prefixes}>{xpath}</yp:xpath-filter>'
+                f'{trigger}</establish-subscription>')
+    if flavor == RFC8641:
+        trigger = (f"<yp:periodic><yp:period>{int(period * 100)}</yp:period></yp:periodic>" if period is not None
+                   else f"<yp:on-change><yp:dampening-period>{int(dampening * 100)}</yp:dampening-period></yp:on-change>")
+        return (f'<establish-subscription xmlns="{SN_NS}" xmlns:yp="{YP_NS}">'
+                f'<yp:datastore xmlns:ds="{DS_NS}">ds:operational</yp:datastore>'
+                f'<yp:datastore-xpath-filter{prefixes}>{xpath}</yp:datastore-xpath-filter>'
+                f'{trigger}</establish-subscription>')
+    raise ValueError(f"unknown subscription flavor: {flavor}")
+
+def establish_subscription(m, xpath, period=None, dampening=None, flavor=None):
+    """Send establish-subscription on session m; returns the subscription id."""
+    flavor = flavor or subscription_flavor(m.server_capabilities)
+    if flavor is None:
+        raise SubscriptionError("device does not advertise ietf-yang-push subscriptions")
+    try:
+        reply = m.dispatch(to_ele(establish_subscription_xml(xpath, period, dampening, flavor)))
+    except RPCError as e:
+        raise SubscriptionError(f"establish-subscription rejected: {e}") from e
+    result = None
+    sub_id = None
+    for elem in ET.fromstring(reply.xml).iter():
+        name = _local(elem.tag)
+        if name == "subscription-result":
+            result = (elem.text or "").strip()
+        elif name in ("subscription-id", "id"):
+            sub_id = int(elem.text)
+    if result and not result.endswith(":ok") and result != "ok":
+        raise SubscriptionError(f"establish-subscription failed: {result}")
+    if sub_id is None:
+        raise SubscriptionError("establish-subscription reply has no subscription id")
+    return sub_id
+
+
+# -----------------------------
+# NOTIFICATION DECODING
+# -----------------------------
+class PushListener(SessionListener):
+    """Queues the raw text of every <notification>; nothing is parsed on the transport thread."""
+
+    def __init__(self, raw_q):
+        self.raw_q = raw_q
+
+    def callback(self, root, raw):
+        tag, _ = root
+        if tag == f"{{{NOTIF_NS}}}notification":
+            self.raw_q.put((time.time(), raw))
+
+    def errback(self, ex):
+        self.raw_q.put((time.time(), ex))
+
+def notification_kind(raw):
+    """(kind, subscription id) of a notification, reading only its first elements."""
+    kind = None
+    sub_id = None
+    depth = 0
+    for event, elem in ET.iterparse(_as_stream(raw), events=("start", "end")):
+        if event == "end":
+            if kind is not None and _local(elem.tag) in ("subscription-id", "id"):
+                sub_id = int(elem.text) if elem.text and elem.text.strip().isdigit() else None
+                break
+            depth -= 1
+            continue
+        depth += 1
+        if depth == 2 and _local(elem.tag) != "eventTime":
+            kind = _local(elem.tag)
+        elif depth > 3:
+            break         # past the id leaf: the data follows
+    return kind, sub_id
+
+
+class InterfaceStateTable:
+    """Latest known state per interface; push-updates and on-change deltas are merged leaf by leaf."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rows = {}            # name -> record (interface_stream_parser layout)
+        self.updated = {}         # name -> time of the last update
+        self.updates = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def apply(self, records, timestamp=None):
+        """Merge records; returns {name: {field: (old, new)}} for fields that changed."""
+        timestamp = timestamp or time.time()
+        changed = {}
+        with self.lock:
+            for record in records:
+                name = record["name"]
+                row = self.rows.get(name)
+                if row is None:
+                    row = self.rows[name] = {"name": name, "counters": {}}
+                diff = {}
+                for key, value in record.items():
+                    if value is None or key in ("name", "counters"):
+                        continue
+                    old = row.get(key)
+                    if old != value:
+                        diff[key] = (old, value)
+                        row[key] = value
+                if record.get("counters"):
+                    row["counters"].update(record["counters"])
+                self.updated[name] = timestamp
+                if diff:
+                    changed[name] = diff
+            self.updates += 1
+        return changed
+
+    def get(self, name):
+        with self.lock:
+            row = self.rows.get(name)
+            return dict(row, counters=dict(row["counters"])) if row else None
+
+    def snapshot(self):
+        with self.lock:
+            return {name: dict(row, counters=dict(row["counters"])) for name, row in self.rows.items()}
+
+
+# -----------------------------
+# RECEIVER
+# -----------------------------
+class YangPushReceiver:
+    """One NETCONF session with any number of subscriptions feeding an InterfaceStateTable."""
+
+    def __init__(self, dev, table=None, connect_timeout=CONNECT_TIMEOUT):
+        self.dev = dev
+        self.table = table or InterfaceStateTable()
+        self.raw_q = queue.Queue()
+        self.subscriptions = {}       # id -> "periodic" / "on-change"
+        self.terminated = {}          # id -> kind of the terminating notification
+        self.errors = []
+        self.m = manager.connect(
+            host=dev["host"],
+            port=int(dev.get("port", 830)),
+            username=dev["username"],
+            password=dev["password"],
+            hostkey_verify=False,
+            timeout=connect_timeout
+        )
+        session = self.m._session
+        default = session.get_listener_instance(NotificationHandler)
+        if default is not None:
+            session.remove_listener(default)    # would keep a parsed copy of every push forever
+        session.add_listener(PushListener(self.raw_q))
+        self.flavor = subscription_flavor(self.m.server_capabilities)
+
+    def subscribe_periodic(self, xpath=DEFAULT_XPATH, period=DEFAULT_PERIOD):
+        sub_id = establish_subscription(self.m, xpath, period=period, flavor=self.flavor)
+        self.subscriptions[sub_id] = "periodic"
+        return sub_id
+
+    def subscribe_on_change(self, xpath=DEFAULT_XPATH, dampening=DEFAULT_DAMPENING):
+        sub_id = establish_subscription(self.m, xpath, dampening=dampening, flavor=self.flavor)
+        self.subscriptions[sub_id] = "on-change"
+        return sub_id
+
+    def handle(self, timestamp, raw):
+        """Decode one notification into the table; returns (kind, sub_id, changes)."""
+        kind, sub_id = notification_kind(raw)
+        if kind in TERMINATED:
+            self.terminated[sub_id] = kind
+            self.subscriptions.pop(sub_id, None)
+            return kind, sub_id, {}
+        if kind not in ("push-update", "push-change-update"):
+            return kind, sub_id, {}
+        return kind, sub_id, self.table.apply(iter_interface_records(raw), timestamp)
+
+    def run(self, duration=None, on_update=None, stop=None):
+        """Process notifications until duration elapses, stop is set or all subscriptions end.
+
+        on_update(kind, sub_id, changes) is called for every push.
+        """
+        deadline = time.monotonic() + duration if duration else None
+        while self.subscriptions and not (stop and stop.is_set()):
+            wait = 1.0 if deadline is None else min(1.0, deadline - time.monotonic())
+            if wait <= 0:
+                break
+            try:
+                timestamp, raw = self.raw_q.get(timeout=wait)
+            except queue.Empty:
+                if not self.m.connected:
+                    raise SubscriptionError("NETCONF session closed by the device")
+                continue
+            if isinstance(raw, Exception):
+                self.errors.append(raw)
+                continue
+            kind, sub_id, changes = self.handle(timestamp, raw)
+            if on_update and kind in ("push-update", "push-change-update"):
+                on_update(kind, sub_id, changes)
+
+    def close(self):
+        # dynamic subscriptions end with the session that created them
+        if self.m.connected:
+            try:
+                self.m.close_session()
+            except Exception:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def print_update(kind, sub_id, changes):
+    stamp = time.strftime("%H:%M:%S")
+    if kind == "push-update" and not changes:
+        print(f"{stamp} {sub_id} {kind}: no state change")
+    for name, diff in sorted(changes.items()):
+        fields = ", ".join(f"{k}: {old} -> {new}" for k, (old, new) in sorted(diff.items()))
+        print(f"{stamp} {sub_id} {kind} {name}: {fields}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="YANG-push ietf-interfaces state receiver")
+    parser.add_argument("--host", help="override device_info host (e.g. 127.0.0.1 for the simulator)")
+    parser.add_argument("--port", help="override device_info port")
+    parser.add_argument("--xpath", default=DEFAULT_XPATH)
+    parser.add_argument("--period", type=float, default=DEFAULT_PERIOD, help="periodic push interval in s, 0 = none")
+    parser.add_argument("--on-change", action="store_true", help="also subscribe on-change")
+    parser.add_argument("--dampening", type=float, default=DEFAULT_DAMPENING)
+    parser.add_argument("--duration", type=float, help="stop after this many seconds")
+    args = parser.parse_args()
+
+    dev = dict(device)
+    if args.host:
+        dev["host"] = args.host
+    if args.port:
+        dev["port"] = args.port
+
+    with YangPushReceiver(dev) as receiver:
+        print(f"Connected to {dev['host']}, subscription flavor: {receiver.flavor}")
+        try:
+            if args.period:
+                print(f"periodic subscription id {receiver.subscribe_periodic(args.xpath, args.period)}")
+            if args.on_change:
+                print(f"on-change subscription id {receiver.subscribe_on_change(args.xpath, args.dampening)}")
+            receiver.run(duration=args.duration, on_update=print_update)
+        except SubscriptionError as e:
+            print(f"Subscription failed: {e}")
+        except KeyboardInterrupt:
+            pass
+        print(f"{len(receiver.table)} interfaces in the state table after {receiver.table.updates} pushes")
@@ -1,4 +1,7 @@
 device = {"host": "192.168.150.201",
           "port": "443",
           "username": "admin",
-          "password": "admin"}
\ No newline at end of file
+          "password": "admin"}
+
+# Inventory used by the fleet scripts; extend with one dict per device.
+devices = [device]
\ No newline at end of file
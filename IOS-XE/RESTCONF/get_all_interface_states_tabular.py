@@ -0,0 +1,113 @@
+### Tabular state of ALL interfaces of an IOS-XE device with a single RESTCONF GET
+### fields= trims the reply to the shown columns; rows are decoded and printed as they arrive.
+#
+#   python get_all_interface_states_tabular.py
+#   python get_all_interface_states_tabular.py --oper down --match Gigabit
+#   python get_all_interface_states_tabular.py --columns Interface Oper-state In-octets --sort In-octets --reverse --limit 20
+#
+# Without --sort memory stays at one interface. With --sort only the compact row tuples
+# are kept, and with --limit only the top N of them (heap), never the decoded JSON.
+
+import argparse
+import heapq
+import requests
+from device_info import device
+from requests.exceptions import RequestException
+from restconf_interfaces import (
+    HEADERS,
+    COLUMNS,
+    DEFAULT_COLUMNS,
+    StreamingTable,
+    interfaces_url,
+    interface_row,
+    iter_json_array_items,
+)
+
+requests.packages.urllib3.disable_warnings()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="All-interfaces RESTCONF state table")
+    parser.add_argument("--columns", nargs="+", default=DEFAULT_COLUMNS, choices=list(COLUMNS))
+    parser.add_argument("--sort", choices=list(COLUMNS), help="column to sort by")
+    parser.add_argument("--reverse", action="store_true", help="sort descending")
+    parser.add_argument("--limit", type=int, help="print at most N rows")
+    parser.add_argument("--admin", choices=["up", "down"], help="only rows with this admin-state")
+    parser.add_argument("--oper", choices=["up", "down"], help="only rows with this oper-state")
+    parser.add_argument("--match", help="only interfaces whose name contains this text")
+    parser.add_argument("--depth", type=int, help="RESTCONF depth= query parameter")
+    return parser.parse_args()
+
+def row_filter(args, columns):
+    """Build a predicate over row tuples from the command line filters."""
+    checks = []
+    if args.match:
+        idx = columns.index("Interface")
+        checks.append(lambda r: args.match in r[idx])
+    for column, wanted in (("Admin-state", args.admin), ("Oper-state", args.oper)):
+        if wanted:
+            if column not in columns:
+                columns.append(column)
+            idx = columns.index(column)
+            checks.append(lambda r, idx=idx, wanted=wanted: r[idx] == wanted)
+    return lambda r: all(check(r) for check in checks)
+
+def sort_value(value):
+    """Numeric columns sort as numbers, everything else as text."""
+    try:
+        return (0, int(value), "")
+    except ValueError:
+        return (1, 0, value)
+
+def main():
+    args = parse_args()
+    columns = list(args.columns)
+    if "Interface" not in columns:
+        columns.insert(0, "Interface")
+    keep = row_filter(args, columns)
+    if args.sort and args.sort not in columns:
+        columns.append(args.sort)
+
+    url = interfaces_url(device, columns, depth=args.depth)
+
+    # use a session, add timeout and error handling, and access fields safely
+    session = requests.Session()
+    session.headers.update(HEADERS)
+
+    table = StreamingTable(columns)
+    try:
+        with session.get(url, auth=(device['username'], device['password']), verify=False,
+                         timeout=10, stream=True) as resp:
+            resp.raise_for_status()
+            resp.encoding = resp.encoding or "utf-8"
+            rows = (interface_row(iface, columns)
+                    for iface in iter_json_array_items(resp.iter_content(chunk_size=65536, decode_unicode=True),
+                                                       "interface"))
+            rows = (r for r in rows if keep(r))
+
+            print("\n")
+            table.header()
+            if args.sort:
+                idx = columns.index(args.sort)
+                if args.limit:
+                    pick = heapq.nlargest if args.reverse else heapq.nsmallest
+                    ordered = pick(args.limit, rows, key=lambda r: sort_value(r[idx]))
+                else:
+                    ordered = sorted(rows, key=lambda r: sort_value(r[idx]), reverse=args.reverse)
+                for r in ordered:
+                    table.row(r)
+            else:
+                for r in rows:
+                    table.row(r)
+                    if args.limit and table.count >= args.limit:
+                        break
+    except RequestException as e:
+        print(f"Request failed: {e}")
+        raise SystemExit(1)
+    except ValueError as e:
+        print(f"Failed to decode JSON response: {e}")
+        raise SystemExit(1)
+
+    print(f"\n{table.count} interface(s) shown")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+### Interface states across many IOS-XE devices over RESTCONF, on the async client
+### Inventory comes from `devices` in device_info.py, or from a file: a JSON list of device dicts
+### or a fleet inventory (Fleet/inventory.py), of which the devices with a restconf endpoint are used.
+#
+#   python get_interface_states_fleet.py                          # whole interface list per device
+#   python get_interface_states_fleet.py -i GigabitEthernet1 GigabitEthernet2
+#   python get_interface_states_fleet.py --inventory fleet.json --max-concurrency 500 --per-device 4
+#   python get_interface_states_fleet.py --inventory fleet.json --parse-workers 8
+#
+# All GETs share one pooled keep-alive session; rows are printed as each reply arrives.
+# With --parse-workers the replies are decoded into rows in worker processes
+# (Fleet/parse_pool.py), so the event loop only moves bytes; 0 decodes on the loop.
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from device_info import devices
+from restconf_async import AsyncRestconfClient, RestconfError, MAX_CONCURRENCY, PER_DEVICE, TIMEOUT
+from restconf_interfaces import (OPER_MODULE, DEFAULT_COLUMNS, StreamingTable, fields_param, interface_row,
+                                 interfaces_in)
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from inventory import Inventory, InventoryError
+from parse_pool import ParsePool, ParseError
+
+ROWS_PARSER = "restconf_interfaces:interface_rows_from_json"
+
+TABLE_COLUMNS = ["Device"] + DEFAULT_COLUMNS
+TABLE_WIDTHS = {"Device": 18, "Interface": 32, "Description": 40, "Admin-state": 11, "Oper-state": 10}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fleet-wide RESTCONF interface states")
+    parser.add_argument("--inventory", help="JSON list of device dicts or a fleet inventory file")
+    parser.add_argument("-i", "--interfaces", nargs="+", help="interface names; default is all interfaces")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--per-device", type=int, default=PER_DEVICE)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--parse-workers", type=int, default=0,
+                        help="processes decoding the replies (0: on the event loop)")
+    return parser.parse_args()
+
+def load_inventory(path=None):
+    if not path:
+        return list(devices)
+    try:
+        return Inventory.load(path, protocol="restconf").device_dicts("restconf")
+    except InventoryError as e:
+        raise SystemExit(f"Inventory {path}: {e}")
+
+def build_jobs(inventory, interfaces=None):
+    """One bulk GET per device, or one GET per (device, interface).
+
+    Interface names are percent-encoded as list keys, so the "/" of GigabitEthernet1/0/1 stays in the key.
+    """
+    if not interfaces:
+        params = {"fields": fields_param(DEFAULT_COLUMNS)}
+        return [(dev, f"{OPER_MODULE}:interfaces", params) for dev in inventory]
+    return [
+        (dev, f"{OPER_MODULE}:interfaces/interface={quote(name, safe='')}", None)
+        for dev in inventory for name in interfaces
+    ]
+
+async def run(args):
+    inventory = load_inventory(args.inventory)
+    jobs = build_jobs(inventory, args.interfaces)
+    table = StreamingTable(TABLE_COLUMNS, widths=TABLE_WIDTHS)
+    errors = []
+
+    with ParsePool(args.parse_workers) as pool:
+        async with AsyncRestconfClient(max_concurrency=args.max_concurrency, per_device=args.per_device,
+                                       timeout=args.timeout) as client:
+            async def fetch(dev, path, params):
+                if not pool.workers:
+                    data = await client.get(dev, path, params=params)
+                    return dev, [interface_row(iface) for iface in interfaces_in(data)]
+                body = await client.get(dev, path, params=params, raw=True)
+                try:
+                    return dev, await pool.parse_async(ROWS_PARSER, body)
+                except ParseError as e:
+                    raise RestconfError(dev["host"], f"failed to decode JSON response: {e}") from e
+
+            table.header()
+            for next_done in asyncio.as_completed([fetch(*job) for job in jobs]):
+                try:
+                    dev, rows = await next_done
+                except RestconfError as e:
+                    errors.append(str(e))
+                    continue
+                for row in rows:
+                    table.row((dev["host"],) + row)
+    return len(inventory), len(jobs), table.count, errors
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    device_count, job_count, row_count, errors = asyncio.run(run(args))
+    elapsed = time.monotonic() - started
+    print("/" * 50)
+    print(f"Devices: {device_count}  Requests: {job_count}  Rows: {row_count}  "
+          f"Failed: {len(errors)}  Wall time: {elapsed:.1f}s")
+    for error in errors:
+        print(f"  Request failed: {error}")
+
+if __name__ == "__main__":
+    main()
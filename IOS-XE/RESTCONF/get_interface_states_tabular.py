@@ -1,33 +1,15 @@
-import requests
-import json
 from device_info import device
-from requests.exceptions import RequestException
-
-requests.packages.urllib3.disable_warnings()
-
-# set REST API headers
-headers = {
-    "Accept": "application/yang-data+json",
-    "Content-Type": "application/yang-data+json",
-}
+from restconf_async import get_json, RestconfError
 
 interface = "GigabitEthernet1"
-url = f"https://{device['host']}:{device['port']}/restconf/data/Cisco-IOS-XE-interfaces-oper:interfaces/interface={interface}"
-
-# use a session, add timeout and error handling, and access fields safely
-session = requests.Session()
-session.headers.update(headers)
+path = f"Cisco-IOS-XE-interfaces-oper:interfaces/interface={interface}"
 
+# runs on the async client (pooled keep-alive session, timeout and error handling)
 try:
-    resp = session.get(url, auth=(device['username'], device['password']), verify=False, timeout=10)
-    resp.raise_for_status()
-    api_data = resp.json()
-except RequestException as e:
+    api_data = get_json(device, path, timeout=10)
+except RestconfError as e:
     print(f"Request failed: {e}")
     raise SystemExit(1)
-except ValueError:
-    print("Failed to decode JSON response")
-    raise SystemExit(1)
 
 # safe extraction of the interface container
 iface = api_data.get("Cisco-IOS-XE-interfaces-oper:interface", {})
@@ -0,0 +1,140 @@
+### asyncio RESTCONF client with pooled keep-alive connections across many devices
+### Requires aiohttp (pip install aiohttp).
+
+# One aiohttp session is shared by all requests: its connector keeps a pool of
+# keep-alive TLS connections per host, so a device pays the TLS handshake once per
+# run instead of once per GET. Replies are requested gzip-compressed. Requests go
+# through a Fleet/scheduler.py AsyncScheduler: at most max_concurrency in flight
+# overall, and per device a token bucket plus a concurrency limit that grows while
+# replies are fast and backs off (up to per_device, down to 1) on slow replies,
+# timeouts and 429/503. A 429/503 is retried after its Retry-After pause.
+#
+#     async with AsyncRestconfClient() as client:
+#         data = await client.get(device, "Cisco-IOS-XE-interfaces-oper:interfaces/interface=GigabitEthernet1")
+#
+# get_json() is a blocking wrapper for single-device scripts.
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import aiohttp
+
+from restconf_interfaces import HEADERS
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from scheduler import AsyncScheduler, THROTTLE_RETRIES, THROTTLE_STATUS, retry_after
+
+# -----------------------------
+# DEFAULTS
+# -----------------------------
+MAX_CONCURRENCY = 200      # requests in flight across all devices
+PER_DEVICE = 4             # most requests in flight per device (and pooled connections per host)
+TIMEOUT = 10               # seconds per request, same as the requests based scripts
+KEEPALIVE_TIMEOUT = 60     # seconds an idle pooled connection is kept open
+
+
+class RestconfError(Exception):
+    """A RESTCONF request failed (transport error, HTTP error or bad JSON)."""
+
+    def __init__(self, host, message, status=None):
+        super().__init__(f"{host}: {message}")
+        self.host = host
+        self.status = status
+
+
+class AsyncRestconfClient:
+    """Shared aiohttp session with global and adaptive per-device concurrency bounds."""
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, per_device=PER_DEVICE, timeout=TIMEOUT, verify=False,
+                 scheduler=None):
+        self.max_concurrency = max_concurrency
+        self.per_device = per_device
+        self.timeout = timeout
+        self.verify = verify
+        self.scheduler = scheduler or AsyncScheduler(global_limit=max_concurrency, max_limit=per_device,
+                                                     initial=min(2, per_device), target_latency=timeout / 2)
+        self._session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.per_device,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+            ssl=None if self.verify else False,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={**HEADERS, "Accept-Encoding": "gzip, deflate"},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    @staticmethod
+    def _device_key(dev):
+        return f"{dev['host']}:{dev.get('port', 443)}"
+
+    @staticmethod
+    def url(dev, path):
+        return f"https://{dev['host']}:{dev.get('port', 443)}/restconf/data/{path.lstrip('/')}"
+
+    async def request(self, method, dev, path, params=None, json_body=None, raw=False):
+        """Send one RESTCONF request; returns the decoded JSON body ({} for empty replies).
+
+        raw=True returns the undecoded body bytes (b"" for empty replies), e.g. for a
+        Fleet/parse_pool.py ParsePool to decode off the event loop.
+        """
+        auth = aiohttp.BasicAuth(dev["username"], dev["password"])
+        for attempt in range(THROTTLE_RETRIES + 1):
+            async with self.scheduler.slot(self._device_key(dev)) as slot:
+                try:
+                    async with self._session.request(method, self.url(dev, path), params=params,
+                                                     json=json_body, auth=auth) as resp:
+                        if resp.status in THROTTLE_STATUS and attempt < THROTTLE_RETRIES:
+                            slot.throttled(retry_after(resp.headers))
+                            continue
+                        if resp.status >= 400:
+                            text = await resp.text()
+                            raise RestconfError(dev["host"], f"HTTP {resp.status}: {text[:200]}", resp.status)
+                        if resp.status == 204:
+                            return b"" if raw else {}
+                        body = await resp.read()
+                        break
+                except asyncio.TimeoutError:
+                    slot.throttled()
+                    raise RestconfError(dev["host"], f"timed out after {self.timeout}s") from None
+                except aiohttp.ClientError as e:
+                    slot.failed()
+                    raise RestconfError(dev["host"], f"request failed: {e}") from e
+        if raw:
+            return body
+        if not body:
+            return {}
+        try:
+            return json.loads(body)
+        except ValueError as e:
+            raise RestconfError(dev["host"], f"failed to decode JSON response: {e}") from e
+
+    async def get(self, dev, path, params=None, raw=False):
+        return await self.request("GET", dev, path, params=params, raw=raw)
+
+    async def get_many(self, jobs):
+        """Run (dev, path[, params]) jobs concurrently; returns results in job order.
+
+        A failed job yields its RestconfError instead of raising, so one bad device
+        does not cancel the rest.
+        """
+        return await asyncio.gather(*(self.get(*job) for job in jobs), return_exceptions=True)
+
+
+def get_json(dev, path, params=None, timeout=TIMEOUT, verify=False):
+    """Blocking single GET on top of the async client (for one-device scripts)."""
+    async def _run():
+        async with AsyncRestconfClient(per_device=1, timeout=timeout, verify=verify) as client:
+            return await client.get(dev, path, params=params)
+    return asyncio.run(_run())
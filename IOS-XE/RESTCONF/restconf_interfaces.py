@@ -0,0 +1,197 @@
+### Shared helpers for the RESTCONF interface scripts
+### Bulk fetch of Cisco-IOS-XE-interfaces-oper:interfaces with fields=/depth= trimming,
+### incremental decoding of the interface list and a fixed-width streaming table renderer.
+
+import json
+
+OPER_MODULE = "Cisco-IOS-XE-interfaces-oper"
+
+# set REST API headers
+HEADERS = {
+    "Accept": "application/yang-data+json",
+    "Content-Type": "application/yang-data+json",
+}
+
+# table column -> leaf requested from the device
+COLUMNS = {
+    "Interface": "name",
+    "Description": "description",
+    "Admin-state": "admin-status",
+    "Oper-state": "oper-status",
+    "Speed": "speed",
+    "In-octets": "statistics/in-octets",
+    "Out-octets": "statistics/out-octets",
+}
+
+DEFAULT_COLUMNS = ["Interface", "Description", "Admin-state", "Oper-state"]
+
+# fixed widths so rows can be printed as they arrive (no second pass over all rows)
+COLUMN_WIDTHS = {
+    "Interface": 32,
+    "Description": 40,
+    "Admin-state": 11,
+    "Oper-state": 10,
+    "Speed": 12,
+    "In-octets": 16,
+    "Out-octets": 16,
+}
+
+# -----------------------------
+# URL BUILDING
+# -----------------------------
+def fields_param(columns):
+    """RESTCONF fields= value selecting only the leaves behind the given columns."""
+    plain = []
+    stats = []
+    for column in columns:
+        leaf = COLUMNS[column]
+        if leaf.startswith("statistics/"):
+            stats.append(leaf.split("/", 1)[1])
+        else:
+            plain.append(leaf)
+    if "name" not in plain:
+        plain.insert(0, "name")
+    if stats:
+        plain.append(f"statistics({';'.join(stats)})")
+    return f"interface({';'.join(plain)})"
+
+def interfaces_url(device, columns=DEFAULT_COLUMNS, depth=None):
+    """URL for the whole interface list, trimmed to the leaves the table shows."""
+    url = (f"https://{device['host']}:{device['port']}/restconf/data/"
+           f"{OPER_MODULE}:interfaces?fields={fields_param(columns)}")
+    if depth:
+        url += f"&depth={int(depth)}"
+    return url
+
+# -----------------------------
+# STATE NORMALIZATION
+# -----------------------------
+def normalize_admin(raw_admin):
+    """normalize admin-status to human-friendly form"""
+    raw_admin_lower = str(raw_admin or "").lower()
+    if "up" in raw_admin_lower:
+        return "up"
+    if "down" in raw_admin_lower:
+        return "down"
+    return raw_admin or "N/A"
+
+def normalize_oper(raw_oper):
+    """normalize oper-status to human-friendly form"""
+    raw_oper_lower = str(raw_oper or "").lower()
+    if "ready" in raw_oper_lower or "up" in raw_oper_lower:
+        return "up"
+    if "no-pass" in raw_oper_lower or "down" in raw_oper_lower:
+        return "down"
+    return raw_oper or "N/A"
+
+def interface_row(iface, columns=DEFAULT_COLUMNS):
+    """Compact tuple of display values for one interface object."""
+    row = []
+    for column in columns:
+        leaf = COLUMNS[column]
+        if leaf.startswith("statistics/"):
+            value = (iface.get("statistics") or {}).get(leaf.split("/", 1)[1])
+        else:
+            value = iface.get(leaf)
+        if leaf == "admin-status":
+            value = normalize_admin(value)
+        elif leaf == "oper-status":
+            value = normalize_oper(value)
+        row.append("N/A" if value in (None, "") else str(value))
+    return tuple(row)
+
+def interfaces_in(data):
+    """Interface objects from either a list reply or a single-interface reply."""
+    container = data.get(f"{OPER_MODULE}:interfaces")
+    if container is not None:
+        return container.get("interface", [])
+    single = data.get(f"{OPER_MODULE}:interface")
+    if isinstance(single, list):
+        return single
+    return [single] if single else []
+
+def interface_rows_from_json(body, columns=DEFAULT_COLUMNS):
+    """Display rows of a raw reply body; a Fleet/parse_pool.py parser (decodes in the worker)."""
+    data = json.loads(body) if body else {}
+    return [interface_row(iface, columns) for iface in interfaces_in(data)]
+
+# -----------------------------
+# INCREMENTAL JSON DECODING
+# -----------------------------
+def iter_json_array_items(chunks, key):
+    """Yield the objects of the first JSON array stored under key, one at a time.
+
+    chunks is an iterable of text pieces (e.g. resp.iter_content(decode_unicode=True)).
+    Only the current, not yet complete item is buffered, so memory is bounded by one
+    interface rather than the whole reply.
+    """
+    decoder = json.JSONDecoder()
+    marker = f'"{key}"'
+    buf = ""
+    pos = 0
+    in_array = False
+    chunks = iter(chunks)
+    exhausted = False
+
+    while True:
+        if not in_array:
+            idx = buf.find(marker)
+            if idx == -1:
+                # keep a tail in case the marker is split across chunks
+                buf = buf[-len(marker):]
+            else:
+                bracket = buf.find("[", idx + len(marker))
+                if bracket == -1:
+                    buf = buf[idx:]
+                else:
+                    in_array = True
+                    pos = bracket + 1
+        if in_array:
+            while True:
+                # skip whitespace and separators between items
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos < len(buf) and buf[pos] == "]":
+                    return
+                if pos >= len(buf):
+                    break
+                try:
+                    item, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    break  # item not complete yet, read more
+                yield item
+                pos = end
+            buf = buf[pos:]
+            pos = 0
+        if exhausted:
+            if in_array and buf.strip():
+                raise ValueError(f"Truncated JSON array under {key!r}")
+            return
+        try:
+            buf += next(chunks)
+        except StopIteration:
+            exhausted = True
+
+# -----------------------------
+# TABLE RENDERING
+# -----------------------------
+class StreamingTable:
+    """Print rows as they come, with fixed column widths; long values are truncated."""
+
+    def __init__(self, columns, widths=None, out=print):
+        self.columns = list(columns)
+        self.widths = [(widths or COLUMN_WIDTHS).get(c, max(len(c), 12)) for c in self.columns]
+        self.fmt = " | ".join(f"{{:{w}}}" for w in self.widths)
+        self.out = out
+        self.count = 0
+
+    def _fit(self, values):
+        return [v if len(v) <= w else v[:w - 1] + "…" for v, w in zip(values, self.widths)]
+
+    def header(self):
+        self.out(self.fmt.format(*self.columns))
+        self.out("-+-".join("-" * w for w in self.widths))
+
+    def row(self, values):
+        self.out(self.fmt.format(*self._fit([str(v) for v in values])))
+        self.count += 1
@@ -0,0 +1,105 @@
+### CDP / LLDP neighbor tables of an IOS-XE device over RESTCONF
+### Used by Fleet/topology.py (the NX-OS counterpart is NX-API CLI/nxapi_neighbors.py).
+#
+#     counts = neighbor_counts(session, dev)      # {"cdp": 2, "lldp": 2}
+#     name, found = neighbors(session, dev)       # own hostname, one dict per (protocol, local port)
+#
+# Cisco-IOS-XE-cdp-oper:cdp-neighbor-details has the management address the crawler
+# needs to reach the neighbor; Cisco-IOS-XE-lldp-oper:lldp-entries has none, so LLDP
+# neighbors come without an address (the crawler takes it from CDP or the inventory).
+# neighbor_counts() asks for the list keys only (fields=), so the probe reply is a few
+# bytes per neighbor. A protocol that is not running answers 404 and is left out.
+
+from restconf_interfaces import HEADERS
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+TIMEOUT = 10
+PROTOCOLS = ("cdp", "lldp")
+NATIVE_MODULE = "Cisco-IOS-XE-native"
+# protocol -> (resource, list node, key leaf)
+TABLES = {
+    "cdp": ("Cisco-IOS-XE-cdp-oper:cdp-neighbor-details", "cdp-neighbor-detail", "device-id"),
+    "lldp": ("Cisco-IOS-XE-lldp-oper:lldp-entries", "lldp-entry", "device-id"),
+}
+
+
+class NeighborError(Exception):
+    """The device answered none of the neighbor tables."""
+
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def get(session, dev, resource, params=None, scheduler=None, timeout=TIMEOUT):
+    """Decoded reply of one GET, or None when the resource does not exist (404)."""
+    url = f"https://{dev['host']}:{dev.get('port', 443)}/restconf/data/{resource}"
+    kwargs = {"headers": HEADERS, "params": params, "auth": (dev["username"], dev["password"]),
+              "verify": dev.get("verify", False), "timeout": timeout}
+    if scheduler is not None:
+        resp = scheduler.call(dev["host"], session.get, url, **kwargs)
+    else:
+        resp = session.get(url, **kwargs)
+    if resp.status_code in (204, 404):
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+def table_rows(data, protocol):
+    """Entries of the neighbor list in a reply (the container is module-qualified)."""
+    resource, list_node, _ = TABLES[protocol]
+    container = (data or {}).get(resource) or (data or {}).get(resource.split(":", 1)[1]) or {}
+    return container.get(list_node) or []
+
+def cdp_neighbor(entry):
+    return {
+        "name": entry.get("device-name") or "",
+        "address": entry.get("mgmt-address") or entry.get("ip-address") or None,
+        "platform": entry.get("platform-name") or "",
+        "local_intf": entry.get("local-intf-name") or "",
+        "remote_intf": entry.get("port-id") or "",
+        "protocol": "cdp",
+    }
+
+def lldp_neighbor(entry):
+    return {
+        "name": entry.get("device-id") or "",
+        "address": None,
+        "platform": "",
+        "local_intf": entry.get("local-interface") or "",
+        "remote_intf": entry.get("connecting-interface") or "",
+        "protocol": "lldp",
+    }
+
+# -----------------------------
+# NEIGHBORS
+# -----------------------------
+def neighbor_counts(session, dev, protocols=PROTOCOLS, scheduler=None, timeout=TIMEOUT):
+    """{protocol: neighbor count}, reading the list keys only; protocols not running are left out."""
+    counts = {}
+    for protocol in protocols:
+        resource, list_node, key = TABLES[protocol]
+        data = get(session, dev, resource, {"fields": f"{list_node}({key})"}, scheduler, timeout)
+        if data is not None:
+            counts[protocol] = len(table_rows(data, protocol))
+    if not counts:
+        raise NeighborError(f"{dev['host']}: neither {' nor '.join(protocols)} answered")
+    return counts
+
+def neighbors(session, dev, protocols=PROTOCOLS, scheduler=None, timeout=TIMEOUT):
+    """(hostname, [neighbor dicts: name, address, platform, local_intf, remote_intf, protocol])."""
+    data = get(session, dev, f"{NATIVE_MODULE}:native/hostname", None, scheduler, timeout) or {}
+    hostname = data.get(f"{NATIVE_MODULE}:hostname") or data.get("hostname") or ""
+    found = []
+    answered = False
+    for protocol in protocols:
+        data = get(session, dev, TABLES[protocol][0], None, scheduler, timeout)
+        if data is None:
+            continue
+        answered = True
+        parse = cdp_neighbor if protocol == "cdp" else lldp_neighbor
+        found.extend(parse(entry) for entry in table_rows(data, protocol))
+    if not answered:
+        raise NeighborError(f"{dev['host']}: neither {' nor '.join(protocols)} answered")
+    return hostname, [n for n in found if n["name"]]
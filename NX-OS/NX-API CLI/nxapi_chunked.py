@@ -0,0 +1,152 @@
+### NX-API CLI chunked output ("chunk": "1" + sid continuation) with incremental row parsing
+### Used by show_commands_chunked.py.
+
+# In chunk mode the switch returns the JSON text of ONE show command in pieces; every
+# reply carries a "sid" that must be sent back to get the next piece, until sid == "eoc".
+# iter_chunks() yields those text pieces as they arrive and iter_rows() pulls complete
+# ROW_* objects out of them one at a time, so memory stays at one chunk plus one row
+# no matter how many routes / MAC entries the table has.
+
+import json
+
+# row key holding the (large) table of common show commands
+ROW_KEYS = {
+    "show ip route": "ROW_prefix",
+    "show ipv6 route": "ROW_prefix",
+    "show mac address-table": "ROW_mac_address",
+    "show interface status": "ROW_interface",
+    "show interface": "ROW_interface",
+    "show ip interface brief": "ROW_intf",
+    "show cdp neighbors": "ROW_cdp_neighbor_brief_info",
+    "show lldp neighbors": "ROW_nbor",
+    "show ip arp": "ROW_adj",
+}
+
+END_OF_CHUNKS = "eoc"
+
+
+class NxapiError(Exception):
+    """NX-API returned an error code for the command."""
+
+
+def row_key_for(command):
+    """Best known ROW_* key for a show command, or None."""
+    command = " ".join(command.split()).lower()
+    for prefix in sorted(ROW_KEYS, key=len, reverse=True):
+        if command.startswith(prefix):
+            return ROW_KEYS[prefix]
+    return None
+
+def chunk_payload(command, sid="1"):
+    return {
+        "ins_api": {
+            "version": "1.0",
+            "type": "cli_show",
+            "chunk": "1",
+            "sid": sid,
+            "input": command,
+            "output_format": "json",
+        }
+    }
+
+def iter_chunks(session, url, command, verify=False, timeout=10, max_chunks=None):
+    """POST the command in chunk mode and yield the body text of every chunk in order."""
+    sid = "1"
+    count = 0
+    while True:
+        resp = session.post(url, json=chunk_payload(command, sid), verify=verify, timeout=timeout)
+        resp.raise_for_status()
+        ins_api = resp.json().get("ins_api", {})
+        output = ins_api.get("outputs", {}).get("output", {})
+        if isinstance(output, list):
+            output = output[0] if output else {}
+        if str(output.get("code", "200")) != "200":
+            raise NxapiError(f"{command}: {output.get('code')} {output.get('msg')} {output.get('clierror', '')}".strip())
+
+        body = output.get("body", "")
+        if isinstance(body, (dict, list)):
+            # switch did not chunk (small output): hand over the whole document as text
+            body = json.dumps(body)
+        if body:
+            yield body
+        count += 1
+
+        sid = ins_api.get("sid") or END_OF_CHUNKS
+        if sid == END_OF_CHUNKS or (max_chunks and count >= max_chunks):
+            return
+
+def iter_rows(chunks, row_key):
+    """Yield every object found under row_key ("ROW_prefix", ...) in streamed JSON text.
+
+    Handles several tables with the same row key (e.g. one ROW_prefix list per VRF /
+    address family) and the single-row case where NX-API sends an object instead of a
+    list. Rows are yielded as soon as they are complete.
+    """
+    decoder = json.JSONDecoder()
+    marker = f'"{row_key}"'
+    buf = ""
+    pos = 0
+    in_list = False          # inside the [...] of a row key
+    chunks = iter(chunks)
+
+    while True:
+        progressed = True
+        while progressed:
+            progressed = False
+            if not in_list:
+                idx = buf.find(marker, pos)
+                if idx == -1:
+                    # keep a tail in case the marker is split across chunks
+                    buf = buf[-len(marker):]
+                    pos = 0
+                    break
+                colon = buf.find(":", idx + len(marker))
+                start = colon + 1
+                while 0 < start < len(buf) and buf[start] in " \t\r\n":
+                    start += 1
+                if colon == -1 or start >= len(buf):
+                    buf = buf[idx:]
+                    pos = 0
+                    break
+                if buf[start] == "[":
+                    in_list = True
+                    pos = start + 1
+                    progressed = True
+                elif buf[start] == "{":
+                    try:
+                        row, end = decoder.raw_decode(buf, start)
+                    except ValueError:
+                        buf = buf[idx:]
+                        pos = 0
+                        break
+                    yield row
+                    pos = end
+                    progressed = True
+                else:
+                    pos = start
+                    progressed = True
+            else:
+                while pos < len(buf) and buf[pos] in " \t\r\n,":
+                    pos += 1
+                if pos >= len(buf):
+                    buf = ""
+                    pos = 0
+                    break
+                if buf[pos] == "]":
+                    in_list = False
+                    pos += 1
+                    progressed = True
+                    continue
+                try:
+                    row, end = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    buf = buf[pos:]
+                    pos = 0
+                    break
+                yield row
+                pos = end
+                progressed = True
+        try:
+            buf += next(chunks)
+        except StopIteration:
+            return
@@ -0,0 +1,114 @@
+### CDP / LLDP neighbor tables of an NX-OS switch over NX-API CLI
+### Used by Fleet/topology.py; both calls are one /ins round trip for the two protocols.
+#
+#     counts = neighbor_counts(session, dev)      # {"cdp": 4, "lldp": 4} from the brief tables
+#     name, found = neighbors(session, dev)       # own hostname, one dict per (protocol, local port)
+#     for nbr in found:
+#         print(nbr["name"], nbr["local_intf"], nbr["remote_intf"], nbr["address"])
+#
+# neighbor_counts() sends "show cdp neighbors ; show lldp neighbors" and only reads the
+# neigh_count scalars, so a refresh of an unchanged switch never builds a row.
+# neighbors() sends "show hostname" and the "detail" variants, which carry the
+# management address the crawler needs to reach the neighbor. A protocol that is disabled on the switch
+# ("feature lldp" off) answers with an error code and is simply left out.
+
+from nxapi_response import NxapiResponse, NxapiError
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+TIMEOUT = 10
+PROTOCOLS = ("cdp", "lldp")
+COUNT_COMMANDS = {"cdp": "show cdp neighbors", "lldp": "show lldp neighbors"}
+DETAIL_COMMANDS = {"cdp": "show cdp neighbors detail", "lldp": "show lldp neighbors detail"}
+COUNT_ROWS = {"cdp": "ROW_cdp_neighbor_brief_info", "lldp": "ROW_nbor"}
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def payload(commands):
+    return {
+        "ins_api": {
+            "version": "1.0",
+            "type": "cli_show",
+            "chunk": "0",
+            "sid": "1",
+            "input": " ; ".join(commands),
+            "output_format": "json"
+        }
+    }
+
+def run_commands(session, dev, commands, scheduler=None, timeout=TIMEOUT):
+    """NxapiResponse of the commands, sent as one request (through the scheduler if given)."""
+    url = f"https://{dev['host']}:{dev.get('port', 443)}/ins"
+    kwargs = {"json": payload(commands), "auth": (dev["username"], dev["password"]),
+              "verify": dev.get("verify", False), "timeout": timeout}
+    if scheduler is not None:
+        resp = scheduler.call(dev["host"], session.post, url, **kwargs)
+    else:
+        resp = session.post(url, **kwargs)
+    resp.raise_for_status()
+    return NxapiResponse.from_response(resp)
+
+def _outputs(reply, protocols):
+    """(protocol, CommandOutput) of every command that succeeded."""
+    for protocol, output in zip(protocols, reply.outputs):
+        if output.ok:
+            yield protocol, output
+
+# -----------------------------
+# NEIGHBORS
+# -----------------------------
+def neighbor_counts(session, dev, protocols=PROTOCOLS, scheduler=None, timeout=TIMEOUT):
+    """{protocol: neighbor count} from the brief tables; disabled protocols are left out."""
+    reply = run_commands(session, dev, [COUNT_COMMANDS[p] for p in protocols], scheduler, timeout)
+    counts = {}
+    for protocol, output in _outputs(reply, protocols):
+        count = output.scalars.get("neigh_count")
+        if count is None:
+            # older releases leave neigh_count out of the brief tables
+            count = sum(1 for _ in output.rows(COUNT_ROWS[protocol]))
+        counts[protocol] = int(count)
+    if not counts:
+        raise NxapiError(f"{dev['host']}: neither {' nor '.join(protocols)} answered")
+    return counts
+
+def cdp_neighbor(row):
+    return {
+        "name": row.get("device_id") or "",
+        "address": row.get("v4mgmtaddr") or row.get("v4addr") or None,
+        "platform": row.get("platform_id") or "",
+        "local_intf": row.get("intf_id") or "",
+        "remote_intf": row.get("port_id") or "",
+        "protocol": "cdp",
+    }
+
+def lldp_neighbor(row):
+    address = row.get("mgmt_addr")
+    return {
+        "name": row.get("sys_name") or row.get("chassis_id") or "",
+        "address": address if address and address != "not advertised" else None,
+        "platform": row.get("sys_desc") or "",
+        "local_intf": row.get("local_port_id") or row.get("l_port_id") or "",
+        "remote_intf": row.get("port_id") or "",
+        "protocol": "lldp",
+    }
+
+def neighbors(session, dev, protocols=PROTOCOLS, scheduler=None, timeout=TIMEOUT):
+    """(hostname, [neighbor dicts: name, address, platform, local_intf, remote_intf, protocol])."""
+    reply = run_commands(session, dev, ["show hostname"] + [DETAIL_COMMANDS[p] for p in protocols],
+                         scheduler, timeout)
+    hostname = reply.output(0).scalars.get("hostname") or ""
+    found = []
+    answered = False
+    for protocol, output in _outputs(reply, ("hostname",) + tuple(protocols)):
+        if protocol == "hostname":
+            continue
+        answered = True
+        if protocol == "cdp":
+            found.extend(cdp_neighbor(row) for row in output.rows("ROW_cdp_neighbor_detail_info"))
+        else:
+            found.extend(lldp_neighbor(row) for row in output.rows("ROW_nbor_detail"))
+    if not answered:
+        raise NxapiError(f"{dev['host']}: neither {' nor '.join(protocols)} answered")
+    return hostname, [n for n in found if n["name"]]
@@ -0,0 +1,254 @@
+### NX-API CLI (ins_api) replies as light row records, decoded only when needed
+### Used by show_commands.py and the task_cdp_neigh_* scripts.
+
+# NX-API wraps every reply in ins_api -> outputs -> output, where output is one object
+# for a single command and a list for "cmd1 ; cmd2". Inside a body, tables come as
+# TABLE_<name> -> ROW_<name>, and ROW_<name> is a list of rows, or a bare object when
+# the table has exactly one row (the classic crash of data[...]["ROW_..."][0] code).
+#
+#     reply = NxapiResponse.from_response(resp)        # nothing parsed yet
+#     print(reply.text)                                # raw JSON, no decode/re-encode
+#     for nbr in reply.output().rows("ROW_cdp_neighbor_brief_info"):
+#         print(nbr.device_id, nbr.intf_id)            # also nbr["intf_id"], nbr.get(...)
+#
+# The body is decoded on first access only, so a script that just prints or saves the
+# reply never decodes it. Decoding uses orjson when it is installed (NXAPI_JSON=json
+# forces the standard library) with the garbage collector paused. On a 20k-route
+# "show ip route" that takes about 65 ms where json.loads plus walking the dicts takes
+# about 100 ms (Benchmarks/run_benchmarks.py --only parse).
+# Rows are built while iterating, as instances of a __slots__ class made once per table
+# layout: a kept row costs about 70 bytes instead of a copied dict's 180+, and nothing
+# is built for the rows of tables that are not asked for. Keys that are not Python
+# identifiers ("intf-name") become attributes with "_" (intf_name); item access takes
+# either spelling.
+
+import gc
+import json
+import keyword
+import os
+import re
+
+from nxapi_chunked import NxapiError
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None and os.getenv("NXAPI_JSON", "orjson") != "json":
+    loads = orjson.loads
+    JSON_BACKEND = "orjson"
+else:
+    loads = json.loads
+    JSON_BACKEND = "json"
+
+
+# -----------------------------
+# ROW RECORDS
+# -----------------------------
+class Row:
+    """Base of the generated row classes; one slot per field of the table layout."""
+
+    __slots__ = ()
+    _fields = ()          # NX-API keys, in slot order
+    _attrs = {}           # NX-API key -> attribute name
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self._attrs.get(key, key))
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, self._attrs.get(key, key), default)
+
+    def __contains__(self, key):
+        return key in self._attrs
+
+    def keys(self):
+        return self._fields
+
+    def as_dict(self):
+        return {key: getattr(self, attr) for key, attr in self._attrs.items()}
+
+    def rows(self, row_key=None):
+        """Rows of the TABLE_* nested in this row (e.g. ROW_addrf inside ROW_vrf)."""
+        return iter_rows(self.as_dict(), row_key)
+
+    def __eq__(self, other):
+        if isinstance(other, Row):
+            return self.as_dict() == other.as_dict()
+        return NotImplemented
+
+    def __repr__(self):
+        fields = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in self._attrs.values())
+        return f"{type(self).__name__}({fields})"
+
+
+_row_classes = {}
+
+def attr_name(key):
+    name = re.sub(r"\W", "_", key)
+    if not name or name[0].isdigit() or keyword.iskeyword(name) or name.startswith("_"):
+        name = "f_" + name
+    return name
+
+def row_class(row_key, fields):
+    """The Row subclass for rows of row_key with exactly these fields (cached)."""
+    cls = _row_classes.get((row_key, fields))
+    if cls is None:
+        attrs = {}
+        for key in fields:
+            name = attr_name(key)
+            while name in attrs.values():
+                name += "_"
+            attrs[key] = name
+        slots = tuple(attrs.values())
+        # a generated positional __init__ (as collections.namedtuple does) is about
+        # three times faster than setting the slots in a loop
+        source = f"def __init__(self, {', '.join(slots)}):\n"
+        source += "".join(f"    self.{name} = {name}\n" for name in slots) or "    pass\n"
+        namespace = {}
+        exec(source, namespace)
+        cls = type(row_key or "Row", (Row,), {"__slots__": slots, "__init__": namespace["__init__"],
+                                              "_fields": fields, "_attrs": attrs})
+        _row_classes[(row_key, fields)] = cls
+    return cls
+
+def make_row(row_key, values):
+    """Row record from one decoded ROW_* object."""
+    cls = _row_classes.get((row_key, tuple(values))) or row_class(row_key, tuple(values))
+    return cls(*values.values())
+
+def as_list(value):
+    """NX-API sends a single ROW_* as an object instead of a list."""
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def iter_rows(body, row_key=None):
+    """Row records of every TABLE_*/ROW_* in body, or only of ROW_<row_key> (searched in nested tables too)."""
+    if not isinstance(body, dict):
+        return
+    for key, table in body.items():
+        if not key.startswith("TABLE_"):
+            continue
+        for table_item in as_list(table):
+            if not isinstance(table_item, dict):
+                continue
+            for name, rows in table_item.items():
+                if not name.startswith("ROW_"):
+                    continue
+                if row_key is None or name == row_key:
+                    for values in as_list(rows):
+                        if isinstance(values, dict):
+                            yield make_row(name, values)
+                else:
+                    for values in as_list(rows):
+                        yield from iter_rows(values, row_key)
+
+
+# -----------------------------
+# RESPONSE ENVELOPE
+# -----------------------------
+class CommandOutput:
+    """One entry of ins_api.outputs.output: the reply to one command."""
+
+    __slots__ = ("input", "code", "msg", "clierror", "body")
+
+    def __init__(self, output):
+        self.input = (output.get("input") or "").strip()
+        self.code = str(output.get("code", "200"))
+        self.msg = output.get("msg") or ""
+        self.clierror = output.get("clierror") or ""
+        self.body = output.get("body")
+
+    @property
+    def ok(self):
+        return self.code == "200"
+
+    def raise_for_code(self):
+        if not self.ok:
+            raise NxapiError(f"{self.input}: {self.code} {self.msg} {self.clierror}".strip())
+        return self
+
+    @property
+    def scalars(self):
+        """The body's plain fields (show version, neigh_count, ...)."""
+        if not isinstance(self.body, dict):
+            return {}
+        return {k: v for k, v in self.body.items() if not isinstance(v, (dict, list))}
+
+    def rows(self, row_key=None):
+        return iter_rows(self.body, row_key)
+
+    def __repr__(self):
+        return f"CommandOutput(input={self.input!r}, code={self.code!r})"
+
+
+class NxapiResponse:
+    """An ins_api reply; the JSON is decoded on first use of data/outputs."""
+
+    def __init__(self, raw):
+        self.raw = raw if isinstance(raw, bytes) else raw.encode("utf-8")
+        self._data = None
+        self._outputs = None
+
+    @classmethod
+    def from_response(cls, resp):
+        return cls(resp.content)
+
+    @property
+    def text(self):
+        return self.raw.decode("utf-8", errors="replace")
+
+    @property
+    def data(self):
+        if self._data is None:
+            # a decoded document has no reference cycles: the collector passes that
+            # the new dicts trigger on a big reply are pure overhead
+            enabled = gc.isenabled()
+            gc.disable()
+            try:
+                self._data = loads(self.raw)
+            except ValueError as e:
+                raise NxapiError(f"reply is not JSON: {e}") from e
+            finally:
+                if enabled:
+                    gc.enable()
+        return self._data
+
+    @property
+    def ins_api(self):
+        ins_api = self.data.get("ins_api") if isinstance(self.data, dict) else None
+        if not isinstance(ins_api, dict):
+            raise NxapiError("reply has no ins_api envelope")
+        return ins_api
+
+    @property
+    def sid(self):
+        return self.ins_api.get("sid")
+
+    @property
+    def outputs(self):
+        """One CommandOutput per command, in command order."""
+        if self._outputs is None:
+            output = (self.ins_api.get("outputs") or {}).get("output")
+            self._outputs = [CommandOutput(o) for o in as_list(output) if isinstance(o, dict)]
+        return self._outputs
+
+    def output(self, index=0):
+        """Output of the index-th command, raising NxapiError if that command failed."""
+        try:
+            return self.outputs[index].raise_for_code()
+        except IndexError:
+            raise NxapiError(f"reply has {len(self.outputs)} output(s), no #{index}") from None
+
+    def rows(self, row_key=None):
+        """Rows of every successful command."""
+        for output in self.outputs:
+            if output.ok:
+                yield from output.rows(row_key)
+
+    def pretty(self, indent=2):
+        return json.dumps(self.data, indent=indent)
@@ -1,8 +1,19 @@
+### Run show commands over NX-API CLI (cli_show), save the reply and store its rows
+### --quiet: no reply on the console (only failed commands are shown, pretty-printed);
+### --ndjson: one JSON record per command instead (Fleet/reply_output.py).
+
 import requests
-import json
+import sys
+import time
 from requests.exceptions import RequestException, Timeout
 from device_info import device
 from pathlib import Path
+from nxapi_response import NxapiResponse, NxapiError
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from snapshot_store import SnapshotStore
+from instrumentation import operation
+import reply_output
 
 requests.packages.urllib3.disable_warnings()  # keep for lab; prefer proper CA bundle in production
 
@@ -34,25 +45,59 @@ payload = {
 VERIFY = device.get("verify", False)
 TIMEOUT = float(device.get("timeout", 10))
 
+def store_outputs(reply, timestamp):
+    """Append the table rows of every command to the snapshot store (kind "show").
+
+    Each command contributes one row with its scalar fields (show version) plus every ROW_* entry.
+    """
+    records = []
+    for output in reply.outputs:
+        if not output.ok:
+            continue
+        scalars = output.scalars
+        if scalars:
+            records.append(dict(scalars, command=output.input))
+        records.extend(dict(row.as_dict(), command=output.input) for row in output.rows())
+    with SnapshotStore() as store:
+        return store.append("show", HOST, records, timestamp)
+
+def report_outputs(reply):
+    """Per-command result: a record each in ndjson mode, failed commands pretty-printed in quiet mode."""
+    for output in reply.outputs:
+        reply_output.record("command", host=HOST, input=output.input, code=output.code, ok=output.ok,
+                            **({} if output.ok else {"msg": output.msg, "clierror": output.clierror}))
+        if not output.ok and reply_output.mode() == "quiet":
+            reply_output.message(reply_output.pretty(reply.raw, kind="json"))
+            break
+
+reply_output.set_mode_from_argv(sys.argv)
 session = requests.Session()
 session.headers.update(HEADERS)
 session.auth = (USERNAME, PASSWORD)
 
 try:
-    resp = session.post(URL, json=payload, verify=VERIFY, timeout=TIMEOUT)
-    resp.raise_for_status()
-    try:
-        pretty = json.dumps(resp.json(), indent=2)
-    except ValueError:
-        pretty = resp.text
-    # print to console (no credentials)
-    print(pretty)
-    # save to file
+    with operation(HOST, "cli_show") as op:
+        resp = session.post(URL, json=payload, verify=VERIFY, timeout=TIMEOUT)
+        op.sent(len(resp.request.body or b""))
+        op.received(len(resp.content))
+        resp.raise_for_status()
+        reply = NxapiResponse.from_response(resp)
+    # print and save the switch's own JSON text: decoding only to re-encode it costs more than the request
+    text = reply.text
+    if reply_output.mode() == "pretty":
+        print(text)
     with open(OUTPUT_PATH, "w", encoding="utf-8") as fh:
-        fh.write(pretty + "\n")
-    print(f"Saved output to: {OUTPUT_PATH}")
+        fh.write(text + "\n")
+    reply_output.message(f"Saved output to: {OUTPUT_PATH}", host=HOST, path=OUTPUT_PATH)
+    try:
+        with operation(HOST, "cli_show", phase="parse"):
+            stored = store_outputs(reply, time.time())
+        report_outputs(reply)
+        reply_output.message(f"Stored {stored} rows in the snapshot store", host=HOST, stored=stored)
+    except NxapiError as e:
+        reply_output.message(f"Not stored: {e}", host=HOST)
 except Timeout:
-    print("Request timed out")
+    reply_output.message("Request timed out", host=HOST)
 except RequestException as e:
     # do not leak credentials in error messages
-    print(f"Request failed: {e}")
+    reply_output.message(f"Request failed: {e}", host=HOST)
@@ -0,0 +1,90 @@
+import json
+import sys
+import requests
+from requests.exceptions import RequestException, Timeout
+from device_info import device
+from pathlib import Path
+from nxapi_chunked import iter_chunks, iter_rows, row_key_for, NxapiError
+
+# Chunked variant of show_commands.py for very large tables (show ip route, show mac address-table).
+# Rows are written to the output file as JSON lines while the chunks arrive, so memory stays
+# flat regardless of table size. Commands without a known ROW_* key are written as raw JSON text.
+#
+#   python show_commands_chunked.py "show ip route vrf all" "show mac address-table"
+#   python show_commands_chunked.py "show ip route" --row ROW_prefix
+
+requests.packages.urllib3.disable_warnings()  # keep for lab; prefer proper CA bundle in production
+
+HOST = device["host"]
+PORT = device.get("port", 443)
+USERNAME = device["username"]
+PASSWORD = device["password"]
+
+URL = f"https://{HOST}:{PORT}/ins"
+OUTPUT_PATH = str(Path(__file__).with_name(Path(__file__).stem + "_result").with_suffix('.ndjson'))
+
+HEADERS = {"Content-Type": "application/json"}
+
+# chunk mode accepts one command per request, so commands are run one after another
+DEFAULT_COMMANDS = ["show ip route vrf all", "show mac address-table"]
+
+# allow verification and timeout to be configured in device_info (verify can be bool or path to CA bundle)
+VERIFY = device.get("verify", False)
+TIMEOUT = float(device.get("timeout", 10))
+
+
+def stream_command(session, command, row_key=None):
+    """Yield the rows of one show command as they arrive (for downstream consumers)."""
+    chunks = iter_chunks(session, URL, command, verify=VERIFY, timeout=TIMEOUT)
+    row_key = row_key or row_key_for(command)
+    if row_key is None:
+        raise ValueError(f"No ROW_* key known for '{command}', pass one with --row")
+    yield from iter_rows(chunks, row_key)
+
+
+def save_command(session, command, fh, row_key=None):
+    """Write one command's rows (or its raw text) to fh; returns the number of rows/chunks."""
+    row_key = row_key or row_key_for(command)
+    count = 0
+    if row_key is None:
+        for chunk in iter_chunks(session, URL, command, verify=VERIFY, timeout=TIMEOUT):
+            fh.write(chunk)
+            count += 1
+        fh.write("\n")
+        return count
+    for row in stream_command(session, command, row_key):
+        fh.write(json.dumps({"command": command, "row": row}, separators=(",", ":")) + "\n")
+        count += 1
+    return count
+
+
+def main(argv):
+    row_key = None
+    if "--row" in argv:
+        idx = argv.index("--row")
+        row_key = argv[idx + 1]
+        argv = argv[:idx] + argv[idx + 2:]
+    commands = argv[1:] or DEFAULT_COMMANDS
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    session.auth = (USERNAME, PASSWORD)
+
+    try:
+        with open(OUTPUT_PATH, "w", encoding="utf-8") as fh:
+            for command in commands:
+                count = save_command(session, command, fh, row_key)
+                unit = "rows" if (row_key or row_key_for(command)) else "chunks"
+                print(f"{command}: {count} {unit}")
+        print(f"Saved output to: {OUTPUT_PATH}")
+    except Timeout:
+        print("Request timed out")
+    except NxapiError as e:
+        print(f"Command failed: {e}")
+    except RequestException as e:
+        # do not leak credentials in error messages
+        print(f"Request failed: {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv)
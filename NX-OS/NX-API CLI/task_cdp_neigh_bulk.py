@@ -0,0 +1,177 @@
+## Diff-aware version of task_cdp_neigh_cli+rest.py: CDP neighbors -> interface descriptions
+## 1. one NX-API CLI call for "show cdp neighbors"
+## 2. one NX-API REST class query (token from the shared cache in ../NX-API REST/token_cache.py)
+##    for the current descr of every l1PhysIf
+## 3. only interfaces whose description differs are pushed, in ONE hierarchical POST to sys/intf
+##    (or, with --per-interface, as concurrent POSTs over one pooled keep-alive session)
+## On a 96-port leaf this is 3-4 round-trips instead of ~100. Use --dry-run to only print the diff.
+## All calls go through one Fleet/scheduler.py Scheduler: the per-interface POSTs start at
+## 2 in flight and grow towards MAX_WORKERS while the switch keeps up, and back off (honouring
+## Retry-After) when it answers 429/503 or slows down.
+
+import re
+import sys
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from requests.adapters import HTTPAdapter
+from requests.exceptions import RequestException
+from device_info import device
+from nxapi_response import NxapiResponse, NxapiError
+
+# token_cache.py lives with the NX-API REST scripts, which have a device_info.py of their own
+sys.path.append(str(Path(__file__).resolve().parent.parent / "NX-API REST"))
+from token_cache import TokenCache, request_with_token
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from scheduler import Scheduler
+
+requests.packages.urllib3.disable_warnings()
+
+switch_ip_address = device["host"]
+switchuser = device["username"]
+switchpassword = device["password"]
+VERIFY = device.get("verify", False)
+TIMEOUT = float(device.get("timeout", 10))
+MAX_WORKERS = 8
+
+BASE_URL = f"https://{switch_ip_address}"
+token_cache = TokenCache(verify=VERIFY, timeout=TIMEOUT)
+scheduler = Scheduler(max_limit=MAX_WORKERS, target_latency=TIMEOUT / 2)
+headers = {
+    "Content-Type": "application/json",
+    "Accept": "application/json"
+}
+
+# -----------------------------
+# HELPER FUNCTIONS
+# -----------------------------
+def normalize_interface(local_interface):
+    """Normalize interface name: Eth1/2 -> eth1/2; None for mgmt0 and unknown formats."""
+    if local_interface.lower() == "mgmt0":
+        return None
+    m = re.search(r'(eth|ethernet)?\s*(\d+/\d+(?:/\d+)*)', local_interface, re.IGNORECASE)
+    return f"eth{m.group(2)}" if m else None
+
+def make_session():
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS)
+    session.mount("https://", adapter)
+    return session
+
+def get_cdp_neighbors(session):
+    payload = {
+        "ins_api": {
+            "version": "1.0",
+            "type": "cli_show",
+            "chunk": "0",
+            "sid": "1",
+            "input": "show cdp neighbors",
+            "output_format": "json"
+        }
+    }
+    resp = scheduler.call(switch_ip_address, session.post, f"{BASE_URL}/ins", json=payload,
+                          auth=(switchuser, switchpassword), verify=VERIFY, timeout=TIMEOUT)
+    resp.raise_for_status()
+    return list(NxapiResponse.from_response(resp).output().rows("ROW_cdp_neighbor_brief_info"))
+
+def rest_call(session, method, path, **kwargs):
+    """NX-API REST call with the shared cached token; re-login once on 401/403."""
+    return request_with_token(token_cache, session, method, f"{BASE_URL}{path}",
+                              switch_ip_address, switchuser, switchpassword, scheduler=scheduler, **kwargs)
+
+def get_current_descriptions(session):
+    """One class query for all physical interfaces: {"eth1/1": "descr", ...}."""
+    resp = rest_call(session, "GET", "/api/node/class/l1PhysIf.json")
+    resp.raise_for_status()
+    current = {}
+    for item in resp.json().get("imdata", []):
+        attrs = item.get("l1PhysIf", {}).get("attributes", {})
+        if "id" in attrs:
+            current[attrs["id"].lower()] = attrs.get("descr", "")
+    return current
+
+def desired_descriptions(rows):
+    desired = {}
+    for row in rows:
+        full_int = normalize_interface(row.get('intf_id', ''))
+        if full_int is None:
+            if row.get('intf_id', '').lower() != "mgmt0":
+                print(f"Skipping invalid interface format: {row.get('intf_id')}")
+            continue
+        desired[full_int] = f"Connected to {row.get('device_id')} via {row.get('port_id')}"
+    return desired
+
+def compute_changes(desired, current):
+    """Only interfaces that exist and whose description actually differs."""
+    changes = {}
+    for intf, descr in desired.items():
+        if intf not in current:
+            print(f"Skipping {intf}: not found on switch")
+        elif current[intf] != descr:
+            changes[intf] = descr
+    return changes
+
+def push_bulk(session, changes):
+    """All descriptions in one hierarchical POST to sys/intf."""
+    body = {
+        "interfaceEntity": {
+            "children": [
+                {"l1PhysIf": {"attributes": {"id": intf, "descr": descr}}}
+                for intf, descr in sorted(changes.items())
+            ]
+        }
+    }
+    resp = rest_call(session, "POST", "/api/mo/sys/intf.json", json=body)
+    resp.raise_for_status()
+    return resp.json()
+
+def push_per_interface(session, changes):
+    """Concurrent per-interface POSTs sharing the pooled session."""
+    def post_one(item):
+        intf, descr = item
+        body = {"l1PhysIf": {"attributes": {"descr": descr}}}
+        resp = rest_call(session, "POST", f"/api/node/mo/sys/intf/phys-[{intf}].json", json=body)
+        return intf, resp.status_code
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        return dict(pool.map(post_one, sorted(changes.items())))
+
+# -----------------------------
+# MAIN
+# -----------------------------
+def main(argv):
+    dry_run = "--dry-run" in argv
+    per_interface = "--per-interface" in argv
+    session = make_session()
+    try:
+        rows = get_cdp_neighbors(session)
+        print(f"Number of CDP Neighbors: {len(rows)}")
+        current = get_current_descriptions(session)
+        changes = compute_changes(desired_descriptions(rows), current)
+    except (RequestException, NxapiError, KeyError, ValueError) as e:
+        print(f"Request failed: {e}")
+        return 1
+
+    if not changes:
+        print("All interface descriptions are up to date. No changes needed.")
+        return 0
+    for intf, descr in sorted(changes.items()):
+        print(f"{intf}: '{current[intf]}' -> '{descr}'")
+    if dry_run:
+        return 0
+
+    try:
+        if per_interface:
+            for intf, status in push_per_interface(session, changes).items():
+                print(f"Updating interface: {intf} -> HTTP {status}")
+        else:
+            push_bulk(session, changes)
+            print(f"Updated {len(changes)} interface(s) in one request.")
+    except RequestException as e:
+        print(f"Request failed: {e}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
@@ -3,10 +3,12 @@
 ######################################  LOGIN WITH NX-API CLI  ######################################
 
 import re
+import sys
 import requests
 import json
 from pathlib import Path
 from device_info import device
+from nxapi_response import NxapiResponse, NxapiError
 
 requests.packages.urllib3.disable_warnings()
 
@@ -46,15 +48,9 @@ try:
 
     resp.raise_for_status()
 
-    # try to decode JSON, fallback to raw text
-    try:
-        data = resp.json()
-        pretty = json.dumps(data, indent=4)
-    except ValueError:
-        pretty = resp.text or ""
-
-    # print to console
-    print(pretty)
+    # print the switch's JSON as sent; it is only decoded when the neighbors are read below
+    reply = NxapiResponse.from_response(resp)
+    print(reply.text)
 
     # # save to file
     # with OUTPUT_PATH.open("w", encoding="utf-8") as fh:
@@ -63,47 +59,39 @@ try:
     # print(f"Saved output to: {OUTPUT_PATH}")
 except requests.exceptions.RequestException as e:
     print(f"Request failed: {e}")
+    sys.exit(1)
 
 ######################################  LOGIN WITH NX-API REST  ######################################
 
-auth_url = f"https://{switch_ip_address}/api/aaaLogin.json"
-auth_body = {
-    "aaaUser": {
-        "attributes": {
-            "name": switchuser,
-            "pwd": switchpassword
-        }
-    }
-}   
-
-auth_resp = requests.post(
-    auth_url,
-    headers=headers,
-    data=json.dumps(auth_body),
-    verify=False,
-    timeout=10
-).json()
-token = auth_resp["imdata"][0]["aaaLogin"]["attributes"]["token"]
+# token shared with the NX-API REST scripts; aaaLogin only runs when no valid token is cached
+sys.path.append(str(Path(__file__).resolve().parent.parent / "NX-API REST"))
+from token_cache import TokenCache
+
+token = TokenCache(verify=False, timeout=10).get_token(switch_ip_address, switchuser, switchpassword)
 cookies = {'APIC-cookie': token}
 
-counter = 0
-nei_count = data['ins_api']['outputs']['output']['body']['neigh_count']
+try:
+    cdp = reply.output()
+except NxapiError as e:
+    print(f"show cdp neighbors failed: {e}")
+    sys.exit(1)
+nei_count = cdp.scalars.get("neigh_count", 0)
 print(f"Number of CDP Neighbors: {nei_count}")
 
-while counter < int(nei_count):
-    neighbor = data['ins_api']['outputs']['output']['body']['TABLE_cdp_neighbor_brief_info']['ROW_cdp_neighbor_brief_info'][counter]['device_id']
-    local_interface = data['ins_api']['outputs']['output']['body']['TABLE_cdp_neighbor_brief_info']['ROW_cdp_neighbor_brief_info'][counter]['intf_id']
-    remote_interface = data['ins_api']['outputs']['output']['body']['TABLE_cdp_neighbor_brief_info']['ROW_cdp_neighbor_brief_info'][counter]['port_id']
-    
+# ROW_cdp_neighbor_brief_info is a list, or a single object with one neighbor; rows() takes both
+for row in cdp.rows("ROW_cdp_neighbor_brief_info"):
+    neighbor = row.device_id
+    local_interface = row.intf_id
+    remote_interface = row.port_id
+
     body = {
         "l1PhysIf": {
             "attributes": {
                 "descr": f"Connected to {neighbor} via {remote_interface}"
             }
         }
-    } 
-    counter += 1
-    
+    }
+
     if local_interface.lower() != "mgmt0":
 
         # Normalize interface name: Eth1/2 → eth1/2
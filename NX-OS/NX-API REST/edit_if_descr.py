@@ -3,7 +3,8 @@ from pprint import pprint
 import requests
 from requests.exceptions import RequestException, Timeout
 from urllib.parse import quote
-from get_token import cookies, HOST, VERIFY, TIMEOUT
+from get_token import cookies, cache, HOST, USER, PWD, VERIFY, TIMEOUT
+from token_cache import request_with_token
 
 requests.packages.urllib3.disable_warnings()  # for lab use; use proper CA bundle in production
 
@@ -35,7 +36,9 @@ session.cookies.update(cookies or {})
 session.headers.update({'Content-Type': 'application/json'})
 
 try:
-    resp = session.post(URL, json=payload, verify=VERIFY, timeout=TIMEOUT)
+    # re-login and retry once if the cached token was rejected (401/403)
+    resp = request_with_token(cache, session, "POST", URL, HOST, USER, PWD,
+                              json=payload, verify=VERIFY, timeout=TIMEOUT)
     resp.raise_for_status()
     try:
         data = resp.json()
@@ -1,10 +1,7 @@
-import os
-import json
-from pprint import pprint
 import requests
-from pathlib import Path
 from requests.exceptions import RequestException, Timeout
 from device_info import device
+from token_cache import TokenCache, TokenError
 
 requests.packages.urllib3.disable_warnings()  # keep for lab; prefer proper CA bundle in production
 
@@ -15,58 +12,24 @@ PWD = device.get("password", "")
 VERIFY = device.get("verify", False)
 TIMEOUT = float(device.get("timeout", 10))
 
-# Optional token file via env (keeps script generic)
-TOKEN_FILE = os.getenv("ACI_TOKEN_FILE")
-
-URL = f"https://{HOST}/api/aaaLogin.json"
-
-def safe_get(dct, *keys):
-    cur = dct
-    for k in keys:
-        if not isinstance(cur, dict) or k not in cur:
-            return None
-        cur = cur[k]
-    return cur
-
-payload = {"aaaUser": {"attributes": {"name": USER, "pwd": PWD}}}
+# Tokens are shared between scripts/processes through token_cache.py
+# (ACI_TOKEN_FILE selects the cache file); aaaLogin only runs when no valid token is cached.
+cache = TokenCache(verify=VERIFY, timeout=TIMEOUT)
 
 session = requests.Session()
 session.headers.update({"Content-Type": "application/json"})
 
+token = None
 try:
-    resp = session.post(URL, json=payload, verify=VERIFY, timeout=TIMEOUT)
-    resp.raise_for_status()
-    try:
-        data = resp.json()
-    except ValueError:
-        raise SystemExit("Invalid JSON received from APIC")
-
-    # common APIC token path
-    token = None
-    imdata = safe_get(data, "imdata")
-    if isinstance(imdata, list) and imdata:
-        token = safe_get(imdata[0], "aaaLogin", "attributes", "token")
-
-    token = token or safe_get(data, "token") or safe_get(data, "aaaLogin", "token")
-
-    if token:
-        masked = f"{token[:4]}...{token[-4:]}" if len(token) > 8 else "****"
-        print("Token obtained:", masked)
-
-        if TOKEN_FILE:
-            tf = Path(TOKEN_FILE).expanduser()
-            tf.parent.mkdir(parents=True, exist_ok=True)
-            with tf.open("w", encoding="utf-8") as fh:
-                fh.write(token + "\n")
-            try:
-                tf.chmod(0o600)
-            except Exception:
-                pass
-            print("Token saved to:", str(tf))
-    else:
-        print("Authentication succeeded but token not found in response.")
+    token = cache.get_token(HOST, USER, PWD, session=session)
+    masked = f"{token[:4]}...{token[-4:]}" if len(token) > 8 else "****"
+    print("Token obtained:", masked)
 except Timeout:
     print("Request timed out")
+except TokenError as e:
+    print(f"Authentication failed: {e}")
+except ValueError:
+    print("Invalid JSON received from APIC")
 except RequestException as e:
     print(f"Request failed: {e}")
 
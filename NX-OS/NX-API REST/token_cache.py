@@ -0,0 +1,220 @@
+### NX-API REST token cache shared between processes
+### Tokens live in a JSON file (ACI_TOKEN_FILE, default ~/.cache/nxapi_tokens.json), keyed by user@host.
+
+# aaaLogin returns the token together with refreshTimeoutSeconds (idle lifetime) and
+# maximumLifetimeSeconds. A cached token is:
+#   - used as is while younger than REFRESH_FRACTION of its refresh timeout
+#   - refreshed with aaaRefresh after that (cheap, keeps the same session on the switch)
+#   - replaced by a fresh aaaLogin only when expired, when the refresh fails, or when
+#     the switch answers 401/403 (see request_with_token)
+# Each user@host has its own lock file (under <token file>.locks/), held across that
+# switch's login or refresh, so parallel scripts and workers hitting the same switch
+# share one login instead of causing a login storm, while logins to other switches go
+# ahead: a dead switch only holds up its own callers. The JSON file itself is read and
+# written under a separate lock that is never held across a network call.
+
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+sys.path.append(str(Path(__file__).resolve().parents[2] / "Fleet"))
+from instrumentation import operation
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+TOKEN_FILE = Path(os.getenv("ACI_TOKEN_FILE") or "~/.cache/nxapi_tokens.json").expanduser()
+DEFAULT_REFRESH_TIMEOUT = 600     # NX-OS default when the reply does not say
+REFRESH_FRACTION = 0.5            # refresh once half of the idle lifetime is used
+EXPIRY_MARGIN = 15                # seconds; treat a token this close to expiry as expired
+
+
+def safe_get(dct, *keys):
+    cur = dct
+    for k in keys:
+        if not isinstance(cur, dict) or k not in cur:
+            return None
+        cur = cur[k]
+    return cur
+
+
+class TokenError(Exception):
+    """Login or refresh did not return a token."""
+
+
+class TokenCache:
+    """File-backed token store; safe to use from several processes at once."""
+
+    def __init__(self, path=TOKEN_FILE, verify=False, timeout=10):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.key_lock_dir = self.path.with_name(self.path.name + ".locks")
+        self.verify = verify
+        self.timeout = timeout
+
+    # -----------------------------
+    # PUBLIC API
+    # -----------------------------
+    def get_token(self, host, user, pwd, session=None):
+        """Return a valid token for user@host, logging in or refreshing only when needed."""
+        key = f"{user}@{host}"
+        session = session or requests.Session()
+        with self._locked(key):
+            # read after taking the key lock: another process may have just logged in
+            with self._locked():
+                entry = self._read().get(key)
+            now = time.time()
+            if entry and self._usable(entry, now):
+                if now - entry["refreshed_at"] < entry["refresh_timeout"] * REFRESH_FRACTION:
+                    return entry["token"]
+                try:
+                    entry = self._refresh(session, host, entry)
+                except (requests.RequestException, TokenError, ValueError):
+                    entry = None
+            else:
+                entry = None
+            if entry is None:
+                entry = self._login(session, host, user, pwd)
+            with self._locked():
+                store = self._read()
+                store[key] = entry
+                self._write(store)
+            return entry["token"]
+
+    def invalidate(self, host, user):
+        """Forget the cached token (e.g. after a 401), so the next call logs in again."""
+        key = f"{user}@{host}"
+        with self._locked():
+            store = self._read()
+            if store.pop(key, None) is not None:
+                self._write(store)
+
+    def cookies(self, host, user, pwd, session=None):
+        return {"APIC-cookie": self.get_token(host, user, pwd, session=session)}
+
+    # -----------------------------
+    # NX-API CALLS
+    # -----------------------------
+    def _login(self, session, host, user, pwd):
+        payload = {"aaaUser": {"attributes": {"name": user, "pwd": pwd}}}
+        with operation(host, "aaaLogin") as op:
+            resp = session.post(f"https://{host}/api/aaaLogin.json", json=payload,
+                                verify=self.verify, timeout=self.timeout)
+            op.sent(len(resp.request.body or b""))
+            op.received(len(resp.content))
+            resp.raise_for_status()
+            with op.phase("parse"):
+                return self._entry_from(resp.json(), "aaaLogin")
+
+    def _refresh(self, session, host, entry):
+        with operation(host, "aaaRefresh") as op:
+            resp = session.get(f"https://{host}/api/aaaRefresh.json", cookies={"APIC-cookie": entry["token"]},
+                               verify=self.verify, timeout=self.timeout)
+            op.received(len(resp.content))
+            resp.raise_for_status()
+            with op.phase("parse"):
+                fresh = self._entry_from(resp.json(), "aaaRefresh")
+        # aaaRefresh extends the idle timer, the maximum lifetime still counts from login
+        fresh["obtained_at"] = entry["obtained_at"]
+        fresh["max_lifetime"] = entry["max_lifetime"]
+        return fresh
+
+    @staticmethod
+    def _entry_from(data, root):
+        attrs = None
+        imdata = safe_get(data, "imdata")
+        if isinstance(imdata, list) and imdata:
+            attrs = safe_get(imdata[0], root, "attributes")
+        token = safe_get(attrs, "token") if attrs else None
+        token = token or safe_get(data, "token") or safe_get(data, root, "token")
+        if not token:
+            raise TokenError(f"{root} succeeded but token not found in response")
+        now = time.time()
+        refresh_timeout = int((attrs or {}).get("refreshTimeoutSeconds") or DEFAULT_REFRESH_TIMEOUT)
+        max_lifetime = int((attrs or {}).get("maximumLifetimeSeconds") or 0)
+        return {
+            "token": token,
+            "obtained_at": now,
+            "refreshed_at": now,
+            "refresh_timeout": refresh_timeout,
+            "max_lifetime": max_lifetime,
+        }
+
+    @staticmethod
+    def _usable(entry, now):
+        if now - entry["refreshed_at"] >= entry["refresh_timeout"] - EXPIRY_MARGIN:
+            return False
+        if entry["max_lifetime"] and now - entry["obtained_at"] >= entry["max_lifetime"] - EXPIRY_MARGIN:
+            return False
+        return True
+
+    # -----------------------------
+    # FILE STORE
+    # -----------------------------
+    @contextmanager
+    def _locked(self, key=None):
+        """Exclusive lock on the token file, or with key on that user@host only."""
+        if key is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lock_path = self.lock_path
+        else:
+            self.key_lock_dir.mkdir(parents=True, exist_ok=True)
+            lock_path = self.key_lock_dir / f"{hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]}.lock"
+        # flock, not lockf: it also excludes other threads of this process
+        with open(lock_path, "a") as lock_fh:
+            fcntl.flock(lock_fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fh, fcntl.LOCK_UN)
+
+    def _read(self):
+        try:
+            with self.path.open("r", encoding="utf-8") as fh:
+                store = json.load(fh)
+            return store if isinstance(store, dict) else {}
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, store):
+        # write to a temp file and rename, so readers never see half a file
+        fd, tmp = tempfile.mkstemp(dir=str(self.path.parent), prefix=".nxapi_tokens.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(store, fh)
+            os.chmod(tmp, 0o600)
+            os.replace(tmp, self.path)
+        except Exception:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+
+
+def request_with_token(cache, session, method, url, host, user, pwd, scheduler=None, **kwargs):
+    """Send a request with the cached token; on 401/403 log in again and retry once.
+
+    With a Fleet/scheduler.py Scheduler the request is rate limited per host and
+    a 429/503 is retried after the switch's Retry-After.
+    """
+    kwargs.setdefault("verify", cache.verify)
+    kwargs.setdefault("timeout", cache.timeout)
+    for attempt in (1, 2):
+        session.cookies.set("APIC-cookie", cache.get_token(host, user, pwd, session=session))
+        if scheduler is None:
+            resp = session.request(method, url, **kwargs)
+        else:
+            resp = scheduler.call(host, session.request, method, url, **kwargs)
+        if resp.status_code not in (401, 403) or attempt == 2:
+            return resp
+        cache.invalidate(host, user)
+    return resp
@@ -0,0 +1,558 @@
+### Local stand-in NETCONF server (SSH subsystem "netconf") for testing without a lab device
+### Answers hello, get, get-config, edit-config, lock/unlock, close-session and
+### establish-subscription, and pushes yang-push notifications for ietf-interfaces state.
+#
+#   python netconf_simulator.py --port 8300 --interfaces 48
+#   python netconf_simulator.py --port 8300 --flavor rfc8641 --change-interval 2
+#   python netconf_simulator.py --port 8300 --devices 100      # 127.0.0.1 ... 127.0.0.100
+#
+# Point the NETCONF scripts at it with device = {"host": "127.0.0.1", "port": "8300",
+# "username": "admin", "password": "admin"}.
+#
+# Only base:1.0 is advertised, so ncclient keeps end-of-message (]]>]]>) framing.
+# get / get-config filters are evaluated: subtree filters (content match, selection and
+# containment nodes, by local name) and the XPath subset IOS-XE/NETCONF/filter_compiler.py
+# writes (unions of /a/b[k='v' or k='w']/*[self::c or self::d] paths, prefixes ignored).
+# Subscription filters are accepted but not evaluated: every push carries
+# /interfaces-state (periodic) or the interface whose oper-status just flipped (on-change).
+# The subscription RPC follows what the device advertises in
+# netconf_capabilities_192.168.150.201.txt (ietf-event-notifications 2016-10-27 +
+# ietf-yang-push 2016-10-28) by default, or RFC 8639/8641 with --flavor rfc8641.
+
+import argparse
+import copy
+import random
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape
+
+import paramiko
+
+from sim_common import MultiListener, loopback_hosts
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+DEFAULT_PORT = 8300
+DEFAULT_INTERFACES = 48
+DEFAULT_CHANGE_INTERVAL = 5.0     # seconds between simulated oper-status flips
+USERNAME = "admin"
+PASSWORD = "admin"
+
+EOM = "]]>]]>"
+BASE_NS = "urn:ietf:params:xml:ns:netconf:base:1.0"
+NOTIF_NS = "urn:ietf:params:xml:ns:netconf:notification:1.0"
+IF_NS = "urn:ietf:params:xml:ns:yang:ietf-interfaces"
+YP_NS = "urn:ietf:params:xml:ns:yang:ietf-yang-push"
+EN_NS = "urn:ietf:params:xml:ns:yang:ietf-event-notifications"     # draft, IOS-XE 16.x
+SN_NS = "urn:ietf:params:xml:ns:yang:ietf-subscribed-notifications"  # RFC 8639
+
+CAPABILITIES = {
+    "draft": (
+        "urn:ietf:params:netconf:base:1.0",
+        "urn:ietf:params:netconf:capability:notification:1.0",
+        "urn:ietf:params:netconf:capability:interleave:1.0",
+        "urn:ietf:params:netconf:capability:xpath:1.0",
+        f"{IF_NS}?module=ietf-interfaces&revision=2014-05-08",
+        f"{EN_NS}?module=ietf-event-notifications&revision=2016-10-27&features=json,configured-subscriptions",
+        f"{YP_NS}?module=ietf-yang-push&revision=2016-10-28&features=on-change",
+    ),
+    "rfc8641": (
+        "urn:ietf:params:netconf:base:1.0",
+        "urn:ietf:params:netconf:capability:notification:1.0",
+        "urn:ietf:params:netconf:capability:interleave:1.0",
+        "urn:ietf:params:netconf:capability:xpath:1.0",
+        f"{IF_NS}?module=ietf-interfaces&revision=2014-05-08",
+        f"{SN_NS}?module=ietf-subscribed-notifications&revision=2019-09-09",
+        f"{YP_NS}?module=ietf-yang-push&revision=2019-09-09&features=on-change",
+    ),
+}
+
+
+def _local(tag):
+    return tag.rsplit("}", 1)[-1]
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+# -----------------------------
+# SIMULATED DEVICE STATE
+# -----------------------------
+class SimulatedInterfaces:
+    """Interface table shared by all sessions: counters grow with time, oper-status flips."""
+
+    def __init__(self, count=DEFAULT_INTERFACES, seed=None):
+        rnd = random.Random(seed)
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.names = [f"GigabitEthernet{i}" for i in range(1, count + 1)]
+        self.rates = [rnd.randint(1_000, 50_000_000) for _ in self.names]     # bytes/s
+        self.oper = ["up"] * count
+        self.last_change = [_now()] * count
+        self.descriptions = [f"sim port {i}" for i in range(1, count + 1)]
+        self.rnd = rnd
+
+    def flip_random(self):
+        """Toggle the oper-status of one interface; returns its index."""
+        with self.lock:
+            i = self.rnd.randrange(len(self.names))
+            self.oper[i] = "down" if self.oper[i] == "up" else "up"
+            self.last_change[i] = _now()
+            return i
+
+    def _interface_state(self, i, elapsed):
+        octets = int(self.rates[i] * elapsed)
+        pkts = octets // 500
+        return (
+            f"<interface><name>{self.names[i]}</name><type xmlns:ianaift=\"urn:ietf:params:xml:ns:yang:iana-if-type\">"
+            f"ianaift:ethernetCsmacd</type><admin-status>up</admin-status>"
+            f"<oper-status>{self.oper[i]}</oper-status><last-change>{self.last_change[i]}</last-change>"
+            f"<phys-address>00:1e:49:00:{i // 256:02x}:{i % 256:02x}</phys-address><speed>1000000000</speed>"
+            f"<statistics><discontinuity-time>{self.last_change[i]}</discontinuity-time>"
+            f"<in-octets>{octets}</in-octets><in-unicast-pkts>{pkts}</in-unicast-pkts>"
+            f"<in-discards>0</in-discards><in-errors>0</in-errors>"
+            f"<out-octets>{octets // 2}</out-octets><out-unicast-pkts>{pkts // 2}</out-unicast-pkts>"
+            f"<out-discards>0</out-discards><out-errors>0</out-errors></statistics></interface>"
+        )
+
+    def state_xml(self, indexes=None):
+        elapsed = time.time() - self.started
+        with self.lock:
+            indexes = range(len(self.names)) if indexes is None else indexes
+            body = "".join(self._interface_state(i, elapsed) for i in indexes)
+        return f'<interfaces-state xmlns="{IF_NS}">{body}</interfaces-state>'
+
+    def change_xml(self, i):
+        with self.lock:
+            return (f'<interfaces-state xmlns="{IF_NS}"><interface><name>{self.names[i]}</name>'
+                    f'<oper-status>{self.oper[i]}</oper-status><last-change>{self.last_change[i]}</last-change>'
+                    f'</interface></interfaces-state>')
+
+    def config_xml(self):
+        with self.lock:
+            body = "".join(
+                f"<interface><name>{name}</name><description>{descr}</description>"
+                f"<enabled>true</enabled></interface>"
+                for name, descr in zip(self.names, self.descriptions)
+            )
+        return f'<interfaces xmlns="{IF_NS}">{body}</interfaces>'
+
+
+# -----------------------------
+# FILTERS
+# -----------------------------
+class FilterNotSupported(Exception):
+    pass
+
+
+def _text(elem):
+    return (elem.text or "").strip()
+
+def _subtree_match(data, filt):
+    """Copy of data as selected by filter node filt (same local name), or None if it does not match."""
+    children = list(filt)
+    if not children:
+        if _text(filt) and _text(filt) != _text(data):
+            return None
+        return copy.deepcopy(data)
+    content = [c for c in children if not len(c) and _text(c)]
+    for match in content:
+        if not any(_local(d.tag) == _local(match.tag) and _text(d) == _text(match) for d in data):
+            return None
+    if len(content) == len(children):
+        return copy.deepcopy(data)            # only content match nodes: the whole entry
+    out = ET.Element(data.tag, data.attrib)
+    for child in data:
+        for f in children:
+            if _local(f.tag) == _local(child.tag):
+                selected = _subtree_match(child, f)
+                if selected is not None:
+                    out.append(selected)
+                    break
+    return out
+
+def subtree_filter(roots, filt):
+    """Top-level data elements selected by a <filter type="subtree">."""
+    out = []
+    for root in roots:
+        for f in filt:
+            if _local(f.tag) == _local(root.tag):
+                selected = _subtree_match(root, f)
+                if selected is not None:
+                    out.append(selected)
+                    break
+    return out
+
+_UNION = re.compile(r"""(?:[^|'"]|'[^']*'|"[^"]*")+""")
+_STEP = re.compile(r"""(?:[^/\['"]|\[(?:[^\]'"]|'[^']*'|"[^"]*")*\])+""")
+_STEP_PARTS = re.compile(r"^\s*(?:[\w.-]+:)?([\w.-]+|\*)\s*(?:\[(.*)\])?\s*$", re.S)
+_TERM = re.compile(r"""\s*(?:self::(?:[\w.-]+:)?([\w.-]+)|(?:[\w.-]+:)?([\w.-]+)\s*=\s*(?:'([^']*)'|"([^"]*)"))\s*(?:or|$)""")
+
+def _predicate(text):
+    """[(kind, name, value)] for 'a or b or ...' terms of a self:: test or a child = 'literal' test."""
+    terms, pos = [], 0
+    while pos < len(text):
+        m = _TERM.match(text, pos)
+        if not m or m.end() == pos:
+            raise FilterNotSupported(f"predicate [{text}]")
+        terms.append(("self", m.group(1), None) if m.group(1) else ("child", m.group(2), m.group(3) or m.group(4)))
+        pos = m.end()
+    return terms
+
+def _step_matches(elem, name, terms):
+    if name != "*" and _local(elem.tag) != name:
+        return False
+    if not terms:
+        return True
+    for kind, tag, value in terms:
+        if kind == "self" and _local(elem.tag) == tag:
+            return True
+        if kind == "child" and any(_local(c.tag) == tag and _text(c) == value for c in elem):
+            return True
+    return False
+
+def xpath_filter(roots, select):
+    """Top-level data elements holding the nodes of select, each with its ancestors."""
+    copies = {}
+    out = []
+    for path in _UNION.findall(select):
+        steps = _STEP.findall(path.strip())
+        if not steps or "/" + "/".join(steps) != path.strip():
+            raise FilterNotSupported(f"path {path.strip()}")
+        parsed = []
+        for step in steps:
+            m = _STEP_PARTS.match(step)
+            if not m:
+                raise FilterNotSupported(f"step {step}")
+            parsed.append((m.group(1), _predicate(m.group(2)) if m.group(2) else []))
+        nodes = [(root, ()) for root in roots if _step_matches(root, *parsed[0])]
+        for name, terms in parsed[1:]:
+            nodes = [(child, ancestors + (node,)) for node, ancestors in nodes
+                     for child in node if _step_matches(child, name, terms)]
+        for node, ancestors in nodes:
+            parent = None
+            for elem in ancestors:
+                if id(elem) not in copies:
+                    copies[id(elem)] = ET.Element(elem.tag, elem.attrib)
+                    (parent.append if parent is not None else out.append)(copies[id(elem)])
+                parent = copies[id(elem)]
+            if id(node) not in copies:
+                copies[id(node)] = copy.deepcopy(node)
+                (parent.append if parent is not None else out.append)(copies[id(node)])
+    return out
+
+def filtered_data(op, data_xml):
+    """The <data> body for a get / get-config op, with its <filter> applied."""
+    filt = next((child for child in op if _local(child.tag) == "filter"), None)
+    if filt is None:
+        return data_xml
+    roots = list(ET.fromstring(f"<data>{data_xml}</data>"))
+    if filt.get("type") == "xpath":
+        selected = xpath_filter(roots, filt.get("select") or "")
+    else:
+        selected = subtree_filter(roots, filt)
+    return "".join(ET.tostring(elem, encoding="unicode", default_namespace=elem.tag[1:].split("}")[0])
+                   for elem in selected)
+
+
+# -----------------------------
+# ONE NETCONF SESSION
+# -----------------------------
+class Subscription:
+    def __init__(self, sub_id, period=None, on_change=False, dampening=0.0):
+        self.id = sub_id
+        self.period = period            # seconds, periodic subscriptions
+        self.on_change = on_change
+        self.dampening = dampening      # seconds, on-change subscriptions
+        self.last_sent = 0.0
+        self.stop = threading.Event()
+
+
+class NetconfSession:
+    """Serves one SSH channel: EOM framing, one rpc at a time, notifications interleaved."""
+
+    def __init__(self, server, channel, session_id):
+        self.server = server
+        self.channel = channel
+        self.session_id = session_id
+        self.send_lock = threading.Lock()
+        self.subscriptions = {}
+        self.closed = threading.Event()
+
+    # framing
+    def send(self, text):
+        with self.send_lock:
+            if not self.closed.is_set():
+                self.channel.sendall((text + EOM).encode("utf-8"))
+
+    def messages(self):
+        eom = EOM.encode()
+        buf = b""
+        while not self.closed.is_set():
+            data = self.channel.recv(65536)
+            if not data:
+                return
+            buf += data
+            while eom in buf:
+                msg, buf = buf.split(eom, 1)
+                if msg.strip():
+                    yield msg.decode("utf-8")
+
+    # session
+    def run(self):
+        caps = "".join(f"<capability>{escape(c)}</capability>" for c in CAPABILITIES[self.server.flavor])
+        self.send(f'<?xml version="1.0" encoding="UTF-8"?><hello xmlns="{BASE_NS}">'
+                  f'<capabilities>{caps}</capabilities><session-id>{self.session_id}</session-id></hello>')
+        try:
+            for msg in self.messages():
+                root = ET.fromstring(msg)
+                if _local(root.tag) == "rpc":
+                    self.handle_rpc(root)
+        except (OSError, EOFError, ET.ParseError):
+            pass
+        finally:
+            self.close()
+
+    def close(self):
+        for sub in self.subscriptions.values():
+            sub.stop.set()
+        self.closed.set()
+        self.server.sessions.discard(self)
+        try:
+            self.channel.close()
+        except Exception:
+            pass
+
+    def reply(self, rpc, body):
+        attrs = "".join(f' {k}="{v}"' for k, v in rpc.attrib.items())
+        self.send(f'<rpc-reply xmlns="{BASE_NS}"{attrs}>{body}</rpc-reply>')
+
+    def rpc_error(self, rpc, tag, message):
+        self.reply(rpc, f"<rpc-error><error-type>protocol</error-type><error-tag>{tag}</error-tag>"
+                        f"<error-severity>error</error-severity><error-message>{message}</error-message></rpc-error>")
+
+    def handle_rpc(self, rpc):
+        op = rpc[0] if len(rpc) else None
+        name = _local(op.tag) if op is not None else ""
+        state = self.server.interfaces
+        self.server.delay()
+        if name in ("get", "get-config"):
+            data = state.config_xml() + (state.state_xml() if name == "get" else "")
+            try:
+                self.reply(rpc, f"<data>{filtered_data(op, data)}</data>")
+            except FilterNotSupported as e:
+                self.rpc_error(rpc, "invalid-value", f"filter not supported by the simulator: {e}")
+        elif name in ("edit-config", "lock", "unlock", "commit", "discard-changes", "cancel-commit"):
+            self.reply(rpc, "<ok/>")
+        elif name == "establish-subscription":
+            self.establish_subscription(rpc, op)
+        elif name == "delete-subscription":
+            for child in op:
+                sub = self.subscriptions.pop(int(child.text or 0), None)
+                if sub:
+                    sub.stop.set()
+            self.reply(rpc, "<ok/>")
+        elif name == "close-session":
+            self.reply(rpc, "<ok/>")
+            self.closed.set()
+        else:
+            self.rpc_error(rpc, "operation-not-supported", f"{name} not supported by the simulator")
+
+    # subscriptions
+    def establish_subscription(self, rpc, op):
+        leaves = {_local(e.tag): (e.text or "").strip() for e in op.iter()}
+        on_change = "dampening-period" in leaves or "on-change" in leaves
+        period = int(leaves["period"]) / 100.0 if leaves.get("period") else None   # centiseconds
+        if not on_change and not period:
+            self.rpc_error(rpc, "invalid-value", "period or dampening-period required")
+            return
+        sub_id = self.server.next_subscription_id()
+        sub = Subscription(sub_id, period=period, on_change=on_change,
+                           dampening=int(leaves.get("dampening-period") or 0) / 100.0)
+        self.subscriptions[sub_id] = sub
+        if self.server.flavor == "draft":
+            self.reply(rpc, f'<subscription-result xmlns="{EN_NS}" xmlns:notif-bis="{EN_NS}">notif-bis:ok'
+                            f'</subscription-result><subscription-id xmlns="{EN_NS}">{sub_id}</subscription-id>')
+        else:
+            self.reply(rpc, f'<id xmlns="{SN_NS}">{sub_id}</id>')
+        if period:
+            threading.Thread(target=self.periodic, args=(sub,), daemon=True,
+                             name=f"sim-periodic-{sub_id}").start()
+
+    def _id_leaf(self, sub_id):
+        return f"<subscription-id>{sub_id}</subscription-id>" if self.server.flavor == "draft" else f"<id>{sub_id}</id>"
+
+    def notify(self, body):
+        self.send(f'<notification xmlns="{NOTIF_NS}"><eventTime>{_now()}</eventTime>{body}</notification>')
+
+    def periodic(self, sub):
+        content = "datastore-contents-xml" if self.server.flavor == "draft" else "datastore-contents"
+        next_run = time.monotonic()
+        while not sub.stop.is_set() and not self.closed.is_set():
+            data = self.server.interfaces.state_xml()
+            try:
+                self.notify(f'<push-update xmlns="{YP_NS}">{self._id_leaf(sub.id)}'
+                            f'<{content}>{data}</{content}></push-update>')
+            except (OSError, EOFError):
+                return
+            next_run += sub.period
+            sub.stop.wait(max(0.0, next_run - time.monotonic()))
+
+    def on_change(self, index):
+        content = "datastore-changes-xml" if self.server.flavor == "draft" else "datastore-changes"
+        now = time.monotonic()
+        for sub in list(self.subscriptions.values()):
+            if not sub.on_change or now - sub.last_sent < sub.dampening:
+                continue
+            sub.last_sent = now
+            data = self.server.interfaces.change_xml(index)
+            self.notify(f'<push-change-update xmlns="{YP_NS}">{self._id_leaf(sub.id)}'
+                        f'<{content}>{data}</{content}></push-change-update>')
+
+
+# -----------------------------
+# SSH SERVER
+# -----------------------------
+class _SSHServer(paramiko.ServerInterface):
+    def __init__(self, simulator):
+        self.simulator = simulator
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_auth_password(self, username, password):
+        if (username, password) == (self.simulator.username, self.simulator.password):
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_subsystem_request(self, channel, name):
+        if name != "netconf":
+            return False
+        session = NetconfSession(self.simulator, channel, self.simulator.next_session_id())
+        self.simulator.sessions.add(session)
+        threading.Thread(target=session.run, daemon=True, name=f"sim-session-{session.session_id}").start()
+        return True
+
+
+class NetconfSimulator:
+    """NETCONF-over-SSH stand-in; use start()/stop() or as a context manager."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, interfaces=DEFAULT_INTERFACES,
+                 flavor="draft", change_interval=DEFAULT_CHANGE_INTERVAL,
+                 username=USERNAME, password=PASSWORD, host_key=None, hosts=None, rpc_delay=0.0):
+        if flavor not in CAPABILITIES:
+            raise ValueError(f"flavor must be one of {sorted(CAPABILITIES)}")
+        self.hosts = list(hosts) if hosts else [host]    # every address is one simulated device
+        self.host = self.hosts[0]
+        self.rpc_delay = rpc_delay
+        self.flavor = flavor
+        self.change_interval = change_interval
+        self.username = username
+        self.password = password
+        self.interfaces = SimulatedInterfaces(interfaces)
+        self.host_key = host_key or paramiko.RSAKey.generate(2048)
+        self.sessions = set()
+        self._ids = 0
+        self._sub_ids = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.listener = MultiListener(self.hosts, port, self._serve_client)
+        self._threads = []
+
+    @property
+    def port(self):
+        return self.listener.port
+
+    def next_session_id(self):
+        with self._lock:
+            self._ids += 1
+            return self._ids
+
+    def next_subscription_id(self):
+        with self._lock:
+            self._sub_ids += 1
+            return 2147483647 + self._sub_ids    # IOS-XE dynamic subscription ids start at 2^31
+
+    def delay(self):
+        if self.rpc_delay:
+            time.sleep(self.rpc_delay)
+
+    def start(self):
+        self.listener.start()                       # port=0 picks a free port
+        thread = threading.Thread(target=self._change_loop, daemon=True, name="sim-changes")
+        thread.start()
+        self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for session in list(self.sessions):
+            session.close()
+        self.listener.stop()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve_client(self, client, peer=None, local=None):
+        transport = paramiko.Transport(client)
+        transport.add_server_key(self.host_key)
+        try:
+            transport.start_server(server=_SSHServer(self))
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+
+    def _change_loop(self):
+        if not self.change_interval:
+            return
+        while not self._stop.wait(self.change_interval):
+            index = self.interfaces.flip_random()
+            for session in list(self.sessions):
+                try:
+                    session.on_change(index)
+                except (OSError, EOFError):
+                    session.close()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while not self._stop.wait(1):
+                pass
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in NETCONF server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--devices", type=int, default=1, help="number of loopback addresses to serve, from --host")
+    parser.add_argument("--interfaces", type=int, default=DEFAULT_INTERFACES)
+    parser.add_argument("--flavor", choices=sorted(CAPABILITIES), default="draft")
+    parser.add_argument("--change-interval", type=float, default=DEFAULT_CHANGE_INTERVAL,
+                        help="seconds between simulated oper-status changes (0 = never)")
+    parser.add_argument("--rpc-delay", type=float, default=0.0, help="seconds added to every rpc")
+    args = parser.parse_args()
+
+    sim = NetconfSimulator(port=args.port, interfaces=args.interfaces, flavor=args.flavor,
+                           change_interval=args.change_interval, hosts=loopback_hosts(args.devices, args.host),
+                           rpc_delay=args.rpc_delay)
+    print(f"NETCONF simulator on {sim.hosts[0]}..{sim.hosts[-1]}:{args.port} ({args.interfaces} interfaces, "
+          f"{args.flavor}), login {USERNAME}/{PASSWORD}", flush=True)
+    try:
+        sim.serve_forever()
+    except KeyboardInterrupt:
+        pass
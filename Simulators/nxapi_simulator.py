@@ -0,0 +1,475 @@
+### Local stand-in NX-API server (HTTPS): NX-API CLI /ins and NX-API REST /api
+### Covers what the NX-OS scripts use: cli_show (also chunk mode), aaaLogin / aaaRefresh,
+### l1PhysIf class queries and description updates.
+#
+#   python nxapi_simulator.py --port 8444 --interfaces 64 --routes 50000
+#   python nxapi_simulator.py --port 8444 --devices 100     # 127.0.0.1 ... 127.0.0.100
+#   python nxapi_simulator.py --port 8444 --devices 1000 --spines 4   # a spine-leaf fabric
+#
+# device = {"host": "127.0.0.1", "port": "8444", "username": "admin", "password": "admin"}
+#
+# Show command bodies are generated once per size and cached (JSON text too, so chunk
+# mode only slices it). Interface descriptions are kept per simulated device address.
+# With --spines the addresses form a sim_common.Fabric: "show hostname" and "show
+# cdp/lldp neighbors [detail]" answer each address with its own name and adjacencies,
+# built per request so a Fabric.cut() shows up at once.
+
+import argparse
+import base64
+import json
+import secrets
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+from sim_common import Fabric, HTTPSimulatorBase, loopback_hosts
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+DEFAULT_PORT = 8444
+DEFAULT_INTERFACES = 64
+DEFAULT_ROUTES = 1000
+DEFAULT_MACS = 1000
+CHUNK_SIZE = 64 * 1024         # characters of JSON text per chunk-mode reply
+REFRESH_TIMEOUT = 600
+MAX_LIFETIME = 86400
+USERNAME = "admin"
+PASSWORD = "admin"
+
+
+def _table(name, rows):
+    return {f"TABLE_{name}": {f"ROW_{name}": rows}}
+
+def _short(intf):
+    """LLDP on NX-OS names ports the short way: "Ethernet1/1" -> "Eth1/1", "GigabitEthernet1/0/49" -> "Gi1/0/49"."""
+    for full, short in (("GigabitEthernet", "Gi"), ("Ethernet", "Eth")):
+        if intf.startswith(full):
+            return short + intf[len(full):]
+    return intf
+
+def _ifindex(intf):
+    return str(436207616 + int(intf.rsplit("/", 1)[-1]) * 4096)
+
+# neighbor dicts as Fabric.neighbors() gives them -> bodies of the neighbor commands
+def cdp_brief(neighbors):
+    rows = [
+        {"ifindex": _ifindex(n["local_intf"]), "device_id": f"{n['name']}({n['serial']})",
+         "intf_id": n["local_intf"], "ttl": "150", "capability": ["router", "switch"],
+         "platform_id": n["platform"], "port_id": n["remote_intf"]}
+        for n in neighbors
+    ]
+    return {"neigh_count": len(rows), **_table("cdp_neighbor_brief_info", rows)}
+
+def cdp_detail(neighbors):
+    rows = [
+        {"ifindex": _ifindex(n["local_intf"]), "device_id": f"{n['name']}({n['serial']})",
+         "sysname": n["name"], "numaddr": "1", "v4addr": n["address"], "platform_id": n["platform"],
+         "capability": ["router", "switch"], "intf_id": n["local_intf"], "port_id": n["remote_intf"],
+         "ttl": "150", "version": "Cisco Nexus Operating System (NX-OS) Software, Version 9.3(5)",
+         "version_no": "v2", "nativevlan": "1", "duplexmode": "full", "nummgmtaddr": "1",
+         "v4mgmtaddr": n["address"]}
+        for n in neighbors
+    ]
+    return _table("cdp_neighbor_detail_info", rows)
+
+def lldp_brief(neighbors):
+    rows = [
+        {"chassis_id": n["name"], "l_port_id": _short(n["local_intf"]), "hold_time": "120",
+         "capability": "BR", "port_id": _short(n["remote_intf"])}
+        for n in neighbors
+    ]
+    return {"neigh_hdr": "neigh_hdr", **_table("nbor", rows), "neigh_count": len(rows)}
+
+def lldp_detail(neighbors):
+    rows = [
+        {"chassis_id": n["serial"], "port_id": _short(n["remote_intf"]), "local_port_id": _short(n["local_intf"]),
+         "port_desc": "", "sys_name": n["name"], "sys_desc": n["platform"], "ttl": "120",
+         "capability": "BR", "enabled_capability": "BR", "mgmt_addr_type": "IPV4",
+         "mgmt_addr": n["address"], "vlan_id": "1"}
+        for n in neighbors
+    ]
+    return _table("nbor_detail", rows)
+
+NEIGHBOR_COMMANDS = {
+    "show cdp neighbors": cdp_brief,
+    "show cdp neighbors detail": cdp_detail,
+    "show lldp neighbors": lldp_brief,
+    "show lldp neighbors detail": lldp_detail,
+}
+
+
+class ShowOutputs:
+    """Bodies of the supported show commands for one simulated switch size."""
+
+    def __init__(self, interfaces=DEFAULT_INTERFACES, routes=DEFAULT_ROUTES, macs=DEFAULT_MACS):
+        self.interfaces = interfaces
+        self.routes = routes
+        self.macs = macs
+        self._bodies = {}
+        self._texts = {}
+        self._lock = threading.Lock()
+        self.generators = {
+            "show version": self.show_version,
+            "show hostname": lambda: {"hostname": "nxapi-sim"},
+            "show ip interface brief": self.show_ip_interface_brief,
+            "show interface status": self.show_interface_status,
+            **{command: (lambda build=build: build(self.neighbors()))
+               for command, build in NEIGHBOR_COMMANDS.items()},
+            "show ip route": self.show_ip_route,
+            "show mac address-table": self.show_mac_address_table,
+        }
+
+    def resolve(self, command):
+        """The simulated command that command abbreviates, or None."""
+        words = command.lower().split()
+        # NX-OS accepts unambiguous abbreviations: "show ip int br" == "show ip interface brief"
+        return next((c for c in self.generators
+                     if len(c.split()) == len(words) and all(k.startswith(w) for w, k in zip(words, c.split()))),
+                    None)
+
+    def body(self, command):
+        """Cached body dict for command, or None if the command is not simulated."""
+        key = self.resolve(command)
+        if key is None:
+            return None
+        with self._lock:
+            if key not in self._bodies:
+                self._bodies[key] = self.generators[key]()
+            return self._bodies[key]
+
+    def text(self, command):
+        body = self.body(command)
+        if body is None:
+            return None
+        with self._lock:
+            if id(body) not in self._texts:
+                self._texts[id(body)] = json.dumps(body)
+            return self._texts[id(body)]
+
+    def show_version(self):
+        return {
+            "header_str": "Cisco Nexus Operating System (NX-OS) Software\nNX-API simulator\n",
+            "kickstart_ver_str": "9.3(5)",
+            "nxos_ver_str": "9.3(5)",
+            "chassis_id": "Nexus9000 C9300v Chassis",
+            "host_name": "nxapi-sim",
+            "memory": 5063128,
+            "mem_type": "kB",
+            "kern_uptm_days": 1,
+            **_table("package_list", {"package_id": ""}),
+        }
+
+    def show_ip_interface_brief(self):
+        return _table("intf", [
+            {"vrf-name-out": "default", "intf-name": f"Eth1/{i}", "proto-state": "up", "link-state": "up",
+             "admin-state": "up", "iod": i + 4, "prefix": f"10.{i // 250}.{i % 250}.1", "ip-disabled": "FALSE"}
+            for i in range(1, self.interfaces + 1)
+        ])
+
+    def show_interface_status(self):
+        return _table("interface", [
+            {"interface": f"Ethernet1/{i}", "state": "connected" if i % 5 else "notconnect", "vlan": "1",
+             "duplex": "full", "speed": "10G", "type": "10g"}
+            for i in range(1, self.interfaces + 1)
+        ])
+
+    def neighbors(self):
+        """A neighbor on every odd port, for a switch that is not part of a Fabric."""
+        return [
+            {"name": f"leaf-{i}", "serial": f"FDO2{i:05d}", "address": f"192.168.{i // 250}.{i % 250 + 1}",
+             "platform": "N9K-C9300v", "local_intf": f"Ethernet1/{i}", "remote_intf": f"Ethernet1/{(i % 48) + 1}"}
+            for i in range(1, self.interfaces + 1, 2)
+        ]
+
+    def show_ip_route(self):
+        prefixes = [
+            {"ipprefix": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}/32", "ucast-nhops": "1",
+             "mcast-nhops": "0", "attached": "false",
+             **_table("path", [{"ipnexthop": f"192.168.{i % 4}.1", "ifname": f"Eth1/{i % 48 + 1}",
+                                "uptime": "P1DT2H", "pref": "110", "metric": "41", "clientname": "ospf-1",
+                                "type": "intra", "ubest": "true"}])}
+            for i in range(self.routes)
+        ]
+        return _table("vrf", [{"vrf-name-out": "default",
+                               **_table("addrf", [{"addrf": "ipv4", **_table("prefix", prefixes)}])}])
+
+    def show_mac_address_table(self):
+        return _table("mac_address", [
+            {"disp_mac_addr": f"0050.56{(i >> 16) & 255:02x}.{(i >> 8) & 255:02x}{i & 255:02x}",
+             "disp_type": "dynamic", "disp_vlan": str(i % 100 + 1), "disp_is_static": "disabled",
+             "disp_age": "0", "disp_is_secure": "disabled", "disp_is_ntfy": "disabled",
+             "disp_port": f"Ethernet1/{i % 48 + 1}"}
+            for i in range(self.macs)
+        ])
+
+
+class NxapiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "nxapi-sim"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def sim(self):
+        return self.server.simulator
+
+    def _send_json(self, status, data, cookie=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if cookie:
+            self.send_header("Set-Cookie", f"APIC-cookie={cookie}; path=/; HttpOnly")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            return json.loads(raw) if raw else {}
+        except ValueError:
+            return None
+
+    def _basic_auth_ok(self):
+        header = self.headers.get("Authorization") or ""
+        if not header.startswith("Basic "):
+            return False
+        try:
+            user, _, pwd = base64.b64decode(header[6:]).decode().partition(":")
+        except ValueError:
+            return False
+        return (user, pwd) == (USERNAME, PASSWORD)
+
+    def _token(self):
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "APIC-cookie":
+                return value
+        return None
+
+    def _api_error(self, status, text):
+        self._send_json(status, {"totalCount": "1", "imdata": [{"error": {"attributes": {"code": str(status),
+                                                                                         "text": text}}}]})
+
+    # -----------------------------
+    # ROUTING
+    # -----------------------------
+    def do_POST(self):
+        self._throttled(self.route_post)
+
+    def do_GET(self):
+        self._throttled(self.route_get)
+
+    def _throttled(self, route):
+        host = self.connection.getsockname()[0]
+        if not self.sim.enter(host):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            self._api_error(429, "too many requests")
+            return
+        try:
+            route(unquote(urlsplit(self.path).path))
+        finally:
+            self.sim.leave(host)
+
+    def route_post(self, path):
+        self.sim.delay()
+        if path == "/ins":
+            self.ins()
+        elif path == "/api/aaaLogin.json":
+            self.aaa_login()
+        elif path.startswith("/api/"):
+            self.api_post(path)
+        else:
+            self._api_error(404, "unknown resource")
+
+    def route_get(self, path):
+        self.sim.delay()
+        if path == "/api/aaaRefresh.json":
+            self.aaa_refresh()
+        elif path == "/api/node/class/l1PhysIf.json":
+            self.class_l1physif()
+        else:
+            self._api_error(404, "unknown resource")
+
+    # -----------------------------
+    # NX-API CLI
+    # -----------------------------
+    def ins(self):
+        if not self._basic_auth_ok():
+            self._send_json(401, {"ins_api": {"outputs": {"output": {"code": "401", "msg": "Unauthorized"}}}})
+            return
+        request = (self._read_json() or {}).get("ins_api", {})
+        commands = [c.strip() for c in str(request.get("input", "")).split(";") if c.strip()]
+        chunked = str(request.get("chunk", "0")) == "1"
+        if chunked:
+            self.ins_chunk(commands[0] if commands else "", str(request.get("sid", "1")))
+            return
+        outputs = []
+        host = self.connection.getsockname()[0]
+        for command in commands:
+            body = self.sim.body(host, command)
+            if body is None:
+                outputs.append({"input": command, "msg": "Input CLI command error", "code": "400",
+                                "clierror": "% Invalid command at '^' marker.\n"})
+            else:
+                outputs.append({"input": command, "msg": "Success", "code": "200", "body": body})
+        output = outputs[0] if len(outputs) == 1 else outputs
+        self._send_json(200, {"ins_api": {"type": "cli_show", "version": "1.0", "sid": "eoc",
+                                          "outputs": {"output": output}}})
+
+    def ins_chunk(self, command, sid):
+        """Chunk mode: sid N returns the N-th slice of the JSON text; the last one says eoc."""
+        text = self.sim.outputs.text(command)
+        if text is None:
+            self._send_json(200, {"ins_api": {"sid": "eoc", "outputs": {"output": {
+                "input": command, "code": "400", "msg": "Input CLI command error"}}}})
+            return
+        index = int(sid) if sid.isdigit() and int(sid) > 0 else 1
+        piece = text[(index - 1) * self.sim.chunk_size:index * self.sim.chunk_size]
+        more = index * self.sim.chunk_size < len(text)
+        self._send_json(200, {"ins_api": {"type": "cli_show", "version": "1.0",
+                                          "sid": str(index + 1) if more else "eoc",
+                                          "outputs": {"output": {"input": command, "msg": "Success",
+                                                                 "code": "200", "body": piece}}}})
+
+    # -----------------------------
+    # NX-API REST
+    # -----------------------------
+    def _login_reply(self, root, token):
+        return {"totalCount": "1", "imdata": [{root: {"attributes": {
+            "token": token, "refreshTimeoutSeconds": str(REFRESH_TIMEOUT),
+            "maximumLifetimeSeconds": str(MAX_LIFETIME), "userName": USERNAME}}}]}
+
+    def aaa_login(self):
+        attrs = ((self._read_json() or {}).get("aaaUser") or {}).get("attributes") or {}
+        if (attrs.get("name"), attrs.get("pwd")) != (USERNAME, PASSWORD):
+            self._api_error(401, "Username or password is incorrect")
+            return
+        token = self.sim.new_token()
+        self._send_json(200, self._login_reply("aaaLogin", token), cookie=token)
+
+    def aaa_refresh(self):
+        token = self._token()
+        if not self.sim.token_valid(token):
+            self._api_error(403, "Token was invalid (Error: Token timeout)")
+            return
+        self.sim.refresh_token(token)
+        self._send_json(200, self._login_reply("aaaRefresh", token), cookie=token)
+
+    def class_l1physif(self):
+        if not self.sim.token_valid(self._token()):
+            self._api_error(403, "Token was invalid (Error: Token timeout)")
+            return
+        descr = self.sim.descriptions(self.connection.getsockname()[0])
+        imdata = [{"l1PhysIf": {"attributes": {"id": intf, "descr": text, "adminSt": "up",
+                                               "dn": f"sys/intf/phys-[{intf}]"}}}
+                  for intf, text in descr.items()]
+        self._send_json(200, {"totalCount": str(len(imdata)), "imdata": imdata})
+
+    def api_post(self, path):
+        if not self.sim.token_valid(self._token()):
+            self._api_error(403, "Token was invalid (Error: Token timeout)")
+            return
+        body = self._read_json()
+        if body is None:
+            self._api_error(400, "malformed JSON")
+            return
+        descr = self.sim.descriptions(self.connection.getsockname()[0])
+        updates = {}
+        if path in ("/api/mo/sys/intf.json", "/api/node/mo/sys/intf.json"):
+            for child in (body.get("interfaceEntity") or {}).get("children", []):
+                attrs = (child.get("l1PhysIf") or {}).get("attributes") or {}
+                if "id" in attrs and "descr" in attrs:
+                    updates[attrs["id"].lower()] = attrs["descr"]
+        elif "/sys/intf/phys-[" in path:
+            intf = path.split("phys-[", 1)[1].split("]", 1)[0].lower()
+            attrs = (body.get("l1PhysIf") or {}).get("attributes") or {}
+            if "descr" in attrs:
+                updates[intf] = attrs["descr"]
+        else:
+            self._api_error(400, "unsupported managed object")
+            return
+        unknown = [intf for intf in updates if intf not in descr]
+        if unknown:
+            self._api_error(400, f"unknown interface {unknown[0]}")
+            return
+        with self.sim.lock:
+            descr.update(updates)
+        self._send_json(200, {"totalCount": "0", "imdata": []})
+
+
+class NxapiSimulator(HTTPSimulatorBase):
+    """HTTPS NX-API stand-in; use start()/stop() or as a context manager."""
+
+    def __init__(self, hosts=("127.0.0.1",), port=DEFAULT_PORT, interfaces=DEFAULT_INTERFACES,
+                 routes=DEFAULT_ROUTES, macs=DEFAULT_MACS, rpc_delay=0.0, chunk_size=CHUNK_SIZE, max_inflight=0,
+                 fabric=None):
+        super().__init__(NxapiHandler, hosts=hosts, port=port, rpc_delay=rpc_delay, max_inflight=max_inflight)
+        self.outputs = ShowOutputs(interfaces, routes, macs)
+        self.fabric = fabric
+        self.chunk_size = chunk_size
+        self.lock = threading.Lock()
+        self._tokens = {}             # token -> refreshed at
+        self._descr = {}              # device address -> {"eth1/1": descr}
+
+    def body(self, host, command):
+        """Body of command on the switch at host: its own adjacencies when it is in the fabric."""
+        if self.fabric is not None:
+            key = self.outputs.resolve(command)
+            if key == "show hostname":
+                return {"hostname": self.fabric.name(host)}
+            if key in NEIGHBOR_COMMANDS:
+                return NEIGHBOR_COMMANDS[key](self.fabric.neighbors(host))
+        return self.outputs.body(command)
+
+    def new_token(self):
+        token = secrets.token_urlsafe(24)
+        with self.lock:
+            self._tokens[token] = time.time()
+        return token
+
+    def token_valid(self, token):
+        with self.lock:
+            refreshed = self._tokens.get(token)
+        return refreshed is not None and time.time() - refreshed < REFRESH_TIMEOUT
+
+    def refresh_token(self, token):
+        with self.lock:
+            self._tokens[token] = time.time()
+
+    def descriptions(self, host):
+        with self.lock:
+            if host not in self._descr:
+                self._descr[host] = {f"eth1/{i}": "" for i in range(1, self.outputs.interfaces + 1)}
+            return self._descr[host]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in NX-API server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--devices", type=int, default=1, help="number of loopback addresses to serve")
+    parser.add_argument("--interfaces", type=int, default=DEFAULT_INTERFACES)
+    parser.add_argument("--routes", type=int, default=DEFAULT_ROUTES)
+    parser.add_argument("--macs", type=int, default=DEFAULT_MACS)
+    parser.add_argument("--rpc-delay", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--max-inflight", type=int, default=0,
+                        help="concurrent requests per device before answering 429 (0 = unlimited)")
+    parser.add_argument("--spines", type=int, default=0,
+                        help="cable the devices as a spine-leaf fabric with this many spines (0 = no fabric)")
+    parser.add_argument("--ios-every", type=int, default=0, help="in the fabric, every Nth leaf is IOS-XE")
+    args = parser.parse_args()
+
+    hosts = loopback_hosts(args.devices)
+    fabric = Fabric(hosts, args.spines, args.ios_every) if args.spines else None
+    sim = NxapiSimulator(hosts, args.port, args.interfaces, args.routes, args.macs,
+                         args.rpc_delay, max_inflight=args.max_inflight, fabric=fabric)
+    print(f"NX-API simulator on {sim.hosts[0]}..{sim.hosts[-1]}:{args.port} "
+          f"({args.interfaces} interfaces, {args.routes} routes), login {USERNAME}/{PASSWORD}", flush=True)
+    try:
+        sim.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,211 @@
+### Local stand-in RESTCONF server (HTTPS) for Cisco-IOS-XE-interfaces-oper
+### Serves the interface list and single interfaces the IOS-XE/RESTCONF scripts read,
+### and with a fabric the hostname and the Cisco-IOS-XE-cdp-oper / -lldp-oper neighbor tables.
+#
+#   python restconf_simulator.py --port 8443 --interfaces 48
+#   python restconf_simulator.py --port 8443 --devices 100     # 127.0.0.1 ... 127.0.0.100
+#   python restconf_simulator.py --port 8443 --devices 1000 --spines 4 --ios-every 5
+#
+# device = {"host": "127.0.0.1", "port": "8443", "username": "admin", "password": "admin"}
+#
+# Replies are canned: the JSON (and its gzip form) is built once per interface count,
+# so the server costs little next to the client being measured. fields= and depth=
+# are accepted and ignored. HTTP/1.1 keep-alive, basic auth, self-signed TLS.
+# Neighbor tables are built per request from the sim_common.Fabric, one per address.
+
+import argparse
+import base64
+import gzip
+import json
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import unquote, urlsplit
+
+from sim_common import Fabric, HTTPSimulatorBase, loopback_hosts
+
+# -----------------------------
+# SETTINGS
+# -----------------------------
+DEFAULT_PORT = 8443
+DEFAULT_INTERFACES = 48
+USERNAME = "admin"
+PASSWORD = "admin"
+OPER_MODULE = "Cisco-IOS-XE-interfaces-oper"
+CDP_MODULE = "Cisco-IOS-XE-cdp-oper"
+LLDP_MODULE = "Cisco-IOS-XE-lldp-oper"
+NATIVE_MODULE = "Cisco-IOS-XE-native"
+DATA_PREFIX = "/restconf/data/"
+
+
+def interface_object(i):
+    return {
+        "name": f"GigabitEthernet{i}",
+        "interface-type": "iana-iftype-ethernet-csmacd",
+        "admin-status": "if-state-up",
+        "oper-status": "if-oper-state-ready" if i % 7 else "if-oper-state-no-pass",
+        "last-change": "2025-12-07T09:38:00.000635+00:00",
+        "if-index": i,
+        "phys-address": f"00:1e:49:00:{i // 256:02x}:{i % 256:02x}",
+        "speed": "1000000000",
+        "description": f"sim port {i}",
+        "statistics": {
+            "in-octets": str(i * 1_000_003),
+            "in-unicast-pkts": str(i * 2_001),
+            "out-octets": str(i * 700_001),
+            "out-unicast-pkts": str(i * 1_501),
+            "in-errors": 0,
+            "out-errors": 0,
+        },
+    }
+
+def cdp_neighbor_details(neighbors):
+    return {f"{CDP_MODULE}:cdp-neighbor-details": {"cdp-neighbor-detail": [
+        {"device-id": i, "device-name": f"{n['name']}({n['serial']})", "local-intf-name": n["local_intf"],
+         "port-id": n["remote_intf"], "capability": "router switch igmp", "platform-name": n["platform"],
+         "version": "", "duplex": "cdp-full-duplex", "advertisement-ver": 2, "hold-time": 150,
+         "mgmt-address": n["address"], "ip-address": n["address"]}
+        for i, n in enumerate(neighbors, 1)
+    ]}}
+
+def lldp_entries(neighbors):
+    return {f"{LLDP_MODULE}:lldp-entries": {"lldp-entry": [
+        {"device-id": n["name"], "local-interface": n["local_intf"], "connecting-interface": n["remote_intf"],
+         "ttl": 120, "capabilities": {"router": [None], "bridge": [None]}}
+        for n in neighbors
+    ]}}
+
+# resource -> body for one fabric address
+FABRIC_RESOURCES = {
+    f"{CDP_MODULE}:cdp-neighbor-details": lambda fabric, host: cdp_neighbor_details(fabric.neighbors(host)),
+    f"{LLDP_MODULE}:lldp-entries": lambda fabric, host: lldp_entries(fabric.neighbors(host)),
+    f"{NATIVE_MODULE}:native/hostname": lambda fabric, host: {f"{NATIVE_MODULE}:hostname": fabric.name(host)},
+}
+
+
+class CannedReplies:
+    """JSON bodies (plain and gzip) built once and reused for every request."""
+
+    def __init__(self, interfaces):
+        self.objects = {obj["name"]: obj for obj in (interface_object(i) for i in range(1, interfaces + 1))}
+        listing = {f"{OPER_MODULE}:interfaces": {"interface": list(self.objects.values())}}
+        self.listing = self._encode(listing)
+        self.single = {}
+
+    @staticmethod
+    def _encode(data):
+        body = json.dumps(data).encode("utf-8")
+        return body, gzip.compress(body, compresslevel=5)
+
+    def interface(self, name):
+        if name not in self.single:
+            obj = self.objects.get(name)
+            if obj is None:
+                return None
+            self.single[name] = self._encode({f"{OPER_MODULE}:interface": [obj]})
+        return self.single[name]
+
+
+class RestconfHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "restconf-sim"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="application/yang-data+json", gz=None):
+        use_gzip = gz is not None and "gzip" in (self.headers.get("Accept-Encoding") or "")
+        payload = gz if use_gzip else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+
+    def _error(self, status, tag, message):
+        body = json.dumps({"ietf-restconf:errors": {"error": [
+            {"error-type": "application", "error-tag": tag, "error-message": message}]}}).encode()
+        self._send(status, body)
+
+    def _authorized(self):
+        header = self.headers.get("Authorization") or ""
+        if not header.startswith("Basic "):
+            return False
+        try:
+            user, _, pwd = base64.b64decode(header[6:]).decode().partition(":")
+        except ValueError:
+            return False
+        return (user, pwd) == (USERNAME, PASSWORD)
+
+    def do_GET(self):
+        sim = self.server.simulator
+        host = self.connection.getsockname()[0]
+        if not sim.enter(host):
+            self._error(429, "resource-denied", "too many requests")
+            return
+        try:
+            self.get_resource(sim)
+        finally:
+            sim.leave(host)
+
+    def get_resource(self, sim):
+        if not self._authorized():
+            self._error(401, "access-denied", "authentication failed")
+            return
+        path = unquote(urlsplit(self.path).path)
+        if not path.startswith(DATA_PREFIX):
+            self._error(404, "invalid-value", "unknown resource")
+            return
+        resource = path[len(DATA_PREFIX):].rstrip("/")
+        sim.delay()
+        if resource in FABRIC_RESOURCES and sim.fabric is not None:
+            data = FABRIC_RESOURCES[resource](sim.fabric, self.connection.getsockname()[0])
+            self._send(200, json.dumps(data).encode("utf-8"))
+            return
+        if resource == f"{OPER_MODULE}:interfaces":
+            body, gz = sim.replies.listing
+        elif resource.startswith(f"{OPER_MODULE}:interfaces/interface="):
+            reply = sim.replies.interface(resource.split("=", 1)[1])
+            if reply is None:
+                self._error(404, "invalid-value", "uri keypath not found")
+                return
+            body, gz = reply
+        else:
+            self._error(404, "invalid-value", "uri keypath not found")
+            return
+        self._send(200, body, gz=gz)
+
+
+class RestconfSimulator(HTTPSimulatorBase):
+    """HTTPS RESTCONF stand-in; use start()/stop() or as a context manager."""
+
+    def __init__(self, hosts=("127.0.0.1",), port=DEFAULT_PORT, interfaces=DEFAULT_INTERFACES, rpc_delay=0.0,
+                 max_inflight=0, fabric=None):
+        super().__init__(RestconfHandler, hosts=hosts, port=port, rpc_delay=rpc_delay, max_inflight=max_inflight)
+        self.replies = CannedReplies(interfaces)
+        self.fabric = fabric
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in RESTCONF server")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--devices", type=int, default=1, help="number of loopback addresses to serve")
+    parser.add_argument("--interfaces", type=int, default=DEFAULT_INTERFACES)
+    parser.add_argument("--rpc-delay", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--max-inflight", type=int, default=0,
+                        help="concurrent requests per device before answering 429 (0 = unlimited)")
+    parser.add_argument("--spines", type=int, default=0,
+                        help="cable the devices as a spine-leaf fabric with this many spines (0 = no fabric)")
+    parser.add_argument("--ios-every", type=int, default=0, help="in the fabric, every Nth leaf is IOS-XE")
+    args = parser.parse_args()
+
+    hosts = loopback_hosts(args.devices)
+    fabric = Fabric(hosts, args.spines, args.ios_every) if args.spines else None
+    sim = RestconfSimulator(hosts, args.port, args.interfaces, args.rpc_delay, args.max_inflight, fabric)
+    print(f"RESTCONF simulator on {sim.hosts[0]}..{sim.hosts[-1]}:{args.port} "
+          f"({args.interfaces} interfaces), login {USERNAME}/{PASSWORD}", flush=True)
+    try:
+        sim.serve_forever()
+    except KeyboardInterrupt:
+        pass
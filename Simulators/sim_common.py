@@ -0,0 +1,266 @@
+### Shared pieces of the stand-in servers in this directory
+### Loopback "device" addresses, one listener for many addresses, self-signed TLS, and a
+### spine-leaf Fabric whose CDP/LLDP adjacencies the NX-API and RESTCONF simulators report.
+
+# Linux routes all of 127.0.0.0/8 to the loopback interface, so a simulated fleet of
+# 5000 devices is 5000 distinct host addresses (127.0.0.1, 127.0.0.2, ...) on one port,
+# served by one process. The scripts key results by host, so every simulated device
+# needs its own address rather than its own port.
+
+import ipaddress
+import selectors
+import socket
+import ssl
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+CERT_DIR = Path(tempfile.gettempdir()) / "network_simulators"
+
+
+def loopback_hosts(count, first="127.0.0.1"):
+    """count loopback addresses starting at first, skipping .0 and .255 host parts."""
+    hosts = []
+    addr = ipaddress.IPv4Address(first)
+    while len(hosts) < count:
+        if int(addr) & 0xFF not in (0, 255):
+            hosts.append(str(addr))
+        addr += 1
+    return hosts
+
+def inventory(hosts, port, username="admin", password="admin", **extra):
+    """Device dicts in the device_info.py format for the given simulator addresses."""
+    return [dict({"host": h, "port": str(port), "username": username, "password": password}, **extra)
+            for h in hosts]
+
+
+class Fabric:
+    """Spine-leaf topology over simulator addresses: every leaf is cabled to every spine.
+
+    The first `spines` hosts are spines (Ethernet1/<leaf number> facing each leaf), the
+    rest leaves (Ethernet1/<48 + spine number> facing each spine). Every ios_every-th leaf
+    is an IOS-XE switch (GigabitEthernet1/0/<48 + spine number>), the rest NX-OS.
+    cut() / connect() change the cabling while a simulator is serving it.
+    """
+
+    def __init__(self, hosts, spines=2, ios_every=0):
+        self.hosts = list(hosts)
+        self.spines = self.hosts[:spines]
+        self._spines = set(self.spines)
+        self.leaves = self.hosts[spines:]
+        self.ios_every = ios_every
+        self.lock = threading.Lock()
+        self._number = {}
+        self._links = {host: {} for host in self.hosts}     # host -> {peer: (local intf, peer intf)}
+        for i, spine in enumerate(self.spines, 1):
+            self._number[spine] = i
+        for j, leaf in enumerate(self.leaves, 1):
+            self._number[leaf] = j
+            for spine in self.spines:
+                self.connect(spine, leaf)
+
+    def is_spine(self, host):
+        return host in self._spines
+
+    def platform(self, host):
+        if self.is_spine(host):
+            return "N9K-C9508"
+        if self.ios_every and self._number[host] % self.ios_every == 0:
+            return "C9300-48P"
+        return "N9K-C93180YC-EX"
+
+    def name(self, host):
+        return f"{'spine' if self.is_spine(host) else 'leaf'}-{self._number[host]}"
+
+    def serial(self, host):
+        return f"FDO{int(ipaddress.IPv4Address(host)) & 0xFFFFFF:08d}"
+
+    def port(self, host, peer):
+        """Interface of host facing peer."""
+        if self.is_spine(host):
+            return f"Ethernet1/{self._number[peer]}"
+        prefix = "GigabitEthernet1/0/" if self.platform(host).startswith("C9") else "Ethernet1/"
+        return f"{prefix}{48 + self._number[peer]}"
+
+    def connect(self, a, b):
+        with self.lock:
+            self._links[a][b] = (self.port(a, b), self.port(b, a))
+            self._links[b][a] = (self.port(b, a), self.port(a, b))
+
+    def cut(self, a, b):
+        with self.lock:
+            self._links[a].pop(b, None)
+            self._links[b].pop(a, None)
+
+    def neighbors(self, host):
+        """[{"name", "serial", "address", "platform", "local_intf", "remote_intf"}] of host."""
+        with self.lock:
+            links = sorted(self._links.get(host, {}).items(), key=lambda item: self._number[item[0]])
+        return [{"name": self.name(peer), "serial": self.serial(peer), "address": peer,
+                 "platform": self.platform(peer), "local_intf": local, "remote_intf": remote}
+                for peer, (local, remote) in links]
+
+
+class MultiListener:
+    """Accepts connections on port at every address in hosts; handler(conn, peer, local) runs in a thread."""
+
+    def __init__(self, hosts, port, handler, backlog=128):
+        self.hosts = list(hosts)
+        self.port = port
+        self.handler = handler
+        self.backlog = backlog
+        self._socks = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        for host in self.hosts:
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((host, self.port))
+            self.port = sock.getsockname()[1]    # port=0: the first bind picks, the rest reuse it
+            sock.listen(self.backlog)
+            sock.setblocking(False)
+            self._socks.append(sock)
+        self._thread = threading.Thread(target=self._accept_loop, daemon=True, name="sim-accept")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for sock in self._socks:
+            sock.close()
+
+    def _accept_loop(self):
+        with selectors.DefaultSelector() as sel:
+            for sock in self._socks:
+                sel.register(sock, selectors.EVENT_READ)
+            while not self._stop.is_set():
+                for key, _ in sel.select(timeout=0.5):
+                    try:
+                        conn, peer = key.fileobj.accept()
+                    except (BlockingIOError, OSError):
+                        continue
+                    conn.setblocking(True)
+                    # replies go out as header + body writes; without this Nagle and the
+                    # client's delayed ACK add ~40 ms to every request
+                    conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    threading.Thread(target=self._handle, args=(conn, peer, key.fileobj.getsockname()),
+                                     daemon=True).start()
+
+    def _handle(self, conn, peer, local):
+        try:
+            self.handler(conn, peer, local)
+        except Exception:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+def self_signed_context(cert_dir=CERT_DIR):
+    """Server SSLContext with a self-signed localhost certificate (generated once, then reused)."""
+    cert_dir = Path(cert_dir)
+    cert_path = cert_dir / "sim_cert.pem"
+    key_path = cert_dir / "sim_key.pem"
+    if not cert_path.exists() or not key_path.exists():
+        _write_self_signed(cert_path, key_path)
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ctx.load_cert_chain(str(cert_path), str(key_path))
+    return ctx
+
+def _write_self_signed(cert_path, key_path):
+    from datetime import datetime, timedelta, timezone
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "network-simulator")])
+    now = datetime.now(timezone.utc)
+    cert = (x509.CertificateBuilder()
+            .subject_name(name).issuer_name(name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - timedelta(days=1))
+            .not_valid_after(now + timedelta(days=3650))
+            .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+            .sign(key, hashes.SHA256()))
+    cert_path.parent.mkdir(parents=True, exist_ok=True)
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+    key_path.chmod(0o600)
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+
+
+class HTTPSimulatorBase:
+    """Serves a BaseHTTPRequestHandler class over TLS on many loopback addresses."""
+
+    def __init__(self, handler_cls, hosts=("127.0.0.1",), port=0, tls=True, rpc_delay=0.0, max_inflight=0):
+        self.hosts = list(hosts)
+        self.rpc_delay = rpc_delay
+        self.max_inflight = max_inflight      # per device address; more concurrent requests get 429
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self.ssl_context = self_signed_context() if tls else None
+        # never bound: connections come from the MultiListener, the server object only
+        # carries state for the handlers (handler.server)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler_cls, bind_and_activate=False)
+        self.httpd.simulator = self
+        self.listener = MultiListener(self.hosts, port, self._serve_connection)
+
+    @property
+    def port(self):
+        return self.listener.port
+
+    def _serve_connection(self, conn, peer, local):
+        if self.ssl_context is not None:
+            conn = self.ssl_context.wrap_socket(conn, server_side=True)
+        try:
+            self.httpd.finish_request(conn, peer)
+        finally:
+            self.httpd.shutdown_request(conn)
+
+    def delay(self):
+        if self.rpc_delay:
+            time.sleep(self.rpc_delay)
+
+    def enter(self, host):
+        """Count a request to host in; False (and not counted) when it would exceed max_inflight."""
+        with self._inflight_lock:
+            busy = self._inflight.get(host, 0)
+            if self.max_inflight and busy >= self.max_inflight:
+                return False
+            self._inflight[host] = busy + 1
+            return True
+
+    def leave(self, host):
+        with self._inflight_lock:
+            self._inflight[host] -= 1
+
+    def start(self):
+        self.listener.start()
+        return self
+
+    def stop(self):
+        self.listener.stop()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def serve_forever(self):
+        self.start()
+        try:
+            while True:
+                time.sleep(1)
+        finally:
+            self.stop()